@@ -0,0 +1,347 @@
+# almacen_local.py
+import argparse
+import json
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime
+
+from modelo_evaluacion import VERSION_ESQUEMA, clave_borrador
+
+# MAJ: Almacén local de evaluaciones en SQLite, para trabajar sin conexión desde la cancha.
+# Se usa solo (SAR_ALMACEN=sqlite) o como caché delante de MongoDB (SAR_ALMACEN=mixto): las lecturas
+# se resuelven acá (la primera vez se trae el área completa de MongoDB) y los guardados se escriben
+# acá marcados como pendientes hasta sincronizarlos (ver repositorio_evaluaciones.sincronizar).
+# Cada evaluación es una fila con el documento en JSON y clave primaria (year, area, nombre),
+# así buscar una evaluación es una lectura por índice en un archivo local.
+#
+#     python almacen_local.py          # sube a MongoDB lo que quedó pendiente
+
+RUTA_ALMACEN = os.environ.get("SAR_ALMACEN_SQLITE",
+                              os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "evaluaciones.sqlite"))
+TAMANO_LOTE_LECTURA = 50
+
+
+def _codificar(valor):
+    # Las fechas se guardan como {"$fecha": iso} para devolverlas como datetime (y sincronizarlas como fechas)
+    if isinstance(valor, datetime):
+        return {"$fecha": valor.isoformat()}
+    return str(valor)
+
+
+def _decodificar(objeto):
+    if len(objeto) == 1 and "$fecha" in objeto:
+        return datetime.fromisoformat(objeto["$fecha"])
+    return objeto
+
+
+def a_json(documento):
+    """Serializa un documento a JSON conservando las fechas (ver de_json)."""
+    return json.dumps(documento, ensure_ascii=False, default=_codificar)
+
+
+def de_json(texto):
+    """Inverso de a_json: las fechas vuelven como datetime."""
+    return json.loads(texto, object_hook=_decodificar)
+
+
+class AlmacenSQLite:
+    """Evaluaciones en un archivo SQLite (modo WAL), indexadas por (year, area, nombre)."""
+
+    def __init__(self, ruta=RUTA_ALMACEN):
+        self.ruta = ruta
+        self._lock = threading.Lock()
+        if ruta != ":memory:":
+            os.makedirs(os.path.dirname(ruta) or ".", exist_ok=True)
+        self._conexion = sqlite3.connect(ruta, check_same_thread=False)
+        # WAL: las lecturas no esperan a las escrituras y cada guardado es un append al log
+        self._conexion.execute("PRAGMA journal_mode=WAL")
+        self._conexion.execute("PRAGMA synchronous=NORMAL")
+        self._conexion.execute(
+            "CREATE TABLE IF NOT EXISTS evaluaciones ("
+            " year INTEGER NOT NULL, area TEXT NOT NULL, nombre TEXT NOT NULL,"
+            " documento TEXT NOT NULL, actualizado REAL NOT NULL, pendiente INTEGER NOT NULL DEFAULT 0,"
+            " PRIMARY KEY (year, area, nombre))"
+        )
+        # Historial de un participante (todos sus años)
+        self._conexion.execute("CREATE INDEX IF NOT EXISTS idx_evaluaciones_nombre ON evaluaciones (nombre, year)")
+        self._conexion.execute("CREATE INDEX IF NOT EXISTS idx_evaluaciones_pendiente ON evaluaciones (pendiente) WHERE pendiente = 1")
+        # Borradores del autoguardado pendientes de sincronizar (modo mixto), aparte de los guardados completos:
+        # se suben solos ($set / $unset de borradores.<clave>) sin tocar respuestas, conclusión ni versión
+        self._conexion.execute(
+            "CREATE TABLE IF NOT EXISTS borradores_pendientes (year INTEGER NOT NULL, area TEXT NOT NULL, nombre TEXT NOT NULL,"
+            " clave TEXT NOT NULL, actualizado REAL NOT NULL, PRIMARY KEY (year, area, nombre, clave))"
+        )
+        # Áreas ya traídas de MongoDB (modo mixto) y cuándo
+        self._conexion.execute(
+            "CREATE TABLE IF NOT EXISTS areas_cargadas (year INTEGER NOT NULL, area TEXT NOT NULL, instante REAL NOT NULL,"
+            " PRIMARY KEY (year, area))"
+        )
+        self._conexion.commit()
+
+    def obtener(self, year, area, nombre):
+        """Devuelve el documento de una evaluación (o None)."""
+        with self._lock:
+            fila = self._conexion.execute(
+                "SELECT documento FROM evaluaciones WHERE year = ? AND area = ? AND nombre = ?", (year, area, nombre)
+            ).fetchone()
+        return de_json(fila[0]) if fila else None
+
+    def buscar(self, year, areas=None):
+        """
+        Todas las evaluaciones de un año (y opcionalmente de algunas áreas).
+
+        Returns:
+            dict: {(nombre, area): documento}
+        """
+        consulta = "SELECT documento FROM evaluaciones WHERE year = ?"
+        parametros = [year]
+        if areas:
+            consulta += f" AND area IN ({','.join('?' * len(areas))})"
+            parametros += list(areas)
+        with self._lock:
+            filas = self._conexion.execute(consulta, parametros).fetchall()
+        documentos = [de_json(documento) for documento, in filas]
+        return {(doc["nombre"], doc["area"]): doc for doc in documentos}
+
+    def buscar_por_nombre(self, nombre):
+        """Todas las evaluaciones de un participante, ordenadas por año."""
+        with self._lock:
+            filas = self._conexion.execute(
+                "SELECT documento FROM evaluaciones WHERE nombre = ? ORDER BY year", (nombre,)).fetchall()
+        return [de_json(documento) for documento, in filas]
+
+    def iterar(self, year=None, area=None):
+        """
+        Recorre las evaluaciones ordenadas por (year, area, nombre), leyendo de a TAMANO_LOTE_LECTURA
+        (paginación por clave: cada lote sigue al último leído usando la clave primaria).
+
+        Args:
+            year: Año (None = todos)
+            area: Área (None = todas)
+        """
+        condiciones, parametros = [], []
+        if year is not None:
+            condiciones.append("year = ?")
+            parametros.append(year)
+        if area is not None:
+            condiciones.append("area = ?")
+            parametros.append(area)
+        ultimo = None
+        while True:
+            siguiente = ["(year, area, nombre) > (?, ?, ?)"] if ultimo is not None else []
+            where = " AND ".join(condiciones + siguiente) or "1"
+            with self._lock:
+                filas = self._conexion.execute(
+                    f"SELECT year, area, nombre, documento FROM evaluaciones WHERE {where} ORDER BY year, area, nombre LIMIT ?",
+                    parametros + list(ultimo or ()) + [TAMANO_LOTE_LECTURA]).fetchall()
+            if not filas:
+                return
+            for *_, documento in filas:
+                yield de_json(documento)
+            ultimo = filas[-1][:3]
+
+    def guardar(self, documento, pendiente=False):
+        """Guarda (o reemplaza) un documento; pendiente=True lo marca para sincronizar con MongoDB."""
+        self.guardar_varios([documento], pendiente)
+
+    def guardar_varios(self, documentos, pendiente=False):
+        """
+        Guarda (o reemplaza) muchos documentos en una sola transacción.
+        La 'version' del documento guardado sigue contando desde la anterior (1 si es nuevo).
+        """
+        ahora = time.time()
+        with self._lock:
+            self._conexion.executemany(
+                "INSERT INTO evaluaciones (year, area, nombre, documento, actualizado, pendiente)"
+                " VALUES (?, ?, ?, json_set(?, '$.version', 1), ?, ?)"
+                " ON CONFLICT (year, area, nombre) DO UPDATE SET"
+                " documento = json_set(excluded.documento, '$.version', COALESCE(json_extract(evaluaciones.documento, '$.version'), 0) + 1),"
+                " actualizado = excluded.actualizado, pendiente = excluded.pendiente",
+                [(doc["year"], doc["area"], doc["nombre"], a_json(doc), ahora, int(pendiente)) for doc in documentos],
+            )
+            self._conexion.commit()
+
+    def actualizar_si_version(self, year, area, nombre, version_base, campos, quitar=(), pendiente=False, vacio=False):
+        """
+        Actualización condicional (control de versión optimista): aplica los campos solo si la versión
+        guardada sigue siendo version_base (0 = no existe o nunca se guardó con versión) y suma 1 a la versión.
+
+        Args:
+            campos: {campo: valor}; admite claves con punto como en MongoDB ('respuestas.q01')
+            quitar: Campos a borrar
+            vacio: True si además el documento guardado tiene que seguir sin respuestas
+
+        Returns:
+            int | None: Nueva versión, o None si la versión guardada ya no es version_base
+        """
+        with self._lock:
+            fila = self._conexion.execute(
+                "SELECT documento FROM evaluaciones WHERE year = ? AND area = ? AND nombre = ?", (year, area, nombre)
+            ).fetchone()
+            documento = de_json(fila[0]) if fila else {"nombre": nombre, "area": area, "year": year}
+            if (documento.get("version") or 0) != version_base:
+                return None
+            if vacio and (documento.get("respuestas") or documento.get("evaluaciones")):
+                return None
+            for campo, valor in campos.items():
+                *ruta, ultimo = campo.split(".")
+                destino = documento
+                for parte in ruta:
+                    destino = destino.setdefault(parte, {})
+                destino[ultimo] = valor
+            for campo in quitar:
+                *ruta, ultimo = campo.split(".")
+                destino = documento
+                for parte in ruta:
+                    destino = destino.get(parte) or {}
+                destino.pop(ultimo, None)
+            documento["version"] = version_base + 1
+            ahora = time.time()
+            self._conexion.execute(
+                "INSERT OR REPLACE INTO evaluaciones (year, area, nombre, documento, actualizado, pendiente) VALUES (?, ?, ?, ?, ?, ?)",
+                (year, area, nombre, a_json(documento), ahora, int(pendiente)),
+            )
+            if pendiente:
+                # Los borradores que pasaron a las respuestas también se borran en MongoDB
+                self._marcar_borradores(year, area, nombre, [campo.split(".", 1)[1] for campo in quitar
+                                                             if campo.startswith("borradores.")], ahora)
+            self._conexion.commit()
+            return documento["version"]
+
+    def _marcar_borradores(self, year, area, nombre, claves, ahora):
+        # Debe llamarse con _lock tomado
+        self._conexion.executemany(
+            "INSERT OR REPLACE INTO borradores_pendientes (year, area, nombre, clave, actualizado) VALUES (?, ?, ?, ?, ?)",
+            [(year, area, nombre, clave, ahora) for clave in claves],
+        )
+
+    def aplicar_borrador(self, year, area, nombre, evaluador, respuestas, conclusion=None, pendiente=False):
+        """
+        Aplica un borrador (solo las respuestas que cambiaron) en borradores.<evaluador> del documento,
+        o crea el documento marcado como borrador. Las respuestas guardadas y la versión no cambian.
+
+        Args:
+            respuestas: {qid: [calificacion, observaciones]}
+            conclusion: Nueva conclusión (None si no cambió)
+            pendiente: True para sincronizar el borrador con MongoDB (solo el borrador, ver borradores_pendientes)
+        """
+        with self._lock:
+            fila = self._conexion.execute(
+                "SELECT documento FROM evaluaciones WHERE year = ? AND area = ? AND nombre = ?", (year, area, nombre)
+            ).fetchone()
+            ahora = datetime.now()
+            documento = de_json(fila[0]) if fila else {"nombre": nombre, "area": area, "year": year, "evaluador": evaluador,
+                                                          "fecha": ahora, "borrador": True, "esquema": VERSION_ESQUEMA}
+            borrador = documento.setdefault("borradores", {}).setdefault(clave_borrador(evaluador), {})
+            borrador.setdefault("respuestas", {}).update(respuestas)
+            if conclusion is not None:
+                borrador["conclusion"] = conclusion
+            borrador["fecha"] = ahora
+            # La marca de guardado pendiente de la fila queda como estaba: un borrador no es un guardado
+            self._conexion.execute(
+                "INSERT INTO evaluaciones (year, area, nombre, documento, actualizado) VALUES (?, ?, ?, ?, ?)"
+                " ON CONFLICT (year, area, nombre) DO UPDATE SET documento = excluded.documento",
+                (year, area, nombre, a_json(documento), time.time()),
+            )
+            if pendiente:
+                self._marcar_borradores(year, area, nombre, [clave_borrador(evaluador)], time.time())
+            self._conexion.commit()
+
+    def reemplazar_area(self, year, area, documentos):
+        """
+        Carga en el almacén las evaluaciones de un año/área traídas de MongoDB.
+        Las filas con cambios pendientes de sincronizar (guardados o borradores) no se pisan.
+        """
+        ahora = time.time()
+        with self._lock:
+            self._conexion.executemany(
+                "INSERT INTO evaluaciones (year, area, nombre, documento, actualizado, pendiente) VALUES (?, ?, ?, ?, ?, 0)"
+                " ON CONFLICT (year, area, nombre) DO UPDATE SET documento = excluded.documento, actualizado = excluded.actualizado"
+                " WHERE pendiente = 0 AND NOT EXISTS (SELECT 1 FROM borradores_pendientes b"
+                " WHERE b.year = excluded.year AND b.area = excluded.area AND b.nombre = excluded.nombre)",
+                [(year, area, doc["nombre"], a_json(dict(doc, year=year, area=area)), ahora) for doc in documentos],
+            )
+            self._conexion.execute("INSERT OR REPLACE INTO areas_cargadas (year, area, instante) VALUES (?, ?, ?)", (year, area, ahora))
+            self._conexion.commit()
+
+    def area_cargada(self, year, area, ttl):
+        """True si el área se trajo de MongoDB hace menos de ttl segundos."""
+        with self._lock:
+            fila = self._conexion.execute("SELECT instante FROM areas_cargadas WHERE year = ? AND area = ?", (year, area)).fetchone()
+        return fila is not None and time.time() - fila[0] < ttl
+
+    def pendientes(self):
+        """
+        Evaluaciones guardadas localmente que todavía no se sincronizaron.
+
+        Returns:
+            list: [(actualizado, documento)]
+        """
+        with self._lock:
+            filas = self._conexion.execute("SELECT actualizado, documento FROM evaluaciones WHERE pendiente = 1").fetchall()
+        return [(actualizado, de_json(documento)) for actualizado, documento in filas]
+
+    def cantidad_pendientes(self):
+        with self._lock:
+            return self._conexion.execute("SELECT COUNT(*) FROM evaluaciones WHERE pendiente = 1").fetchone()[0]
+
+    def cantidad_borradores_pendientes(self):
+        with self._lock:
+            return self._conexion.execute("SELECT COUNT(*) FROM borradores_pendientes").fetchone()[0]
+
+    def borradores_pendientes(self):
+        """
+        Borradores del autoguardado que todavía no se sincronizaron.
+
+        Returns:
+            list: [(actualizado, clave, documento)] (documento = la fila completa; el borrador es borradores.<clave>,
+                  y si ya no está, el borrador se pasó a las respuestas y hay que borrarlo en MongoDB)
+        """
+        with self._lock:
+            filas = self._conexion.execute(
+                "SELECT b.actualizado, b.clave, e.documento FROM borradores_pendientes b"
+                " JOIN evaluaciones e USING (year, area, nombre)").fetchall()
+        return [(actualizado, clave, de_json(documento)) for actualizado, clave, documento in filas]
+
+    def marcar_borradores_sincronizados(self, borradores):
+        """Quita los borradores sincronizados, salvo los que cambiaron mientras se sincronizaban."""
+        with self._lock:
+            self._conexion.executemany(
+                "DELETE FROM borradores_pendientes WHERE year = ? AND area = ? AND nombre = ? AND clave = ? AND actualizado = ?",
+                [(doc["year"], doc["area"], doc["nombre"], clave, actualizado) for actualizado, clave, doc in borradores],
+            )
+            self._conexion.commit()
+
+    def marcar_sincronizados(self, pendientes):
+        """Quita la marca de pendiente, salvo a las filas que cambiaron mientras se sincronizaban."""
+        with self._lock:
+            self._conexion.executemany(
+                "UPDATE evaluaciones SET pendiente = 0 WHERE year = ? AND area = ? AND nombre = ? AND actualizado = ?",
+                [(doc["year"], doc["area"], doc["nombre"], actualizado) for actualizado, doc in pendientes],
+            )
+            self._conexion.commit()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sincroniza con MongoDB las evaluaciones guardadas en el almacén local.")
+    parser.add_argument("--mongo-uri", default=None, help="URI de MongoDB (por defecto st.secrets['mongo_uri'])")
+    parser.add_argument("--db", default=None, help="Base de datos (por defecto st.secrets['db_name'])")
+    parser.add_argument("--coleccion", default=None, help="Colección (por defecto st.secrets['collection_name'])")
+    args = parser.parse_args()
+
+    from repositorio_evaluaciones import obtener_almacen, obtener_coleccion, sincronizar
+    pendientes = obtener_almacen().cantidad_pendientes() + obtener_almacen().cantidad_borradores_pendientes()
+    if not pendientes:
+        print("ℹ️ No hay evaluaciones pendientes de sincronizar")
+        return
+    sincronizadas = sincronizar(obtener_coleccion(args.mongo_uri, args.db, args.coleccion))
+    if sincronizadas:
+        print(f"✅ {sincronizadas} de {pendientes} evaluaciones sincronizadas")
+    else:
+        print("⚠️ No se pudo sincronizar, las evaluaciones siguen pendientes")
+
+
+if __name__ == "__main__":
+    main()
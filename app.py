@@ -1,176 +1,30 @@
 import streamlit as st
-from datetime import datetime
-import pandas as pd
-from config import DESCRIPCIONES_AREAS_EN, cargar_preguntas_desde_csv, cargar_evaluadores_desde_csv
-from pymongo import MongoClient
-from babel.dates import format_date
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, Image
-from reportlab.lib.pagesizes import A4
-from reportlab.lib import colors
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from deep_translator import GoogleTranslator
+from config import ENCABEZADOS_PDF, cargar_preguntas_desde_csv, cargar_evaluadores_desde_csv, separar_evaluadores
+from repositorio_evaluaciones import MODO_ALMACEN, buscar_por_pregunta, cargar_evaluacion, guardar_evaluacion, cantidad_sin_sincronizar, sincronizar
+from datos_referencia import nombres_participantes, datos_participante
+from traducciones import iniciar_prefetch
+from resumen import CALIFICACIONES, obtener_resumen
+from historial import obtener_historial
+from autoguardado import AUTOGUARDADO_ACTIVADO, instantanea_formulario, detectar_cambios, registrar_borrador, descartar_borrador, con_borrador
+from modelo_evaluacion import Evaluacion, CALIFICACIONES_VALIDAS
+from instrumentacion import inicio_rerun, fin_rerun, descartar_rerun, medir, medir_rerun, mostrar_panel
+from cola_trabajos import ERROR, INTERVALO_SONDEO_SEGUNDOS, LISTO, encolar_pdf, estado_trabajo, iniciar_trabajadores
+
+# MAJ: reportlab y babel se importan recién cuando se usan
+# (generar PDF, formatear fecha) para que la app arranque más rápido
 
 # Función para formatear la fecha en español
 def formatear_fecha(fecha):
+    from babel.dates import format_date
     return format_date(fecha, format='MMMM yyyy', locale='es')
 
-# Conexión a MongoDB usando la configuración desde st.secrets
-client = MongoClient(st.secrets["mongo_uri"])
-db = client[st.secrets["db_name"]]  # Usamos el nombre de la base de datos
-collection = db[st.secrets["collection_name"]]  # Usamos el nombre de la colección
-def cargar_evaluacion(nombre, area, year):
-    evaluacion_guardada = collection.find_one(
-        {"nombre": nombre, "area": area, "year": year}
-    )
-    return evaluacion_guardada
-
-# Guardar evaluación en MongoDB
-def guardar_evaluacion(datos, evaluaciones, conclusion, evaluador, descripciones_areas, year):
-    # Asegurarse de que todas las descripciones estén en evaluaciones, si no tienen calificación asignada se les da un 0
-    for e in descripciones_areas[datos["area"]]: #MAJ las descripciones se pasan como parámetro
-        if not any(ev["descripcion"] == e for ev in evaluaciones):
-            evaluaciones.append({"descripcion": e, "calificacion": 0, "observaciones": ""})
-
-    evaluacion_doc = {
-        "nombre": datos["nombre"],
-        "area": datos["area"],
-        "year": year,  # Agregar el año
-        "fecha": datetime.now(),
-        "evaluador": evaluador,
-        "evaluaciones": evaluaciones,  # Incluye las calificaciones y observaciones
-        "conclusion": conclusion
-    }
-
-    # Usar update_one con upsert para actualizar si existe o crear si no existe
-    # Buscar por nombre, área y año
-    collection.update_one(
-        {"nombre": datos["nombre"], "area": datos["area"], "year": year},
-        {"$set": evaluacion_doc},
-        upsert=True
-    )
-
-# Función para agregar número de páginas al pie de cada página
-def add_page_number(canvas, doc):
-    canvas.saveState()
-    page_number = canvas.getPageNumber()  # Número de la página actual
-    canvas.setFont("Helvetica", 8)
-    canvas.drawString(520, 10, f"Página {page_number}")  # Coloca el número de página en el pie
-    canvas.drawCentredString(300, 10, "Generado por el sistema de Evaluación SAR")  # Texto centrado
-    canvas.restoreState()
-
-# Generar PDF con ReportLab
-def generar_pdf_con_reportlab(datos, evaluaciones, conclusion, evaluador, output_path, language='es', header_pdf_path=None):
-    doc = SimpleDocTemplate(output_path, pagesize=A4, leftMargin=40, rightMargin=40, topMargin=40, bottomMargin=40)
-    styles = getSampleStyleSheet()
-
-    # Estilos personalizados
-    styles.add(ParagraphStyle(name="CustomTitle", fontSize=14, alignment=0, textColor=colors.HexColor("#0A0A45"), fontName="Helvetica-Bold"))
-    styles.add(ParagraphStyle(name="CustomSubtitle", fontSize=11, spaceAfter=10, textColor=colors.goldenrod, fontName="Helvetica-Bold"))
-    styles.add(ParagraphStyle(name="CustomFooter", fontSize=10, alignment=2, textColor=colors.grey))
-    styles.add(ParagraphStyle(name="TableCell", fontSize=8, alignment=0, leading=12))  # Tamaño de fuente para descripción y observaciones
-    styles.add(ParagraphStyle(name="ClassificacionCell", fontSize=12, alignment=1, leading=12))  # Tamaño de fuente para clasificación (centrado)
-
-    elements = []
-
-    if header_pdf_path:
-        try:
-            img = Image(header_pdf_path, width=A4[0] - 80, height=(A4[0] - 80) * 0.2)  # Ajusta proporción
-            elements.append(img)
-        except IOError:
-            elements.append(Paragraph("<b>Encabezado no disponible</b>", styles["Normal"]))
-
-    # Título EVALUACIÓN con la fecha en la misma fila
-    elements.append(Spacer(1, 5))
-
-    # Obtener la fecha desde los datos y usarla como texto
-    fecha_original = datos['fecha']
-    
-    if language == 'en':
-        title_text = "EVALUATION"
-        area_text = "Area"
-        nombre_text = "Name"
-        contacto_text = "Contact"
-        celular_text = "Phone"
-        union_text = "Union/Federation"
-        table_header = ["Description", "Rating", "Observations"]
-        total_text = "Total"
-        conclusion_text = "Conclusion"
-    else:
-        title_text = "EVALUACIÓN"
-        area_text = "Área"
-        nombre_text = "Nombre"
-        contacto_text = "Contacto"
-        celular_text = "Celular"
-        union_text = "Unión/Federación"
-        table_header = ["Descripción", "Calificación", "Observaciones"]
-        total_text = "Total"
-        conclusion_text = "Conclusión"
-
-
-    # Crear una tabla para el encabezado con EVALUACIÓN y Fecha
-    header_table_data = [
-        [Paragraph(f"<b>{title_text}</b>", styles["CustomTitle"]),
-         Paragraph(f"{fecha_original}", ParagraphStyle(name="DateStyle", fontSize=11, alignment=2))]
-    ]
-
-    header_table = Table(header_table_data, colWidths=[300, 200])  # Ajusta el ancho de las columnas
-    header_table.setStyle(TableStyle([
-        ("ALIGN", (0, 0), (0, 0), "LEFT"),  # Alinear "EVALUACIÓN" a la izquierda
-        ("ALIGN", (1, 0), (1, 0), "RIGHT"),  # Alinear fecha a la derecha
-        ("LEFTPADDING", (0, 0), (-1, -1), 0),  # Sin relleno izquierdo
-        ("RIGHTPADDING", (0, 0), (-1, -1), 0),  # Sin relleno derecho
-        ("VALIGN", (0, 0), (-1, -1), "TOP"),  # Alinear verticalmente en la parte superior
-        ("TOPPADDING", (0, 0), (-1, -1), 0),  # Sin espacio superior
-        ("BOTTOMPADDING", (0, 0), (-1, -1), 0),  # Sin espacio inferior
-    ]))
-
-    elements.append(header_table)  # Agregar la tabla
-    elements.append(Spacer(1, 5))  # Espacio reducido entre "EVALUACIÓN" y "ÁREA"
-
-    # Información del evaluado
-    elements.append(Spacer(1, 5))
-    elements.append(Paragraph(f"<b>{area_text}:</b> {datos['area']}", styles["CustomSubtitle"]))
-    elements.append(Spacer(1, 5))
-    elements.append(Paragraph(f"<b>{nombre_text}:</b> {datos['nombre']}", styles["Normal"]))
-    elements.append(Paragraph(f"<b>{contacto_text}:</b> {datos['email']} | <b>{celular_text}:</b> {datos['celular']}", styles["Normal"]))
-    elements.append(Paragraph(f"<b>{union_text}:</b> {datos['uni']}", styles["Normal"]))
-
-    # Tabla de evaluaciones
-    elements.append(Spacer(1, 20))
-    table_data = [table_header] + [
-        [Paragraph(e["descripcion"], styles["TableCell"]),
-         Paragraph(str(e["calificacion"]), styles["ClassificacionCell"]),  # Centrado y más grande
-         Paragraph(e["observaciones"], styles["TableCell"])] for e in evaluaciones
-    ]
-    table = Table(table_data, colWidths=[200, 100, 200])
-    table.setStyle(TableStyle([
-        ("BACKGROUND", (0, 0), (-1, 0), colors.HexColor("#0A0A45")),
-        ("TEXTCOLOR", (0, 0), (-1, 0), colors.white),
-        ("ALIGN", (0, 0), (-1, -1), "LEFT"),
-        ("FONTNAME", (0, 0), (-1, 0), "Helvetica-Bold"),
-        ("BOTTOMPADDING", (0, 0), (-1, 0), 12),
-        ("BACKGROUND", (0, 1), (-1, -1), colors.whitesmoke),
-        ("GRID", (0, 0), (-1, -1), 1, colors.black),
-    ]))
-    elements.append(table)
-
-    # Total de calificaciones (más grande)
-    elements.append(Spacer(1, 10))
-    total_calificaciones = sum(e["calificacion"] for e in evaluaciones)
-    elements.append(Paragraph(f"<b>{total_text}:</b> {total_calificaciones}", styles["CustomTitle"]))
-
-    # Conclusión y Evaluador
-    elements.append(Spacer(1, 20))
-    elements.append(Paragraph(f"<b>{conclusion_text}:</b> {conclusion}", styles["Normal"]))
-    elements.append(Spacer(1, 10))
-    elements.append(Paragraph(f"{evaluador}", styles["CustomFooter"]))
-
-    # Agregar número de página al footer
-    doc.build(elements, onFirstPage=add_page_number, onLaterPages=add_page_number)
-
 # Aplicación principal de Streamlit
 def main():
-    
+    inicio = inicio_rerun()
+    # MAJ: Los trabajadores de la cola de PDFs arrancan con la app (una sola vez por proceso), así
+    # también procesan los trabajos que quedaron pendientes de antes de un reinicio
+    iniciar_trabajadores()
+
     #MAJ Ruta de la imagen del logo EN LA APP
     logo_path = "images/Hori_D_blanco_SAR.png"  # Cambia esta ruta si es necesario
 
@@ -178,38 +32,115 @@ def main():
     st.sidebar.image(logo_path, width=200)  # Ajusta el ancho de la imagen manualmente
     st.title("Generador de Evaluaciones")
 
-    header_options = {
-        "SAR 2025": "images/header_2025.png",
-        "SAR 2024": "images/header_2024.png",
-        "SAR 2023": "images/header_2023.png"
-    }
+    header_options = ENCABEZADOS_PDF
     selected_header = st.sidebar.selectbox("Seleccionar Encabezado", list(header_options.keys()))
     header_pdf_path = header_options[selected_header]
 
-    # Cargar datos antes de los tabs para que estén disponibles en ambos
-    PARTICIPANTES_CSV_PATH = "SAR 2024 ACADEMIA HP/Participantes x Areas.csv" #MAJ CSV DE LOS PARTICIPANTES A EVALUAR
-    df_participantes = pd.read_csv(PARTICIPANTES_CSV_PATH)
-
-    # Filtrar por año seleccionado y cargar preguntas/evaluadores del año correspondiente
+    # Año seleccionado: se usa para filtrar participantes y cargar preguntas/evaluadores del año correspondiente
+    # MAJ: Los CSV se parsean una sola vez (datos_referencia) y no en cada rerun
     year_to_filter = selected_header.split(" ")[-1]
     year_int = int(year_to_filter)
-    df_participantes = df_participantes[df_participantes["FECHA"].str.contains(year_to_filter, na=False)]
 
     # Cargar preguntas y evaluadores para el año seleccionado
-    DESCRIPCIONES_AREAS = cargar_preguntas_desde_csv(year=year_int)
-    EVALUADORES_AREAS = cargar_evaluadores_desde_csv(year=year_int)
+    with medir("csv"):
+        DESCRIPCIONES_AREAS = cargar_preguntas_desde_csv(year=year_int)
+        EVALUADORES_AREAS = cargar_evaluadores_desde_csv(year=year_int)
 
     area = st.sidebar.selectbox("Área de Evaluación", list(DESCRIPCIONES_AREAS.keys()))
-    participantes_area = df_participantes[df_participantes["AREA"] == area]
     evaluador = EVALUADORES_AREAS.get(area, "Evaluador no asignado")
-    st.sidebar.text_input("Evaluador", value=evaluador, disabled=True)
-    nombre = st.sidebar.selectbox("Nombre del Evaluado", participantes_area["NOMBRE"].unique())
+    # MAJ: Si el área tiene varios evaluadores, cada uno elige su nombre (autor): el borrador autoguardado y
+    # la base de sus guardados son suyos. evaluador sigue siendo la celda completa del CSV (la que va en el PDF)
+    evaluadores = separar_evaluadores(evaluador)
+    if len(evaluadores) > 1:
+        autor = st.sidebar.selectbox("Evaluador", evaluadores, index=None, placeholder="Elegí tu nombre")
+        if autor is None:
+            st.sidebar.warning("⚠️ Elegí tu nombre para que tus cambios se guarden como borrador")
+    else:
+        st.sidebar.text_input("Evaluador", value=evaluador, disabled=True)
+        autor = evaluador
+    with medir("csv"):
+        nombres = nombres_participantes(year_int, area)
+    nombre = st.sidebar.selectbox("Nombre del Evaluado", nombres)
+
+    # MAJ Generación por lotes: todos los PDFs (ES/EN) del año en un único ZIP
+    with st.sidebar.expander("Generación por lotes"):
+        todas_las_areas = st.checkbox("Todas las áreas", value=False)
+        traducir_lote = st.checkbox("Traducir observaciones (EN)", value=True)
+        if st.button("Generar PDFs del lote (ZIP)"):
+            from generacion_lote import generar_lote_zip
+            areas_lote = None if todas_las_areas else [area]
+            with st.spinner("Generando PDFs..."), medir("pdf_lote"):
+                zip_bytes, cantidad, pendientes = generar_lote_zip(None, year_int, areas_lote, traducir=traducir_lote)
+            st.success(f"✅ {cantidad} PDFs generados")
+            if pendientes:
+                st.info(f"ℹ️ {len(pendientes)} participantes sin evaluación guardada")
+            nombre_zip = f"evaluaciones_{year_int}.zip" if todas_las_areas else f"evaluaciones_{year_int}_{area}.zip"
+            st.download_button(label="Descargar ZIP", data=zip_bytes, file_name=nombre_zip, mime="application/zip")
+        # MAJ Reporte consolidado: un único PDF con todos los participantes del área y sus totales al comienzo
+        if st.button("Reporte consolidado del área (PDF)"):
+            from reporte_consolidado import generar_reporte_area_bytes
+            with st.spinner("Generando reporte..."), medir("pdf_consolidado"):
+                pdf_reporte, cantidad = generar_reporte_area_bytes(None, year_int, area, header_pdf_path=header_pdf_path)
+            st.success(f"✅ Reporte con {cantidad} participantes")
+            st.download_button(label="Descargar reporte", data=pdf_reporte, file_name=f"reporte_{year_int}_{area}.pdf",
+                               mime="application/pdf")
+        # MAJ Exportación para análisis: una fila por pregunta respondida (año seleccionado, área o todas)
+        formato_exportacion = st.radio("Formato de exportación", ["csv", "parquet"], horizontal=True)
+        if st.button("Exportar evaluaciones"):
+            from exportacion import exportar_bytes
+            area_exportacion = None if todas_las_areas else area
+            with st.spinner("Exportando..."), medir("exportacion"):
+                datos_exportacion, cantidad = exportar_bytes(formato_exportacion, year_int, area_exportacion)
+            st.success(f"✅ {cantidad} filas exportadas")
+            sufijo = f"{year_int}" if todas_las_areas else f"{year_int}_{area}"
+            st.download_button(label="Descargar exportación", data=datos_exportacion,
+                               file_name=f"evaluaciones_{sufijo}.{formato_exportacion}",
+                               mime="text/csv" if formato_exportacion == "csv" else "application/octet-stream")
+
+    # MAJ Importación de puntajes desde una planilla (CSV/XLSX) completada fuera de la app
+    with st.sidebar.expander("Importar puntajes"):
+        from importacion_puntajes import importar_planilla, leer_planilla, plantilla_bytes
+        st.download_button(label="Descargar plantilla del área", data=plantilla_bytes(year_int, [area], formato="csv"),
+                           file_name=f"puntajes_{year_int}_{area}.csv", mime="text/csv")
+        planilla = st.file_uploader("Planilla con los puntajes", type=["csv", "xlsx"])
+        sobrescribir = st.checkbox("Reemplazar las evaluaciones ya guardadas")
+        if planilla is not None and st.button("Importar"):
+            try:
+                df_planilla = leer_planilla(planilla)
+            except ImportError:
+                st.error("Para leer archivos XLSX hace falta instalar openpyxl; subí la planilla como CSV")
+            else:
+                with st.spinner("Importando..."), medir("importacion"):
+                    guardadas, errores, avisos = importar_planilla(df_planilla, year_int, sobrescribir=sobrescribir)
+                for aviso in avisos:
+                    st.info(f"ℹ️ {aviso}")
+                for error in errores:
+                    st.warning(f"⚠️ {error}")
+                if errores:
+                    st.error("No se importó nada: corregí la planilla y volvé a subirla")
+                else:
+                    st.success(f"✅ {guardadas} evaluaciones importadas")
+
+    # MAJ Almacén local (SAR_ALMACEN=mixto): guardados que todavía no llegaron a MongoDB
+    if MODO_ALMACEN == "mixto":
+        sin_sincronizar = cantidad_sin_sincronizar()
+        if sin_sincronizar:
+            st.sidebar.warning(f"⚠️ {sin_sincronizar} evaluaciones guardadas solo en este equipo")
+            if st.sidebar.button("Sincronizar con MongoDB"):
+                sincronizadas = sincronizar()
+                if sincronizadas:
+                    st.sidebar.success(f"✅ {sincronizadas} evaluaciones sincronizadas")
+                else:
+                    st.sidebar.error("No se pudo conectar con MongoDB, se reintenta más tarde")
 
     # Limpiar session_state si cambió el participante, área o año
-    current_selection = f"{nombre}_{area}_{year_int}"
+    current_selection = f"{nombre}_{area}_{year_int}_{autor}"
+    # MAJ: Después de combinar el guardado con los cambios de otro evaluador (o de descartar los propios),
+    # el formulario se vuelve a cargar desde el documento guardado, igual que al cambiar de participante
+    recargar_formulario = st.session_state.pop("recargar_formulario", None) == current_selection
     if "last_selection" not in st.session_state:
         st.session_state["last_selection"] = current_selection
-    elif st.session_state["last_selection"] != current_selection:
+    elif st.session_state["last_selection"] != current_selection or recargar_formulario:
         # Cambió el participante, área o año, limpiar session_state
         keys_to_delete = [k for k in st.session_state.keys() if k.startswith("cal_") or k.startswith("obs_") or k == "conclusion_guardada"]
         for k in keys_to_delete:
@@ -217,45 +148,66 @@ def main():
         st.session_state["last_selection"] = current_selection
 
     if nombre:
-        datos_participante = participantes_area[participantes_area["NOMBRE"] == nombre].iloc[0]
-        contacto, celular, union, fecha_evaluacion = datos_participante["EMAIL"], datos_participante["CONTACTO"], datos_participante["UNION/FEDERACION"], datos_participante["FECHA"]
+        with medir("csv"):
+            participante = datos_participante(year_int, area, nombre)
+        contacto, celular, union, fecha_evaluacion = participante["EMAIL"], participante["CONTACTO"], participante["UNION/FEDERACION"], participante["FECHA"]
         st.sidebar.write(f"**Fecha de Evaluación:** {fecha_evaluacion}")
-        evaluacion_guardada = cargar_evaluacion(nombre, area, year_int)
+        with medir("cargar_evaluacion"):
+            documento_guardado = cargar_evaluacion(nombre, area, year_int)
+        # MAJ: Documento con el que se empezó a editar: al guardar solo se escriben las preguntas que cambiaron
+        # respecto de él, y se detecta si otro evaluador guardó las mismas preguntas entretanto
+        if st.session_state.get("base_guardado", (None, None))[0] != current_selection:
+            st.session_state["base_guardado"] = (current_selection, documento_guardado or {})
+        # MAJ: En el formulario se muestra lo guardado con el borrador autoguardado de este evaluador encima
+        evaluacion_guardada = con_borrador(documento_guardado, autor) if autor else documento_guardado
+        # MAJ: La evaluación guardada como modelo indexado por número de pregunta (la usan las dos pestañas)
+        modelo_guardado = Evaluacion.del_catalogo(year_int, area, evaluacion_guardada)
 
         # DEBUG: Mostrar si se encontró evaluación guardada
         if evaluacion_guardada:
-            st.sidebar.success(f"✅ Evaluación encontrada en MongoDB")
-            st.sidebar.write(f"📊 {len(evaluacion_guardada.get('evaluaciones', []))} preguntas guardadas")
+            st.sidebar.success("✅ Evaluación encontrada" if MODO_ALMACEN == "sqlite" else "✅ Evaluación encontrada en MongoDB")
+            st.sidebar.write(f"📊 {sum(p.calificacion is not None for p in modelo_guardado)} preguntas guardadas")
+            if evaluacion_guardada.get("borrador_pendiente"):
+                st.sidebar.info("📝 Borrador autoguardado (todavía no se generó el PDF)")
 
             # Inicializar session_state con los datos guardados
             # IMPORTANTE: Siempre actualizar session_state con los datos de MongoDB
             # para asegurar que los widgets tengan los valores correctos
-            for ev in evaluacion_guardada.get('evaluaciones', []):
-                desc = ev.get('descripcion', '')
-                key_cal = f"cal_{desc}"
-                key_obs = f"obs_{desc}"
+            for pregunta in modelo_guardado:
+                if pregunta.calificacion is None:
+                    continue
+                key_cal = f"cal_{pregunta.qid}"
+                key_obs = f"obs_{pregunta.qid}"
                 # Solo actualizar si no existe en session_state (no fue editado por el usuario)
                 if key_cal not in st.session_state:
-                    st.session_state[key_cal] = str(ev.get('calificacion', ''))
+                    st.session_state[key_cal] = str(pregunta.calificacion)
                 if key_obs not in st.session_state:
-                    st.session_state[key_obs] = ev.get('observaciones', '')
+                    st.session_state[key_obs] = pregunta.observaciones
             # Guardar conclusión
             if 'conclusion_guardada' not in st.session_state:
                 st.session_state['conclusion_guardada'] = evaluacion_guardada.get('conclusion', '')
+
+            # MAJ: Apenas se elige el participante se empiezan a traducir (en paralelo y en segundo plano)
+            # las observaciones y la conclusión guardadas, para que la pestaña English ya las tenga listas
+            textos_es = [pregunta.observaciones for pregunta in modelo_guardado]
+            textos_es.append(evaluacion_guardada.get('conclusion', "") or "")
+            clave_prefetch = (current_selection, tuple(textos_es))
+            if st.session_state.get("prefetch_traducciones", (None, None))[0] != clave_prefetch:
+                with medir("traduccion"):
+                    st.session_state["prefetch_traducciones"] = (clave_prefetch, iniciar_prefetch(textos_es, origen='es', destino='en'))
         else:
             st.sidebar.info("ℹ️ No hay evaluación previa guardada")
     else:
         contacto, celular, union, fecha_evaluacion = "", "", "", ""
         evaluacion_guardada = None
+        modelo_guardado = Evaluacion.del_catalogo(year_int, area)
 
     # Crear tabs después de cargar los datos
-    tab1, tab2 = st.tabs(["Español", "English"])
+    tab1, tab2, tab3, tab4 = st.tabs(["Español", "English", "Resumen", "Historial"])
 
     with tab1:
         st.header("Evaluación en Español")
-        descripciones = DESCRIPCIONES_AREAS[area]
-        evaluaciones = []
-        suma_calificaciones = 0
+        evaluacion_es = Evaluacion.del_catalogo(year_int, area)
 
 
         #MAJ CSS personalizado para aumentar el tamaño de las descripciones EN LA APP
@@ -271,27 +223,39 @@ def main():
             """,
             unsafe_allow_html=True
         )
-        for i, descripcion in enumerate(descripciones):
-            # Mostrar descripción con estilo personalizado
-            st.markdown(f'<p class="descripcion-grande">{descripcion}</p>', unsafe_allow_html=True)
-
-            # Los valores ahora vienen directamente de session_state (si existen) o quedan vacíos
-            # Streamlit maneja automáticamente el valor con el key
-            calificacion = st.text_input(f"Puntaje 0 al 5", key=f"cal_{descripcion}")
-            observaciones = st.text_area(f"Observaciones", key=f"obs_{descripcion}")
-
-            # Solo aceptar valores de "0", "1", "2", "3", "4", "5"
-            if calificacion in ['0', '1', '2', '3', '4', '5']:
-                evaluaciones.append({"descripcion": descripcion, "calificacion": int(calificacion), "observaciones": observaciones})
-                suma_calificaciones += int(calificacion)
-            elif calificacion != "":  # Mostrar advertencia si el valor no es permitido
-                st.warning("Solo se permiten los valores 0, 1, 2, 3, 4, 5 para las calificaciones.")
-
-            # Separar cada bloque con una línea
-            st.markdown("---")
-
-        # La conclusión también usa session_state
-        conclusion = st.text_area("Conclusión de la Evaluación", key="conclusion_guardada")
+        # MAJ: Las preguntas están dentro de un formulario: editar un campo ya no vuelve a ejecutar
+        # toda la app, los cambios se aplican juntos al presionar uno de los botones del formulario
+        with st.form("form_evaluacion_es"):
+            for pregunta in evaluacion_es:
+                descripcion = pregunta.descripcion_es
+                # Mostrar descripción con estilo personalizado
+                st.markdown(f'<p class="descripcion-grande">{descripcion}</p>', unsafe_allow_html=True)
+
+                # Los valores ahora vienen directamente de session_state (si existen) o quedan vacíos
+                # Streamlit maneja automáticamente el valor con el key
+                # MAJ: Las claves usan el Id_Pregunta (no el texto de la pregunta)
+                calificacion = st.text_input(f"Puntaje 0 al 5", key=f"cal_{pregunta.qid}")
+                observaciones = st.text_area(f"Observaciones", key=f"obs_{pregunta.qid}")
+
+                # Solo aceptar valores de "0", "1", "2", "3", "4", "5"
+                if calificacion in CALIFICACIONES_VALIDAS:
+                    pregunta.calificacion = int(calificacion)
+                    pregunta.observaciones = observaciones
+                elif calificacion != "":  # Mostrar advertencia si el valor no es permitido
+                    st.warning("Solo se permiten los valores 0, 1, 2, 3, 4, 5 para las calificaciones.")
+
+                # Separar cada bloque con una línea
+                st.markdown("---")
+
+            # La conclusión también usa session_state
+            conclusion = st.text_area("Conclusión de la Evaluación", key="conclusion_guardada")
+
+            col_actualizar, col_generar = st.columns(2)
+            col_actualizar.form_submit_button("Actualizar puntaje")
+            generar_es = col_generar.form_submit_button("Generar Evaluación (PDF) y Guardar")
+
+        evaluaciones = evaluacion_es.a_lista('es')
+        suma_calificaciones = evaluacion_es.total()
 
         # Mostrar suma de calificaciones con colores condicionales en el sidebar
         if suma_calificaciones <= 29:
@@ -303,7 +267,32 @@ def main():
 
         st.sidebar.markdown(f"<h1 style='color:{color}; font-size: 30px;'>{suma_calificaciones} puntos</h1>", unsafe_allow_html=True)
 
-        if st.button("Generar Evaluación (PDF) y Guardar"):
+        # MAJ: Conflicto con otro evaluador en el último guardado: se puede guardar igual o descartar los cambios
+        forzar_guardado = False
+        aviso_conflicto = st.empty()
+        conflicto = st.session_state.get("conflicto_guardado")
+        if nombre and conflicto is not None and conflicto[0] == current_selection:
+            with aviso_conflicto.container():
+                if conflicto[1]:
+                    st.error("⚠️ Otro evaluador guardó cambios en las mismas preguntas mientras editabas. Tus cambios no se guardaron.")
+                    for qid, guardado in conflicto[1].items():
+                        if qid == "conclusion":
+                            st.write(f"**Conclusión** — guardada: {guardado}")
+                        else:
+                            pregunta = evaluacion_es[qid]
+                            st.write(f"**{pregunta.numero}. {pregunta.descripcion_es}** — guardado: "
+                                     f"{guardado[0] if guardado else '-'}, tuyo: {pregunta.calificacion or 0}")
+                else:
+                    st.error("⚠️ Otro evaluador estaba guardando esta evaluación al mismo tiempo. Tus cambios no se guardaron.")
+                col_forzar, col_descartar = st.columns(2)
+                forzar_guardado = col_forzar.button("Guardar mis cambios igual")
+                if col_descartar.button("Descartar mis cambios y recargar"):
+                    st.session_state["recargar_formulario"] = current_selection
+                    st.session_state.pop("base_guardado", None)
+                    st.session_state.pop("conflicto_guardado", None)
+                    st.rerun()
+
+        if generar_es or forzar_guardado:
             datos = {
                 "fecha": fecha_evaluacion,
                 "area": area,
@@ -312,22 +301,58 @@ def main():
                 "email": contacto,
                 "celular": celular,
             }
-            output_path = "evaluacion_final.pdf"
-            generar_pdf_con_reportlab(datos, evaluaciones, conclusion, evaluador, output_path, language='es', header_pdf_path=header_pdf_path)
-            guardar_evaluacion(datos, evaluaciones, conclusion, evaluador, DESCRIPCIONES_AREAS, year_int)
-
-            with open(output_path, "rb") as pdf_file:
-                st.download_button(label="Descargar Evaluación (PDF)",
-                                   data=pdf_file, file_name=f"{datos['area']}-{datos['nombre']}-{datos['uni']}.pdf",
-                                   mime="application/pdf")
+            with medir("guardar_evaluacion"):
+                # El guardado completo reemplaza cualquier borrador pendiente
+                descartar_borrador(nombre, area, year_int, autor or evaluador)
+                resultado = guardar_evaluacion(datos, evaluacion_es, conclusion, evaluador, DESCRIPCIONES_AREAS, year_int,
+                                               base=st.session_state["base_guardado"][1], forzar=forzar_guardado, autor=autor)
+
+            if resultado.guardado:
+                aviso_conflicto.empty()
+                st.session_state.pop("conflicto_guardado", None)
+                # En el próximo rerun la base vuelve a ser lo guardado
+                st.session_state.pop("base_guardado", None)
+                if resultado.fusionado:
+                    # Se combinó con cambios de otro evaluador en otras preguntas: el PDF sale del documento
+                    # combinado y el formulario se recarga con él
+                    combinado = cargar_evaluacion(nombre, area, year_int) or {}
+                    evaluaciones = Evaluacion.del_catalogo(year_int, area, combinado).a_lista('es')
+                    conclusion = combinado.get("conclusion", conclusion)
+                # MAJ: El PDF se genera en la cola de trabajos (cola_trabajos.py) y la descarga aparece cuando está listo
+                with medir("encolar_pdf"):
+                    st.session_state["trabajo_pdf_es"] = (
+                        current_selection, encolar_pdf(datos, evaluaciones, conclusion, evaluador, 'es', header_pdf_path),
+                        f"{datos['area']}-{datos['nombre']}-{datos['uni']}.pdf")
+                if resultado.fusionado:
+                    st.session_state["recargar_formulario"] = current_selection
+                    st.session_state["aviso_fusion"] = current_selection
+                    st.rerun()
+            else:
+                st.session_state["conflicto_guardado"] = (current_selection, resultado.conflictos)
+                st.rerun()
+
+        if st.session_state.pop("aviso_fusion", None) == current_selection:
+            st.info("ℹ️ Otro evaluador había guardado cambios en otras preguntas; se combinaron con los tuyos")
+        mostrar_trabajo_pdf("trabajo_pdf_es", current_selection, "Descargar Evaluación (PDF)")
+
+        # MAJ: Autoguardado del borrador: al aplicar el formulario se registran solo las preguntas que
+        # cambiaron desde la última vez y se escriben en segundo plano (autoguardado.py), sin generar el PDF
+        if nombre and AUTOGUARDADO_ACTIVADO and autor:
+            instantanea = instantanea_formulario(st.session_state, list(evaluacion_es.preguntas))
+            base = st.session_state.get("borrador_base")
+            if base is not None and base[0] == current_selection and not generar_es and not forzar_guardado:
+                preguntas_cambiadas, conclusion_cambiada = detectar_cambios(base[1], instantanea)
+                if preguntas_cambiadas or conclusion_cambiada is not None:
+                    with medir("autoguardado"):
+                        registrar_borrador(nombre, area, year_int, autor, preguntas_cambiadas, conclusion_cambiada)
+                    st.sidebar.caption("💾 Borrador guardado automáticamente")
+            # Recién elegido el participante (o recién guardado), lo que hay en pantalla ya está en la base
+            st.session_state["borrador_base"] = (current_selection, instantanea)
 
     with tab2:
         st.header("Evaluation in English")
-        descripciones_en = DESCRIPCIONES_AREAS_EN.get(area, DESCRIPCIONES_AREAS[area])  # Fallback a español si no existe traducción
-        descripciones_es = DESCRIPCIONES_AREAS[area]  # Necesitamos las descripciones en español para mapear
-
-        evaluaciones_en = []
-        suma_calificaciones_en = 0
+        # MAJ: Las descripciones en inglés vienen del catálogo del año (columna Pregunta_EN de preguntas_areas.csv)
+        evaluacion_en = Evaluacion.del_catalogo(year_int, area)
 
         # CSS personalizado
         st.markdown(
@@ -343,49 +368,45 @@ def main():
             unsafe_allow_html=True
         )
 
-        for i, (descripcion_en, descripcion_es) in enumerate(zip(descripciones_en, descripciones_es)):
-            # Cargar y traducir datos guardados si existen - BUSCAR POR DESCRIPCIÓN EXACTA
-            calificacion_guardada = ""
-            observaciones_traducidas = ""
-            if evaluacion_guardada and 'evaluaciones' in evaluacion_guardada:
-                # Buscar la evaluación que coincida con esta descripción en español
-                for ev_guardada in evaluacion_guardada['evaluaciones']:
-                    if ev_guardada.get('descripcion', '') == descripcion_es:
-                        calificacion_guardada = ev_guardada.get('calificacion', "")
-                        observaciones_originales = ev_guardada.get('observaciones', "")
-                        if observaciones_originales:
-                            try:
-                                observaciones_traducidas = GoogleTranslator(source='es', target='en').translate(observaciones_originales)
-                            except:
-                                observaciones_traducidas = observaciones_originales
-                        break
-
-            st.markdown(f'<p class="descripcion-grande">{descripcion_en}</p>', unsafe_allow_html=True)
-            calificacion_en = st.text_input(f"Score 0 to 5", value=str(calificacion_guardada), key=f"cal_en_{i}")
-            observaciones_en = st.text_area(f"Observations", value=observaciones_traducidas, key=f"obs_en_{i}")
-
-            # Validar y guardar evaluaciones
-            if calificacion_en in ['0', '1', '2', '3', '4', '5']:
-                evaluaciones_en.append({
-                    "descripcion": descripcion_en,
-                    "descripcion_es": descripcion_es,  # Guardamos la versión en español también
-                    "calificacion": int(calificacion_en),
-                    "observaciones": observaciones_en
-                })
-                suma_calificaciones_en += int(calificacion_en)
-            elif calificacion_en != "":
-                st.warning("Only values 0, 1, 2, 3, 4, 5 are allowed for ratings.")
-
-            st.markdown("---")
-
-        conclusion_traducida = ""
-        if evaluacion_guardada and 'conclusion' in evaluacion_guardada and evaluacion_guardada['conclusion']:
-            try:
-                conclusion_traducida = GoogleTranslator(source='es', target='en').translate(evaluacion_guardada['conclusion'])
-            except:
-                conclusion_traducida = evaluacion_guardada['conclusion']
+        # Traducciones del prefetch: los textos que no llegaron a tiempo quedan en español
+        traducciones = {}
+        if evaluacion_guardada:
+            with medir("traduccion"):
+                traducciones = st.session_state["prefetch_traducciones"][1].resultado()
+
+        # MAJ: Igual que en español, las ediciones se aplican juntas al enviar el formulario
+        with st.form("form_evaluacion_en"):
+            for pregunta in evaluacion_en:
+                # Datos guardados de la misma pregunta (por Id_Pregunta), con las observaciones traducidas
+                guardada = modelo_guardado[pregunta.qid]
+                calificacion_guardada = "" if guardada.calificacion is None else guardada.calificacion
+                observaciones_traducidas = traducciones.get(guardada.observaciones, guardada.observaciones) if guardada.observaciones else ""
+
+                st.markdown(f'<p class="descripcion-grande">{pregunta.descripcion_en}</p>', unsafe_allow_html=True)
+                calificacion_en = st.text_input(f"Score 0 to 5", value=str(calificacion_guardada), key=f"cal_en_{pregunta.qid}")
+                observaciones_en = st.text_area(f"Observations", value=observaciones_traducidas, key=f"obs_en_{pregunta.qid}")
+
+                # Validar y guardar evaluaciones
+                if calificacion_en in CALIFICACIONES_VALIDAS:
+                    pregunta.calificacion = int(calificacion_en)
+                    pregunta.observaciones = observaciones_en
+                elif calificacion_en != "":
+                    st.warning("Only values 0, 1, 2, 3, 4, 5 are allowed for ratings.")
+
+                st.markdown("---")
+
+            conclusion_traducida = ""
+            if evaluacion_guardada and 'conclusion' in evaluacion_guardada and evaluacion_guardada['conclusion']:
+                conclusion_traducida = traducciones.get(evaluacion_guardada['conclusion'], evaluacion_guardada['conclusion'])
+
+            conclusion_en = st.text_area("Conclusion", value=conclusion_traducida, key="conclusion_en")
 
-        conclusion_en = st.text_area("Conclusion", value=conclusion_traducida, key="conclusion_en")
+            col_actualizar_en, col_generar_en = st.columns(2)
+            col_actualizar_en.form_submit_button("Update score")
+            generar_en = col_generar_en.form_submit_button("Generate English Evaluation (PDF)")
+
+        evaluaciones_en = evaluacion_en.a_lista('en')
+        suma_calificaciones_en = evaluacion_en.total()
 
         # Mostrar suma de calificaciones en el sidebar
         if suma_calificaciones_en <= 29:
@@ -397,7 +418,7 @@ def main():
 
         st.sidebar.markdown(f"<h1 style='color:{color}; font-size: 30px;'>{suma_calificaciones_en} points</h1>", unsafe_allow_html=True)
 
-        if st.button("Generate English Evaluation (PDF)"):
+        if generar_en:
             datos = {
                 "fecha": fecha_evaluacion,
                 "area": area,
@@ -406,14 +427,105 @@ def main():
                 "email": contacto,
                 "celular": celular,
             }
-            output_path = "evaluacion_final_en.pdf"
-
-            generar_pdf_con_reportlab(datos, evaluaciones_en, conclusion_en, evaluador, output_path, language='en', header_pdf_path=header_pdf_path)
-
-            with open(output_path, "rb") as pdf_file:
-                st.download_button(label="Download English Evaluation (PDF)",
-                                   data=pdf_file, file_name=f"{datos['area']}-{datos['nombre']}-{datos['uni']}_EN.pdf",
-                                   mime="application/pdf")
+            with medir("encolar_pdf"):
+                st.session_state["trabajo_pdf_en"] = (
+                    current_selection, encolar_pdf(datos, evaluaciones_en, conclusion_en, evaluador, 'en', header_pdf_path),
+                    f"{datos['area']}-{datos['nombre']}-{datos['uni']}_EN.pdf")
+        mostrar_trabajo_pdf("trabajo_pdf_en", current_selection, "Download English Evaluation (PDF)")
+
+    with tab3:
+        mostrar_resumen(year_int, area)
+
+    with tab4:
+        mostrar_historial(nombre)
+
+    fin_rerun(inicio)
+    mostrar_panel()
+
+# MAJ: Descarga de un PDF encolado en cola_trabajos: mientras se genera, solo un fragmento consulta el
+# estado cada INTERVALO_SONDEO_SEGUNDOS; cuando termina se vuelve a ejecutar la app para mostrar el botón
+def mostrar_trabajo_pdf(clave, current_selection, etiqueta):
+    trabajo = st.session_state.get(clave)
+    if trabajo is None or trabajo[0] != current_selection:
+        return
+    estado = estado_trabajo(trabajo[1])
+    if estado is None:
+        # Ya se borró de la cola (terminó hace más de RETENCION_SEGUNDOS)
+        del st.session_state[clave]
+    elif estado["estado"] == LISTO:
+        st.download_button(label=etiqueta, data=estado["resultado"], file_name=trabajo[2], mime="application/pdf")
+    elif estado["estado"] == ERROR:
+        st.error(f"⚠️ No se pudo generar el PDF: {estado['error']}")
+    else:
+        esperar_trabajo(trabajo[1])
+
+@st.fragment(run_every=INTERVALO_SONDEO_SEGUNDOS)
+def esperar_trabajo(id_trabajo):
+    estado = estado_trabajo(id_trabajo)
+    if estado is None or estado["estado"] in (LISTO, ERROR):
+        st.rerun()
+    elif estado["posicion"]:
+        st.caption(f"⏳ PDF en cola ({estado['posicion']} antes)")
+    else:
+        st.caption("⏳ Generando PDF...")
+
+# MAJ: Estadísticas del año/área calculadas sobre todas las evaluaciones guardadas (cacheadas hasta el próximo guardado)
+# Es un fragmento: cambiar el alcance solo vuelve a ejecutar esta sección
+@st.fragment
+@medir_rerun("resumen")
+def mostrar_resumen(year_int, area):
+    st.header(f"Resumen {year_int}")
+    alcance = st.radio("Alcance", [f"Área: {area}", "Todas las áreas"], horizontal=True)
+    resumen = obtener_resumen(year_int, area if alcance.startswith("Área") else None)
+
+    if resumen is None:
+        st.info("ℹ️ Todavía no hay evaluaciones guardadas para este año/área")
+    else:
+        st.subheader("Por área")
+        st.dataframe(resumen["por_area"].round(1), width="stretch")
+
+        st.subheader("Por pregunta")
+        st.bar_chart(resumen["por_pregunta"]["promedio"])
+        st.dataframe(resumen["por_pregunta"].round(2), width="stretch")
+
+        # MAJ: Quiénes respondieron una pregunta con calificación baja (consulta por respuestas.<qid>, con índice)
+        if alcance.startswith("Área"):
+            pregunta = st.selectbox("Pregunta", resumen["por_pregunta"].index)
+            calificacion_maxima = st.select_slider("Calificación máxima", options=CALIFICACIONES, value=2)
+            respuestas = buscar_por_pregunta(year_int, area, resumen["por_pregunta"].loc[pregunta, "qid"], calificacion_maxima)
+            if respuestas:
+                st.dataframe([{"nombre": nombre, "calificacion": calificacion, "observaciones": observaciones}
+                              for nombre, (calificacion, observaciones) in sorted(respuestas.items())],
+                             width="stretch", hide_index=True)
+            else:
+                st.caption(f"Nadie tiene {calificacion_maxima} o menos en esta pregunta")
+
+        st.subheader("Ranking")
+        st.dataframe(resumen["ranking"], width="stretch", hide_index=True)
+
+# MAJ: Evolución del participante en todas las academias (preguntas alineadas por número entre años)
+@st.fragment
+@medir_rerun("historial")
+def mostrar_historial(nombre):
+    st.header("Historial del participante")
+    if not nombre:
+        st.info("ℹ️ Elegí un participante")
+        return
+    historial = obtener_historial(nombre)
+    if historial is None:
+        st.info("ℹ️ Todavía no hay evaluaciones guardadas de este participante")
+        return
+    for area_historial, tabla in historial.items():
+        st.subheader(area_historial)
+        st.write("**Total por año**")
+        st.bar_chart(tabla.sum())
+        if len(tabla.columns) > 1:
+            st.line_chart(tabla.T)
+        st.dataframe(tabla, width="stretch")
 
 if __name__ == "__main__":
-    main()
+    try:
+        main()
+    finally:
+        # MAJ: Si st.rerun()/st.stop() cortaron main, el rerun quedó abierto en instrumentacion
+        descartar_rerun()
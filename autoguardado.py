@@ -0,0 +1,207 @@
+# autoguardado.py
+import atexit
+import os
+import threading
+import time
+from datetime import datetime
+
+from pymongo import UpdateOne
+from pymongo.errors import PyMongoError
+
+from modelo_evaluacion import CALIFICACIONES_VALIDAS, VERSION_ESQUEMA, clave_borrador
+from repositorio_evaluaciones import (MODO_ALMACEN, invalidar_precarga, obtener_almacen, obtener_coleccion,
+                                      sincronizar_en_segundo_plano)
+
+# MAJ: Autoguardado de borradores (write-behind). Cada vez que se aplican cambios en el formulario
+# se registran solo las preguntas que cambiaron; un hilo en segundo plano espera a que pasen
+# ESPERA_SEGUNDOS sin cambios (o como mucho MAX_ESPERA_SEGUNDOS) y escribe todo lo pendiente,
+# de todos los evaluadores, en un único bulk_write. Por pregunta solo se actualiza su clave en
+# 'respuestas' (no se reescribe el documento entero) y guardar ya no depende de generar el PDF.
+# SAR_AUTOGUARDADO=0 para desactivarlo.
+# Con el almacén local (SAR_ALMACEN=sqlite/mixto) los borradores se aplican en el archivo SQLite.
+
+AUTOGUARDADO_ACTIVADO = os.environ.get("SAR_AUTOGUARDADO", "1") != "0"
+ESPERA_SEGUNDOS = 3
+MAX_ESPERA_SEGUNDOS = 15
+
+_pendientes = {}  # (year, area, nombre, clave del borrador) -> {"collection", "evaluador", "preguntas": {qid: (calificacion, observaciones)}, "conclusion"}
+_lock = threading.Lock()
+_temporizador = None
+_primer_pendiente = None  # instante del cambio más viejo sin escribir
+
+
+def instantanea_formulario(session_state, qids):
+    """
+    Valores actuales del formulario en español, tal como están en session_state.
+
+    Returns:
+        tuple: ({qid: (calificacion, observaciones)}, conclusion)
+    """
+    preguntas = {q: (session_state.get(f"cal_{q}", ""), session_state.get(f"obs_{q}", "")) for q in qids}
+    return preguntas, session_state.get("conclusion_guardada", "")
+
+
+def detectar_cambios(anterior, actual):
+    """
+    Compara dos instantáneas del formulario.
+
+    Returns:
+        tuple: ({qid: (calificacion, observaciones)} de las preguntas que cambiaron,
+                conclusion o None si no cambió)
+    """
+    preguntas_anteriores, conclusion_anterior = anterior
+    preguntas, conclusion = actual
+    cambios = {}
+    for qid, (calificacion, observaciones) in preguntas.items():
+        if preguntas_anteriores.get(qid) == (calificacion, observaciones):
+            continue
+        # Un puntaje inválido no se guarda hasta que se corrija; vacío cuenta como 0 (igual que al guardar)
+        if calificacion not in CALIFICACIONES_VALIDAS and calificacion != "":
+            continue
+        cambios[qid] = (int(calificacion or 0), observaciones)
+    return cambios, (conclusion if conclusion != conclusion_anterior else None)
+
+
+def registrar_borrador(nombre, area, year, evaluador, preguntas, conclusion=None, collection=None):
+    """
+    Agrega cambios al borrador pendiente de un participante y reprograma la escritura.
+
+    Args:
+        preguntas: {qid: (calificacion, observaciones)} de las preguntas que cambiaron
+        conclusion: Nueva conclusión (None si no cambió)
+    """
+    if not preguntas and conclusion is None:
+        return
+    if collection is None and MODO_ALMACEN == "mongo":
+        collection = obtener_coleccion()
+    global _primer_pendiente
+    with _lock:
+        entrada = _pendientes.setdefault((year, area, nombre, clave_borrador(evaluador)),
+                                         {"collection": collection, "evaluador": evaluador, "preguntas": {}, "conclusion": None})
+        entrada["preguntas"].update(preguntas)
+        if conclusion is not None:
+            entrada["conclusion"] = conclusion
+        if _primer_pendiente is None:
+            _primer_pendiente = time.monotonic()
+        espera = min(ESPERA_SEGUNDOS, max(0, MAX_ESPERA_SEGUNDOS - (time.monotonic() - _primer_pendiente)))
+        _programar(espera)
+
+
+def _programar(espera):
+    # Debe llamarse con _lock tomado
+    global _temporizador
+    if _temporizador is not None:
+        _temporizador.cancel()
+    _temporizador = threading.Timer(espera, vaciar)
+    _temporizador.daemon = True
+    _temporizador.start()
+
+
+def descartar_borrador(nombre, area, year, evaluador):
+    """Olvida los cambios pendientes del evaluador en un participante (se llama antes del guardado completo)."""
+    with _lock:
+        _pendientes.pop((year, area, nombre, clave_borrador(evaluador)), None)
+
+
+def operaciones_borrador(year, area, nombre, entrada):
+    """
+    Arma la operación de bulk_write para un borrador: un upsert que, si el documento no existe,
+    lo crea con lo mínimo ($setOnInsert, marcado como borrador) y actualiza solo las respuestas
+    que cambiaron en el borrador del evaluador ($set de borradores.<evaluador>.respuestas.<qid>).
+    Las respuestas guardadas ('respuestas', 'conclusion', 'version') no se tocan: el borrador se
+    pasa a ellas recién en el guardado completo, que controla la versión.
+    """
+    clave = {"year": year, "area": area, "nombre": nombre}
+    ahora = datetime.now()
+    prefijo = f"borradores.{clave_borrador(entrada['evaluador'])}"
+    al_crear = {"evaluador": entrada["evaluador"], "fecha": ahora, "borrador": True, "esquema": VERSION_ESQUEMA}
+    cambios = {f"{prefijo}.respuestas.{qid}": [calificacion, observaciones]
+               for qid, (calificacion, observaciones) in entrada["preguntas"].items()}
+    cambios[f"{prefijo}.fecha"] = ahora
+    if entrada["conclusion"] is not None:
+        cambios[f"{prefijo}.conclusion"] = entrada["conclusion"]
+    return [UpdateOne(clave, {"$setOnInsert": al_crear, "$set": cambios}, upsert=True)]
+
+
+def con_borrador(documento, evaluador):
+    """
+    El documento guardado con el borrador del evaluador aplicado encima (lo que se muestra en el formulario).
+
+    Returns:
+        dict | None: Copia del documento con 'borrador_pendiente' = True, o el documento tal cual si no hay borrador
+    """
+    borrador = ((documento or {}).get("borradores") or {}).get(clave_borrador(evaluador))
+    if not borrador:
+        return documento
+    combinado = dict(documento, respuestas=dict(documento.get("respuestas") or {}, **borrador.get("respuestas", {})),
+                     borrador_pendiente=True)
+    if "conclusion" in borrador:
+        combinado["conclusion"] = borrador["conclusion"]
+    return combinado
+
+
+def vaciar():
+    """
+    Escribe ya todos los borradores pendientes (un bulk_write por colección).
+
+    Returns:
+        int: Cantidad de participantes escritos
+    """
+    global _primer_pendiente, _temporizador
+    with _lock:
+        pendientes = dict(_pendientes)
+        _pendientes.clear()
+        _primer_pendiente = None
+        if _temporizador is not None:
+            _temporizador.cancel()
+            _temporizador = None
+    if not pendientes:
+        return 0
+
+    por_coleccion = {}
+    locales = 0
+    for (year, area, nombre, _), entrada in pendientes.items():
+        if entrada["collection"] is None:
+            # Almacén local: solo las respuestas que cambiaron, en el borrador del evaluador
+            respuestas = {qid: [calificacion, observaciones] for qid, (calificacion, observaciones) in entrada["preguntas"].items()}
+            obtener_almacen().aplicar_borrador(year, area, nombre, entrada["evaluador"], respuestas, entrada["conclusion"],
+                                               pendiente=MODO_ALMACEN == "mixto")
+            locales += 1
+            continue
+        collection, operaciones = por_coleccion.setdefault(id(entrada["collection"]), (entrada["collection"], []))
+        operaciones.extend(operaciones_borrador(year, area, nombre, entrada))
+
+    if locales:
+        sincronizar_en_segundo_plano()
+    escritos = locales
+    for collection, operaciones in por_coleccion.values():
+        try:
+            # ordered=False: cada participante es independiente, el servidor puede aplicarlas en paralelo
+            collection.bulk_write(operaciones, ordered=False)
+            escritos += sum(1 for entrada in pendientes.values() if entrada["collection"] is collection)
+        except PyMongoError as e:
+            print(f"⚠️ No se pudo autoguardar el borrador, se reintenta en {MAX_ESPERA_SEGUNDOS} s: {e}")
+            _reencolar({clave: entrada for clave, entrada in pendientes.items() if entrada["collection"] is collection})
+    for year, area, nombre, _ in pendientes:
+        invalidar_precarga(year, area, nombre)
+    return escritos
+
+
+def _reencolar(fallidos):
+    # Vuelve a dejar pendientes los borradores que no se pudieron escribir, sin pisar cambios más nuevos
+    global _primer_pendiente
+    with _lock:
+        for clave, entrada in fallidos.items():
+            nueva = _pendientes.get(clave)
+            if nueva is not None:
+                entrada["preguntas"].update(nueva["preguntas"])
+                if nueva["conclusion"] is not None:
+                    entrada["conclusion"] = nueva["conclusion"]
+            _pendientes[clave] = entrada
+        if _primer_pendiente is None:
+            _primer_pendiente = time.monotonic()
+        _programar(MAX_ESPERA_SEGUNDOS)
+
+
+# Lo que quede pendiente al cerrar el proceso se escribe antes de salir
+atexit.register(vaciar)
@@ -0,0 +1,62 @@
+"""
+Benchmark del tiempo de importación en frío de los módulos de la app.
+
+Cada medición corre en un proceso de Python nuevo (sin caché de módulos),
+así se mide lo mismo que paga la app o un script al arrancar.
+
+Uso:
+    python benchmarks/bench_importacion.py [--repeticiones 7]
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+RUTA_REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CASOS = [
+    ("import config", "import config"),
+    ("import config + preguntas del año", "import config; config.DESCRIPCIONES_AREAS; config.EVALUADORES_AREAS"),
+    ("import datos_referencia", "import datos_referencia"),
+    ("import generacion_lote", "import generacion_lote"),
+    ("import generador_pdf (reportlab)", "import generador_pdf"),
+    ("import pandas", "import pandas"),
+    ("import babel.dates", "import babel.dates"),
+    ("import deep_translator", "import deep_translator"),
+]
+
+CODIGO_MEDICION = """
+import time, sys
+t0 = time.perf_counter()
+exec(sys.argv[1])
+print(time.perf_counter() - t0)
+"""
+
+
+def medir(codigo, repeticiones):
+    tiempos = []
+    for _ in range(repeticiones):
+        salida = subprocess.run([sys.executable, "-c", CODIGO_MEDICION, codigo], cwd=RUTA_REPO,
+                                capture_output=True, text=True)
+        if salida.returncode != 0:
+            return None
+        tiempos.append(float(salida.stdout.strip().splitlines()[-1]) * 1000)
+    return statistics.median(tiempos)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mide el tiempo de importación en frío de los módulos.")
+    parser.add_argument("--repeticiones", type=int, default=7)
+    args = parser.parse_args()
+
+    print(f"{'Caso':<40} {'Mediana (ms)':>12}")
+    print("-" * 53)
+    for nombre, codigo in CASOS:
+        mediana = medir(codigo, args.repeticiones)
+        texto = "no disponible" if mediana is None else f"{mediana:.1f}"
+        print(f"{nombre:<40} {texto:>12}")
+
+
+if __name__ == "__main__":
+    main()
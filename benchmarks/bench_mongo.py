@@ -0,0 +1,79 @@
+"""
+Benchmark de búsquedas de evaluaciones en MongoDB: sin índice y documento completo
+contra el índice único (year, area, nombre) y la proyección de repositorio_evaluaciones.
+
+Por defecto usa mongomock (en memoria, no usa índices, solo sirve para validar el flujo).
+Para medir de verdad, apuntar a un mongod local desechable:
+
+    python benchmarks/bench_mongo.py --mongo-uri mongodb://localhost:27017 --documentos 20000
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from repositorio_evaluaciones import NOMBRE_INDICE, PROYECCION_EVALUACION, asegurar_indices  # noqa: E402
+
+AREAS = ["Coaching", "Fisio", "Médico", "Nutrición", "Video & Análisis", "Team Manager"]
+
+
+def crear_coleccion(mongo_uri):
+    if mongo_uri:
+        from pymongo import MongoClient
+        return MongoClient(mongo_uri)["sar_benchmark"]["evaluaciones"]
+    import mongomock
+    return mongomock.MongoClient()["sar_benchmark"]["evaluaciones"]
+
+
+def poblar(collection, cantidad):
+    collection.drop()
+    docs = []
+    for i in range(cantidad):
+        docs.append({
+            "nombre": f"Participante {i}",
+            "area": AREAS[i % len(AREAS)],
+            "year": 2015 + i % 11,
+            "evaluador": "Evaluador",
+            "conclusion": "Conclusión " * 20,
+            "evaluaciones": [{"descripcion": f"Pregunta {n}", "calificacion": n % 6, "observaciones": "Observación " * 15}
+                             for n in range(10)],
+        })
+    collection.insert_many(docs)
+    return [(d["nombre"], d["area"], d["year"]) for d in docs]
+
+
+def medir(collection, claves, consultas, proyeccion):
+    tiempos = []
+    for nombre, area, year in random.sample(claves, min(consultas, len(claves))):
+        t0 = time.perf_counter()
+        collection.find_one({"year": year, "area": area, "nombre": nombre}, proyeccion)
+        tiempos.append((time.perf_counter() - t0) * 1000)
+    return statistics.median(tiempos), statistics.quantiles(tiempos, n=20)[-1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de búsquedas de evaluaciones.")
+    parser.add_argument("--mongo-uri", default=None, help="mongod local (por defecto mongomock)")
+    parser.add_argument("--documentos", type=int, default=5000)
+    parser.add_argument("--consultas", type=int, default=300)
+    args = parser.parse_args()
+
+    collection = crear_coleccion(args.mongo_uri)
+    print(f"Poblando {args.documentos} documentos en {'mongod' if args.mongo_uri else 'mongomock'}...")
+    claves = poblar(collection, args.documentos)
+
+    mediana, p95 = medir(collection, claves, args.consultas, None)
+    print(f"{'Sin índice, documento completo':<40} mediana {mediana:8.3f} ms   p95 {p95:8.3f} ms")
+
+    asegurar_indices(collection)
+    mediana, p95 = medir(collection, claves, args.consultas, PROYECCION_EVALUACION)
+    print(f"{'Índice ' + NOMBRE_INDICE + ' + proyección':<40} mediana {mediana:8.3f} ms   p95 {p95:8.3f} ms")
+    collection.drop()
+
+
+if __name__ == "__main__":
+    main()
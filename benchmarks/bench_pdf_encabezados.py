@@ -0,0 +1,66 @@
+"""
+Benchmark de generación de PDFs por encabezado: antes (hoja de estilos nueva y PNG original
+en cada PDF) contra después (recursos_pdf: estilos compartidos y encabezado preescalado).
+
+Uso:
+    python benchmarks/bench_pdf_encabezados.py [--repeticiones 10]
+"""
+import argparse
+import io
+import os
+import statistics
+import sys
+import time
+from unittest import mock
+
+RUTA_REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RUTA_REPO)
+os.chdir(RUTA_REPO)
+
+import generador_pdf  # noqa: E402
+import recursos_pdf  # noqa: E402
+from config import ENCABEZADOS_PDF  # noqa: E402
+
+DATOS = {"fecha": "Noviembre, 2024", "area": "Coaching", "nombre": "Participante de prueba",
+         "uni": "UAR", "email": "prueba@example.com", "celular": "+54 9 11 0000 0000"}
+EVALUACIONES = [{"descripcion": f"Pregunta {n} de la evaluación.", "calificacion": n % 6,
+                 "observaciones": "Observación de prueba con algo de texto. " * 4} for n in range(1, 11)]
+
+
+def _generar(header_pdf_path):
+    buffer = io.BytesIO()
+    generador_pdf.generar_pdf_con_reportlab(DATOS, EVALUACIONES, "Conclusión de prueba.", "Evaluador", buffer,
+                                            header_pdf_path=header_pdf_path)
+    return buffer.getvalue()
+
+
+def medir(header_pdf_path, repeticiones):
+    tiempos = []
+    for _ in range(repeticiones):
+        t0 = time.perf_counter()
+        pdf = _generar(header_pdf_path)
+        tiempos.append((time.perf_counter() - t0) * 1000)
+    return statistics.median(tiempos), len(pdf)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compara la generación de PDFs antes/después de recursos_pdf.")
+    parser.add_argument("--repeticiones", type=int, default=10)
+    args = parser.parse_args()
+
+    print(f"{'Encabezado':<12} {'antes (ms)':>11} {'después (ms)':>13} {'antes (KB)':>11} {'después (KB)':>13}")
+    print("-" * 64)
+    for nombre, ruta in ENCABEZADOS_PDF.items():
+        # Antes: estilos nuevos y el PNG original en cada PDF
+        with mock.patch.object(generador_pdf, "obtener_estilos", recursos_pdf.construir_estilos), \
+             mock.patch.object(generador_pdf, "obtener_encabezado", lambda r: r):
+            antes_ms, antes_bytes = medir(ruta, args.repeticiones)
+
+        recursos_pdf.precargar_encabezados([ruta])
+        despues_ms, despues_bytes = medir(ruta, args.repeticiones)
+
+        print(f"{nombre:<12} {antes_ms:>11.1f} {despues_ms:>13.1f} {antes_bytes / 1024:>11.0f} {despues_bytes / 1024:>13.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,206 @@
+"""
+Benchmark del circuito completo de evaluación con cohortes sintéticas (por defecto 10, 100 y 1000
+participantes), sin servicios externos: MongoDB se reemplaza por mongomock y los CSV de
+participantes se generan en un directorio temporal.
+
+Mide, por cohorte:
+- cargar_preguntas_desde_csv / cargar_evaluadores_desde_csv (primer parseo y con caché)
+- índice de participantes (nombres_participantes + datos_participante)
+- guardar_evaluacion y cargar_evaluacion (con y sin precarga) contra mongomock
+- guardar y obtener en el almacén local SQLite (almacen_local.py)
+- generar_pdf_con_reportlab en español e inglés
+
+Requiere las dependencias de desarrollo (pip install -r requirements-dev.txt).
+
+Para detectar regresiones antes de una semana de academia:
+    python benchmarks/bench_pipeline.py --guardar base.json            # en main
+    python benchmarks/bench_pipeline.py --comparar base.json           # en la rama; sale con 1 si empeora
+"""
+import argparse
+import csv
+import io
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+RUTA_REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RUTA_REPO)
+os.chdir(RUTA_REPO)
+
+import mongomock  # noqa: E402
+
+import datos_referencia  # noqa: E402
+import repositorio_evaluaciones  # noqa: E402
+from almacen_local import AlmacenSQLite  # noqa: E402
+from config import cargar_evaluadores_desde_csv, cargar_preguntas_desde_csv  # noqa: E402
+from generador_pdf import generar_pdf_con_reportlab  # noqa: E402
+from generacion_lote import encabezado_para_year  # noqa: E402
+from modelo_evaluacion import Evaluacion  # noqa: E402
+
+YEAR = 2024
+
+
+def _medir(funcion, cantidad):
+    """Ejecuta funcion(i) para i en range(cantidad) y devuelve el tiempo total en ms."""
+    t0 = time.perf_counter()
+    for i in range(cantidad):
+        funcion(i)
+    return (time.perf_counter() - t0) * 1000
+
+
+def _tocar(ruta):
+    # Cambia la fecha de modificación para forzar un nuevo parseo del CSV (solo sobre copias temporales:
+    # tocar los CSV del repo dejaría vieja la caché en Parquet de cache_columnar)
+    instante = time.time() + 1
+    os.utime(ruta, (instante, instante))
+
+
+def crear_cohorte(cantidad, directorio):
+    """Genera un CSV de participantes sintéticos repartidos entre las áreas del año."""
+    areas = list(cargar_preguntas_desde_csv(year=YEAR))
+    ruta = os.path.join(directorio, f"participantes_{cantidad}.csv")
+    participantes = []
+    with open(ruta, "w", newline="", encoding="utf-8") as f:
+        escritor = csv.writer(f)
+        escritor.writerow(["", "UNION/FEDERACION", "NOMBRE", "EMAIL", "CONTACTO", "AREA", "FECHA"])
+        for i in range(cantidad):
+            area = areas[i % len(areas)]
+            nombre = f"Participante {i:04d}"
+            escritor.writerow([i + 1, "UAR", nombre, f"p{i}@example.com", "+54 9 11 0000 0000", area, f"Noviembre, {YEAR}"])
+            participantes.append((nombre, area))
+    return ruta, participantes
+
+
+def bench_cohorte(cantidad, directorio, max_pdfs):
+    resultados = {}
+    ruta_csv, participantes = crear_cohorte(cantidad, directorio)
+    descripciones = cargar_preguntas_desde_csv(year=YEAR)
+    evaluador = cargar_evaluadores_desde_csv(year=YEAR)
+
+    # CSV de referencia: primer parseo (tras cambiar el mtime) y con caché, sobre copias en el directorio temporal
+    ruta_preguntas = shutil.copy(os.path.join(RUTA_REPO, "preguntas_areas.csv"), directorio)
+    ruta_evaluadores = shutil.copy(os.path.join(RUTA_REPO, "evaluadores_areas.csv"), directorio)
+
+    def cargar_referencia(i):
+        cargar_preguntas_desde_csv(year=YEAR, archivo_csv=ruta_preguntas)
+        cargar_evaluadores_desde_csv(year=YEAR, archivo_csv=ruta_evaluadores)
+    frio = 0
+    for _ in range(3):
+        _tocar(ruta_preguntas)
+        _tocar(ruta_evaluadores)
+        frio += _medir(cargar_referencia, 1)
+    resultados["csv_referencia_primer_parseo"] = (frio, 3)
+    resultados["csv_referencia_con_cache"] = (_medir(cargar_referencia, cantidad), cantidad)
+
+    # Índice de participantes de la cohorte
+    def consultar_participante(i):
+        nombre, area = participantes[i]
+        datos_referencia.nombres_participantes(YEAR, area, archivo_csv=ruta_csv)
+        datos_referencia.datos_participante(YEAR, area, nombre, archivo_csv=ruta_csv)
+    resultados["indice_participantes_primer_parseo"] = (_medir(consultar_participante, 1), 1)
+    resultados["indice_participantes_con_cache"] = (_medir(consultar_participante, cantidad), cantidad)
+
+    # MongoDB (mongomock)
+    collection = mongomock.MongoClient()["sar_benchmark"]["evaluaciones"]
+    repositorio_evaluaciones.asegurar_indices(collection)
+
+    def guardar(i):
+        nombre, area = participantes[i]
+        evaluaciones = [{"descripcion": d, "calificacion": n % 6, "observaciones": f"Observación {n}"}
+                        for n, d in enumerate(descripciones[area])]
+        repositorio_evaluaciones.guardar_evaluacion({"nombre": nombre, "area": area}, evaluaciones, "Conclusión",
+                                                    evaluador.get(area, ""), descripciones, YEAR, collection=collection)
+    resultados["guardar_evaluacion"] = (_medir(guardar, cantidad), cantidad)
+
+    def cargar(i):
+        nombre, area = participantes[i]
+        return repositorio_evaluaciones.cargar_evaluacion(nombre, area, YEAR, collection=collection)
+
+    precarga_original = repositorio_evaluaciones.PRECARGA_ACTIVADA
+    try:
+        repositorio_evaluaciones.PRECARGA_ACTIVADA = False
+        resultados["cargar_evaluacion_sin_precarga"] = (_medir(cargar, cantidad), cantidad)
+        repositorio_evaluaciones.PRECARGA_ACTIVADA = True
+        resultados["cargar_evaluacion_con_precarga"] = (_medir(cargar, cantidad), cantidad)
+    finally:
+        repositorio_evaluaciones.PRECARGA_ACTIVADA = precarga_original
+
+    # Almacén local SQLite (archivo en el directorio temporal): los mismos documentos
+    almacen = AlmacenSQLite(os.path.join(directorio, f"almacen_{cantidad}.sqlite"))
+    documentos = [cargar(i) | {"nombre": participantes[i][0], "area": participantes[i][1], "year": YEAR} for i in range(cantidad)]
+    resultados["guardar_almacen_local"] = (_medir(lambda i: almacen.guardar(documentos[i], pendiente=True), cantidad), cantidad)
+    resultados["cargar_almacen_local"] = (
+        _medir(lambda i: almacen.obtener(YEAR, participantes[i][1], participantes[i][0]), cantidad), cantidad)
+
+    # PDFs en español e inglés
+    header_pdf_path = encabezado_para_year(YEAR)
+    cantidad_pdfs = min(cantidad, max_pdfs) if max_pdfs else cantidad
+    for language in ("es", "en"):
+        def pdf(i):
+            nombre, area = participantes[i]
+            doc = cargar(i)
+            evaluaciones = Evaluacion.del_catalogo(YEAR, area, doc)
+            datos = {"fecha": f"Noviembre, {YEAR}", "area": area, "nombre": nombre, "uni": "UAR",
+                     "email": f"p{i}@example.com", "celular": "+54 9 11 0000 0000"}
+            generar_pdf_con_reportlab(datos, evaluaciones, doc["conclusion"], doc["evaluador"], io.BytesIO(),
+                                      language=language, header_pdf_path=header_pdf_path)
+        resultados[f"pdf_{language}"] = (_medir(pdf, cantidad_pdfs), cantidad_pdfs)
+
+    return {metrica: {"total_ms": total, "cantidad": n, "ms_por_item": total / n, "items_por_segundo": n / (total / 1000) if total else None}
+            for metrica, (total, n) in resultados.items()}
+
+
+def comparar(actual, base, tolerancia):
+    """Devuelve las métricas cuyo ms_por_item empeoró más que la tolerancia respecto de la base."""
+    regresiones = []
+    for cohorte, metricas in actual.items():
+        for metrica, valores in metricas.items():
+            anterior = base.get(cohorte, {}).get(metrica)
+            if anterior and anterior["ms_por_item"] > 0:
+                cambio = valores["ms_por_item"] / anterior["ms_por_item"] - 1
+                if cambio > tolerancia:
+                    regresiones.append((cohorte, metrica, anterior["ms_por_item"], valores["ms_por_item"], cambio))
+    return regresiones
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark del circuito de evaluación con cohortes sintéticas.")
+    parser.add_argument("--cohortes", default="10,100,1000", help="Tamaños de cohorte separados por coma")
+    parser.add_argument("--max-pdfs", type=int, default=0, help="Máximo de PDFs por idioma y cohorte (0 = todos)")
+    parser.add_argument("--guardar", default=None, help="Guardar los resultados en un JSON")
+    parser.add_argument("--comparar", default=None, help="JSON de una corrida anterior para detectar regresiones")
+    parser.add_argument("--tolerancia", type=float, default=0.25, help="Empeoramiento tolerado por ítem (0.25 = 25%%)")
+    args = parser.parse_args()
+
+    resultados = {}
+    with tempfile.TemporaryDirectory() as directorio:
+        for cantidad in (int(c) for c in args.cohortes.split(",") if c.strip()):
+            print(f"\nCohorte de {cantidad} participantes")
+            print(f"  {'Métrica':<38} {'total (ms)':>11} {'ms/ítem':>9} {'ítems/s':>10}")
+            resultados[str(cantidad)] = bench_cohorte(cantidad, directorio, args.max_pdfs)
+            for metrica, valores in resultados[str(cantidad)].items():
+                por_segundo = f"{valores['items_por_segundo']:.0f}" if valores["items_por_segundo"] else "-"
+                print(f"  {metrica:<38} {valores['total_ms']:>11.1f} {valores['ms_por_item']:>9.3f} {por_segundo:>10}")
+
+    if args.guardar:
+        with open(args.guardar, "w", encoding="utf-8") as f:
+            json.dump(resultados, f, indent=2, ensure_ascii=False)
+        print(f"\n✅ Resultados guardados en {args.guardar}")
+
+    if args.comparar:
+        with open(args.comparar, encoding="utf-8") as f:
+            base = json.load(f)
+        regresiones = comparar(resultados, base, args.tolerancia)
+        if regresiones:
+            print(f"\n❌ {len(regresiones)} regresiones (más de {args.tolerancia:.0%} por ítem):")
+            for cohorte, metrica, antes, despues, cambio in regresiones:
+                print(f"  - cohorte {cohorte}, {metrica}: {antes:.3f} -> {despues:.3f} ms/ítem (+{cambio:.0%})")
+            sys.exit(1)
+        print("\n✅ Sin regresiones respecto de la base")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+# cache_columnar.py
+import argparse
+import json
+import os
+import shutil
+
+from datos_referencia import PARTICIPANTES_CSV_PATH, RUTA_BASE, normalizar_participantes
+
+# MAJ: Copia en Parquet de los CSV de referencia (participantes, preguntas y evaluadores), particionada
+# por año (carpetas YEAR=2024/, Year=2025/...). La FECHA de texto libre de los participantes ya queda
+# convertida a la columna entera YEAR y AREA / UNION/FEDERACION como categóricas, así datos_referencia
+# lee columnas tipadas (con mmap) en lugar de parsear el CSV y buscar el año con una expresión regular.
+# Es un paso de construcción opcional: si pyarrow no está instalado, o si un CSV cambió después de
+# construir la caché, datos_referencia vuelve a leer el CSV.
+#
+#     python cache_columnar.py          # reconstruir después de editar los CSV
+
+RUTA_CACHE_COLUMNAR = os.environ.get("SAR_CACHE_COLUMNAR", os.path.join(RUTA_BASE, ".cache", "columnar"))
+MANIFIESTO = "manifiesto.json"
+
+# tipo -> (CSV de origen, columna de partición, columnas categóricas)
+FUENTES = {
+    "participantes": (PARTICIPANTES_CSV_PATH, "YEAR", ["AREA", "UNION/FEDERACION"]),
+    "preguntas": ("preguntas_areas.csv", "Year", ["Area"]),
+    "evaluadores": ("evaluadores_areas.csv", "Year", ["Area"]),
+}
+
+
+def _ruta_absoluta(archivo_csv):
+    return archivo_csv if os.path.isabs(archivo_csv) else os.path.join(RUTA_BASE, archivo_csv)
+
+
+def _leer_manifiesto(directorio):
+    try:
+        with open(os.path.join(directorio, MANIFIESTO), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def construir(tipos=None, directorio=RUTA_CACHE_COLUMNAR):
+    """
+    Escribe la copia en Parquet de los CSV de referencia.
+
+    Args:
+        tipos: Tipos a construir ('participantes', 'preguntas', 'evaluadores'); None = todos
+        directorio: Carpeta de la caché
+
+    Returns:
+        dict: {tipo: cantidad de filas escritas}
+    """
+    import pandas as pd
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    os.makedirs(directorio, exist_ok=True)
+    manifiesto = _leer_manifiesto(directorio)
+    filas = {}
+    for tipo in tipos or FUENTES:
+        archivo_csv, particion, categoricas = FUENTES[tipo]
+        ruta_csv = _ruta_absoluta(archivo_csv)
+        mtime = os.path.getmtime(ruta_csv)
+        df = pd.read_csv(ruta_csv)
+        if tipo == "participantes":
+            df = normalizar_participantes(df)
+        df = df.astype({columna: "category" for columna in categoricas})
+
+        # Se escribe en una carpeta temporal y se reemplaza de una vez (nunca queda una caché a medias)
+        destino = os.path.join(directorio, tipo)
+        temporal = destino + ".tmp"
+        shutil.rmtree(temporal, ignore_errors=True)
+        pq.write_to_dataset(pa.Table.from_pandas(df, preserve_index=False), temporal, partition_cols=[particion])
+        shutil.rmtree(destino, ignore_errors=True)
+        os.replace(temporal, destino)
+
+        manifiesto[tipo] = {"origen": ruta_csv, "mtime": mtime}
+        filas[tipo] = len(df)
+
+    with open(os.path.join(directorio, MANIFIESTO), "w", encoding="utf-8") as f:
+        json.dump(manifiesto, f, ensure_ascii=False, indent=2)
+    return filas
+
+
+def leer_si_vigente(tipo, ruta_csv, mtime, directorio=RUTA_CACHE_COLUMNAR):
+    """
+    Devuelve el DataFrame de la caché en Parquet si se construyó desde ese CSV con esa fecha de modificación.
+
+    Returns:
+        DataFrame o None (sin caché, caché vieja o sin pyarrow)
+    """
+    entrada = _leer_manifiesto(directorio).get(tipo)
+    if entrada is None or entrada["origen"] != ruta_csv or entrada["mtime"] != mtime:
+        return None
+    try:
+        import pandas as pd
+        df = pd.read_parquet(os.path.join(directorio, tipo), engine="pyarrow", memory_map=True)
+    except ImportError:
+        return None
+    # La columna de partición vuelve como categórica: se deja entera como en el CSV
+    particion = FUENTES[tipo][1]
+    return df.astype({particion: "int64"})
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Construye la caché en Parquet de los CSV de referencia (particionada por año).")
+    parser.add_argument("--tipo", action="append", choices=list(FUENTES), default=None,
+                        help="Construir solo este tipo (se puede repetir; por defecto todos)")
+    parser.add_argument("--directorio", default=RUTA_CACHE_COLUMNAR, help="Carpeta de la caché")
+    args = parser.parse_args()
+
+    for tipo, cantidad in construir(args.tipo, args.directorio).items():
+        print(f"✅ {tipo}: {cantidad} filas")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,268 @@
+# cola_trabajos.py
+import argparse
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+
+from almacen_local import a_json, de_json
+from instrumentacion import medir, medir_trabajo
+
+# MAJ: Cola de trabajos en segundo plano para generar PDFs, así el script de Streamlit no queda
+# esperando a ReportLab. Los trabajos se guardan en un archivo SQLite (sobreviven a un reinicio de la
+# app) y los ejecutan hilos trabajadores: los de la app (SAR_TRABAJADORES_COLA, 0 = ninguno, se inician
+# al arrancar la app) y/o procesos aparte lanzados con este mismo módulo sobre el mismo archivo.
+# La traducción no es un trabajo de la cola: traducciones.iniciar_prefetch ya la lanza en segundo plano
+# apenas se elige el participante (antes de apretar el botón) y el formulario en inglés la necesita en el
+# mismo rerun para mostrar los textos editables, así que encolarla solo agregaría la espera del sondeo.
+# Cada sesión guarda el id de su trabajo y consulta el estado cada INTERVALO_SONDEO_SEGUNDOS.
+# Un trabajo con los mismos parámetros que otro pendiente o ya terminado no se vuelve a ejecutar, y uno
+# en curso hace más de PLAZO_EN_CURSO_SEGUNDOS (el trabajador se cayó) lo vuelve a tomar otro trabajador.
+#
+#     python cola_trabajos.py --trabajadores 4      # procesa la cola hasta Ctrl+C
+
+RUTA_COLA = os.environ.get("SAR_COLA_TRABAJOS",
+                           os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "trabajos.sqlite"))
+TRABAJADORES_COLA = int(os.environ.get("SAR_TRABAJADORES_COLA", "2"))
+INTERVALO_SONDEO_SEGUNDOS = 0.5
+# Un trabajo 'en_curso' sin terminar después de este plazo se considera abandonado y se puede volver a tomar
+PLAZO_EN_CURSO_SEGUNDOS = 300
+# Los trabajos terminados se conservan este tiempo (para volver a descargar el PDF) y después se borran
+RETENCION_SEGUNDOS = 3600
+
+PENDIENTE, EN_CURSO, LISTO, ERROR = "pendiente", "en_curso", "listo", "error"
+
+
+def _ejecutar_pdf(parametros):
+    from generador_pdf import generar_pdf_bytes
+
+    with medir("pdf"):
+        return generar_pdf_bytes(parametros["datos"], parametros["evaluaciones"], parametros["conclusion"],
+                                 parametros["evaluador"], language=parametros["language"],
+                                 header_pdf_path=parametros["header_pdf_path"])
+
+
+# tipo -> función que recibe los parámetros y devuelve el resultado (bytes)
+TIPOS_TRABAJO = {
+    "pdf": _ejecutar_pdf,
+}
+
+
+class ColaTrabajos:
+    """Cola persistente de trabajos en SQLite (modo WAL), compartible entre hilos y procesos."""
+
+    def __init__(self, ruta=RUTA_COLA):
+        self.ruta = ruta
+        self._lock = threading.Lock()
+        # Avisa a los trabajadores de este proceso que hay un trabajo nuevo (sin esperar al próximo sondeo)
+        self.hay_trabajo = threading.Event()
+        if ruta != ":memory:":
+            os.makedirs(os.path.dirname(ruta) or ".", exist_ok=True)
+        self._conexion = sqlite3.connect(ruta, check_same_thread=False, timeout=30)
+        self._conexion.execute("PRAGMA journal_mode=WAL")
+        self._conexion.execute("PRAGMA synchronous=NORMAL")
+        self._conexion.execute(
+            "CREATE TABLE IF NOT EXISTS trabajos ("
+            " id TEXT PRIMARY KEY, tipo TEXT NOT NULL, clave TEXT NOT NULL, parametros TEXT NOT NULL,"
+            " estado TEXT NOT NULL, resultado BLOB, error TEXT, trabajador TEXT,"
+            " creado REAL NOT NULL, actualizado REAL NOT NULL)"
+        )
+        # Próximo trabajo a tomar (el más viejo pendiente) y trabajos repetidos por clave
+        self._conexion.execute("CREATE INDEX IF NOT EXISTS idx_trabajos_estado ON trabajos (estado, creado)")
+        self._conexion.execute("CREATE INDEX IF NOT EXISTS idx_trabajos_clave ON trabajos (clave)")
+        self._conexion.commit()
+
+    @staticmethod
+    def clave(tipo, parametros):
+        # Claves ordenadas: los mismos parámetros dan la misma clave aunque el diccionario venga en otro orden
+        parametros = json.dumps(parametros, sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.sha256(f"{tipo}:{parametros}".encode("utf-8")).hexdigest()
+
+    def encolar(self, tipo, parametros):
+        """
+        Agrega un trabajo a la cola.
+
+        Args:
+            tipo: Tipo de trabajo (una clave de TIPOS_TRABAJO)
+            parametros: Diccionario serializable a JSON (las fechas se conservan)
+
+        Returns:
+            str: Id del trabajo (el de uno igual pendiente o terminado, si existe)
+        """
+        if tipo not in TIPOS_TRABAJO:
+            raise ValueError(f"Tipo de trabajo desconocido: {tipo}")
+        clave = self.clave(tipo, parametros)
+        ahora = time.time()
+        with self._lock:
+            fila = self._conexion.execute(
+                "SELECT id FROM trabajos WHERE clave = ? AND estado != ? ORDER BY creado DESC LIMIT 1", (clave, ERROR)
+            ).fetchone()
+            if fila:
+                return fila[0]
+            id_trabajo = uuid.uuid4().hex
+            self._conexion.execute(
+                "INSERT INTO trabajos (id, tipo, clave, parametros, estado, creado, actualizado) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (id_trabajo, tipo, clave, a_json(parametros), PENDIENTE, ahora, ahora),
+            )
+            # De paso se borran los terminados viejos
+            self._conexion.execute("DELETE FROM trabajos WHERE estado IN (?, ?) AND actualizado < ?",
+                                   (LISTO, ERROR, ahora - RETENCION_SEGUNDOS))
+            self._conexion.commit()
+        self.hay_trabajo.set()
+        return id_trabajo
+
+    def estado(self, id_trabajo):
+        """
+        Estado de un trabajo.
+
+        Returns:
+            dict | None: {"estado", "resultado" (bytes), "error", "posicion"}
+                         (posicion = trabajos pendientes antes que este); None si no existe o ya se borró
+        """
+        with self._lock:
+            fila = self._conexion.execute(
+                "SELECT estado, resultado, error, creado FROM trabajos WHERE id = ?", (id_trabajo,)
+            ).fetchone()
+            if fila is None:
+                return None
+            estado, resultado, error, creado = fila
+            posicion = 0
+            if estado == PENDIENTE:
+                posicion = self._conexion.execute(
+                    "SELECT COUNT(*) FROM trabajos WHERE estado = ? AND creado < ?", (PENDIENTE, creado)
+                ).fetchone()[0]
+        return {"estado": estado, "resultado": resultado, "error": error, "posicion": posicion}
+
+    def tomar(self, trabajador, plazo=PLAZO_EN_CURSO_SEGUNDOS):
+        """
+        Marca como en curso el trabajo pendiente más viejo y lo devuelve. También se toman los que están
+        en curso hace más de plazo segundos (abandonados por un trabajador que se cayó).
+        La actualización es atómica: dos trabajadores (aunque sean de otros procesos) nunca toman el mismo.
+
+        Returns:
+            tuple | None: (id, tipo, parametros), o None si no hay trabajos pendientes
+        """
+        ahora = time.time()
+        with self._lock:
+            fila = self._conexion.execute(
+                "UPDATE trabajos SET estado = ?, trabajador = ?, actualizado = ?"
+                " WHERE id = (SELECT id FROM trabajos WHERE estado = ? OR (estado = ? AND actualizado < ?)"
+                "             ORDER BY creado LIMIT 1)"
+                " RETURNING id, tipo, parametros",
+                (EN_CURSO, trabajador, ahora, PENDIENTE, EN_CURSO, ahora - plazo),
+            ).fetchone()
+            self._conexion.commit()
+        if fila is None:
+            return None
+        return fila[0], fila[1], de_json(fila[2])
+
+    def terminar(self, id_trabajo, resultado=None, error=None):
+        """Guarda el resultado de un trabajo (o el error, si falló)."""
+        with self._lock:
+            self._conexion.execute(
+                "UPDATE trabajos SET estado = ?, resultado = ?, error = ?, actualizado = ? WHERE id = ?",
+                (ERROR if error is not None else LISTO, resultado, error, time.time(), id_trabajo),
+            )
+            self._conexion.commit()
+
+    def cantidad(self, estado=PENDIENTE):
+        with self._lock:
+            return self._conexion.execute("SELECT COUNT(*) FROM trabajos WHERE estado = ?", (estado,)).fetchone()[0]
+
+
+def ejecutar_uno(cola, trabajador):
+    """Toma un trabajo y lo ejecuta. Devuelve False si no había trabajos pendientes."""
+    tomado = cola.tomar(trabajador)
+    if tomado is None:
+        return False
+    id_trabajo, tipo, parametros = tomado
+    try:
+        with medir_trabajo(f"trabajo_{tipo}"):
+            resultado = TIPOS_TRABAJO[tipo](parametros)
+        cola.terminar(id_trabajo, resultado)
+    except Exception as e:
+        print(f"⚠️ Falló el trabajo {tipo} {id_trabajo}: {e}")
+        cola.terminar(id_trabajo, error=str(e))
+    return True
+
+
+def _bucle_trabajador(cola, trabajador, detener):
+    while not detener.is_set():
+        # Un error de la cola (p. ej. SQLite bloqueado) no debe terminar el hilo: se registra y se reintenta
+        try:
+            if ejecutar_uno(cola, trabajador):
+                continue
+        except Exception as e:
+            print(f"⚠️ Error en el trabajador {trabajador} de la cola, se reintenta: {e}")
+        # Sin trabajos: se espera un aviso de este proceso o el próximo sondeo (trabajos de otros procesos)
+        cola.hay_trabajo.wait(INTERVALO_SONDEO_SEGUNDOS)
+        cola.hay_trabajo.clear()
+
+
+_cola = None
+_hilos = []
+_detener = threading.Event()
+_lock_hilos = threading.Lock()
+
+
+def obtener_cola():
+    global _cola
+    if _cola is None:
+        _cola = ColaTrabajos()
+    return _cola
+
+
+def iniciar_trabajadores(cantidad=TRABAJADORES_COLA):
+    """
+    Inicia (una sola vez por proceso) los hilos que ejecutan los trabajos de la cola.
+    """
+    with _lock_hilos:
+        if _hilos or cantidad <= 0:
+            return
+        cola = obtener_cola()
+        prefijo = f"{os.getpid()}-"
+        for i in range(cantidad):
+            hilo = threading.Thread(target=_bucle_trabajador, args=(cola, f"{prefijo}{i}", _detener),
+                                    name=f"trabajador-cola-{i}", daemon=True)
+            hilo.start()
+            _hilos.append(hilo)
+
+
+def encolar_pdf(datos, evaluaciones, conclusion, evaluador, language="es", header_pdf_path=None):
+    """
+    Encola la generación de un PDF (mismos parámetros que generador_pdf.generar_pdf_bytes).
+
+    Returns:
+        str: Id del trabajo; con estado_trabajo se obtiene el PDF cuando está listo
+    """
+    iniciar_trabajadores()
+    return obtener_cola().encolar("pdf", {"datos": datos, "evaluaciones": evaluaciones, "conclusion": conclusion,
+                                          "evaluador": evaluador, "language": language,
+                                          "header_pdf_path": header_pdf_path})
+
+
+def estado_trabajo(id_trabajo):
+    """Estado de un trabajo (ver ColaTrabajos.estado)."""
+    return obtener_cola().estado(id_trabajo)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Ejecuta los trabajos de la cola (PDFs) hasta Ctrl+C.")
+    parser.add_argument("--trabajadores", type=int, default=max(TRABAJADORES_COLA, 1), help="Cantidad de hilos trabajadores")
+    args = parser.parse_args()
+
+    iniciar_trabajadores(args.trabajadores)
+    print(f"✅ {args.trabajadores} trabajadores procesando {obtener_cola().ruta}")
+    try:
+        while True:
+            time.sleep(INTERVALO_SONDEO_SEGUNDOS)
+    except KeyboardInterrupt:
+        _detener.set()
+        print(f"ℹ️ Quedan {obtener_cola().cantidad()} trabajos pendientes")
+
+
+if __name__ == "__main__":
+    main()
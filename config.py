@@ -1,7 +1,7 @@
 # config.py
-import pandas as pd
-import os
 from datetime import datetime
+from functools import lru_cache
+from datos_referencia import preguntas_por_area, evaluadores_por_area
 
 # Función para cargar las preguntas desde el CSV por año
 def cargar_preguntas_desde_csv(year=None, archivo_csv="preguntas_areas.csv"):
@@ -20,29 +20,9 @@ def cargar_preguntas_desde_csv(year=None, archivo_csv="preguntas_areas.csv"):
         if year is None:
             year = datetime.now().year
 
-        # Obtener la ruta absoluta del archivo
-        ruta_base = os.path.dirname(os.path.abspath(__file__))
-        ruta_completa = os.path.join(ruta_base, archivo_csv)
-
-        # Leer el CSV
-        df = pd.read_csv(ruta_completa)
-
-        # Filtrar por año
-        df_year = df[df['Year'] == year]
-
-        # Si no hay datos para ese año, usar el año más reciente disponible
-        if df_year.empty:
-            max_year = df['Year'].max()
-            print(f"⚠️ No hay preguntas para el año {year}. Usando año {max_year}")
-            df_year = df[df['Year'] == max_year]
-
-        # Crear diccionario agrupando por área
-        preguntas_dict = {}
-        for area in df_year['Area'].unique():
-            preguntas = df_year[df_year['Area'] == area].sort_values('Numero_Pregunta')['Pregunta'].tolist()
-            preguntas_dict[area] = preguntas
-
-        return preguntas_dict
+        # MAJ: El CSV se parsea una sola vez (se relee solo si cambia el archivo)
+        # y el diccionario por área ya viene precalculado
+        return preguntas_por_area(year, archivo_csv)
     except Exception as e:
         print(f"Error al cargar preguntas desde CSV: {e}")
         # Si falla, retornar diccionario vacío para que la app no se rompa
@@ -65,152 +45,58 @@ def cargar_evaluadores_desde_csv(year=None, archivo_csv="evaluadores_areas.csv")
         if year is None:
             year = datetime.now().year
 
-        # Obtener la ruta absoluta del archivo
-        ruta_base = os.path.dirname(os.path.abspath(__file__))
-        ruta_completa = os.path.join(ruta_base, archivo_csv)
-
-        # Leer el CSV
-        df = pd.read_csv(ruta_completa)
-
-        # Filtrar por año
-        df_year = df[df['Year'] == year]
-
-        # Si no hay datos para ese año, usar el año más reciente disponible
-        if df_year.empty:
-            max_year = df['Year'].max()
-            print(f"⚠️ No hay evaluadores para el año {year}. Usando año {max_year}")
-            df_year = df[df['Year'] == max_year]
-
-        # Crear diccionario con área y evaluador
-        evaluadores_dict = {}
-        for _, row in df_year.iterrows():
-            evaluadores_dict[row['Area']] = row['Evaluador']
-
-        return evaluadores_dict
+        # MAJ: Igual que las preguntas, se usa el índice precalculado por año
+        return evaluadores_por_area(year, archivo_csv)
     except Exception as e:
         print(f"Error al cargar evaluadores desde CSV: {e}")
         # Si falla, retornar diccionario vacío
         return {}
 
-# Descripciones por área (cargadas desde CSV)
-# MAJ: Ahora las preguntas se cargan desde preguntas_areas.csv con soporte para años
-# Para modificar las preguntas, editar el archivo preguntas_areas.csv
-# Por defecto, carga las del año actual
-DESCRIPCIONES_AREAS = cargar_preguntas_desde_csv()
-
-# Evaluadores por área (cargados desde CSV)
-# MAJ: Ahora los evaluadores se cargan desde evaluadores_areas.csv con soporte para años
-# Para modificar los evaluadores, editar el archivo evaluadores_areas.csv
-# Por defecto, carga los del año actual
-EVALUADORES_AREAS = cargar_evaluadores_desde_csv()
-
-DESCRIPCIONES_AREAS_EN = {
-    "Video & Análisis": [
-        "Creativity / Proactivity.",
-        "Decision making / Problem solving.",
-        "Punctuality and commitment.",
-        "Communication skills.",
-        "Teamwork, with peers, other staff.",
-        "Visual communication.",
-        "Data and statistics.",
-        "Knowledge of the game.",
-        "Able to solve technology outside of video analysis.",
-        "Video capture - Real Time coding.",
-    ],
-    "Coaching": [
-        "Exercise explanation, dynamics, time utilization.",
-        "Exercise objective(s).",
-        "Correction and transmission.",
-        "Feedback.",
-        "Decision making - problem solving.",
-        "Receptivity.",
-        "Relationship with other coaches, other staff and players.",
-        "Team analysis capacity.",
-        "Analysis capacity during the match.",
-        "Analysis capacity after the match.",
-    ],
-    "Fisio": [
-        "Creativity / Proactivity.",
-        "Decision making / Problem solving.",
-        "Punctuality and commitment.",
-        "Communication skills with Players, Staff, Extras.",
-        "Teamwork, with peers, other staff.",
-        "Organization and Planning.",
-        "Management of physio room, gym and field.",
-        "Interpretation of planning.",
-        "Management of technological tools, GPS, evaluations.",
-        "Knowledge of the game.",
-    ],
-    "Logística & Utilería": [
-        "Teamwork.",
-        "Planning.",
-        "Order.",
-        "Creativity.",
-        "Punctuality.",
-        "Decision making - problem solving.",
-        "Knowledge of the game.",
-        "Predisposition / Energy.",
-        "Ability to work and learn.",
-        "Proactive.",
-    ],
-    "Match Official": [
-        "Commitment / Punctuality.",
-        "Personal training objective(s).",
-        "Demonstration of tools for game management.",
-        "Feedback.",
-        "Decision making - problem solving.",
-        "Receptivity.",
-        "Relationship with other coaches, other staff and players.",
-        "Team analysis capacity.",
-        "Analysis capacity during the match.",
-        "Analysis capacity after the match.",
-    ],
-    "Médico": [
-        "Creativity / Proactivity.",
-        "Decision making / Problem solving.",
-        "Punctuality / Commitment.",
-        "Communication skills with Players / Staff, etc.",
-        "Teamwork with peers, other staff.",
-        "Organization and Planning.",
-        "Management of physio room, gym and field.",
-        "Interpretation of planning.",
-        "Management of technological tools, GPS, evaluations and HIA video review.",
-        "Knowledge of the game.",
-    ],
-    "Preparación Física": [
-        "Commitment / Punctuality.",
-        "Level of training and previous experience.",
-        "Planning / Setting objectives.",
-        "Teamwork, with peers, other staff.",
-        "Communication skills with players, staff, extras.",
-        "Creativity / Proactivity.",
-        "Decision making / Problem solving.",
-        "Leadership of activities.",
-        "Control and organization of activities and work times.",
-        "Interpretation, analysis and use of data.",
-    ],
-    "Team Manager": [
-        "Commitment / Punctuality.",
-        "Previous experience.",
-        "Planning / Setting objectives.",
-        "Field work.",
-        "Communication skills (players, staff, extras).",
-        "Creativity / Proactivity.",
-        "Decision making / Problem solving.",
-        "Leadership of activities.",
-        "Teamwork, with peers, other staff.",
-        "Control and organization of activities.",
-    ],
-    "Nutrición":[
-        "Creativity / Proactivity",
-        "Decision making / Problem solving",
-        "Time management and commitment",
-        "Communication skills with Players, Staff, Extras",
-        "Teamwork, with peers, other staff",
-        "Level of training in Sports Nutrition",
-        "Management of ISAK 2 protocol for measurement",
-        "Anthropometric interpretation",
-        "Management of technological, computer, etc. tools.",
-        "Knowledge of the game and physical preparation",
-    ],
-}
\ No newline at end of file
+# MAJ: Un área puede tener varios evaluadores en la misma celda ("D. Hourcade, L. Piña, ..."): en la app
+# cada uno elige su nombre, y con ese nombre se guardan su borrador autoguardado y sus guardados
+def separar_evaluadores(evaluadores):
+    """
+    Separa la celda de evaluadores de un área en los nombres de cada evaluador.
+
+    Returns:
+        list: Nombres en el orden del CSV (uno solo si el área tiene un único evaluador)
+    """
+    nombres = [nombre.strip().rstrip(".").strip() for nombre in (evaluadores or "").split(",")]
+    return [nombre for nombre in nombres if nombre] or [evaluadores]
+
+# Descripciones y evaluadores por área del año actual (cargados desde CSV)
+# MAJ: Ahora las preguntas se cargan desde preguntas_areas.csv y los evaluadores desde
+# evaluadores_areas.csv con soporte para años. Para modificarlos, editar esos archivos.
+# MAJ: Ya no se cargan al importar config: DESCRIPCIONES_AREAS y EVALUADORES_AREAS se calculan
+# la primera vez que se usan (la app carga siempre las del año seleccionado)
+@lru_cache(maxsize=None)
+def obtener_descripciones_areas():
+    """Preguntas por área del año actual (se calculan una sola vez)."""
+    return cargar_preguntas_desde_csv()
+
+@lru_cache(maxsize=None)
+def obtener_evaluadores_areas():
+    """Evaluadores por área del año actual (se calculan una sola vez)."""
+    return cargar_evaluadores_desde_csv()
+
+_GLOBALES_PEREZOSOS = {
+    "DESCRIPCIONES_AREAS": obtener_descripciones_areas,
+    "EVALUADORES_AREAS": obtener_evaluadores_areas,
+}
+
+def __getattr__(nombre):
+    # Compatibilidad: config.DESCRIPCIONES_AREAS y config.EVALUADORES_AREAS siguen funcionando
+    if nombre in _GLOBALES_PEREZOSOS:
+        return _GLOBALES_PEREZOSOS[nombre]()
+    raise AttributeError(f"module {__name__!r} has no attribute {nombre!r}")
+
+# Encabezados disponibles para el PDF (el año se toma del final de la clave)
+# MAJ: Compartido entre la app y la generación por lotes
+ENCABEZADOS_PDF = {
+    "SAR 2025": "images/header_2025.png",
+    "SAR 2024": "images/header_2024.png",
+    "SAR 2023": "images/header_2023.png"
+}
+
+# MAJ: Las preguntas en inglés están en preguntas_areas.csv (columna Pregunta_EN), por año igual que en español;
+# se leen junto con las de español y sus ids con datos_referencia.catalogo_area
@@ -0,0 +1,198 @@
+# datos_referencia.py
+import os
+import threading
+
+# MAJ: Los CSV de referencia (preguntas, evaluadores y participantes) se parsean una sola vez
+# y se vuelven a leer solo si cambia la fecha de modificación del archivo.
+# Sobre cada CSV se precalculan índices por (año, área) y (año, área, nombre).
+# pandas se importa recién al leer el primer CSV, para que importar este módulo (y config) sea inmediato.
+# MAJ: Si existe la caché en Parquet (cache_columnar.py) construida desde la versión actual del CSV,
+# se lee esa en lugar del CSV.
+
+RUTA_BASE = os.path.dirname(os.path.abspath(__file__))
+
+# CSV de los participantes a evaluar
+PARTICIPANTES_CSV_PATH = "SAR 2024 ACADEMIA HP/Participantes x Areas.csv"
+
+_cache = {}  # clave -> (mtime, índices)
+_lock = threading.Lock()
+
+
+def _ruta_absoluta(archivo_csv):
+    return archivo_csv if os.path.isabs(archivo_csv) else os.path.join(RUTA_BASE, archivo_csv)
+
+
+def _cargar_con_cache(tipo, archivo_csv, construir):
+    """
+    Devuelve los índices de un CSV, reconstruyéndolos solo si el archivo cambió.
+
+    Args:
+        tipo: Tipo de datos ('preguntas', 'evaluadores', 'participantes')
+        archivo_csv: Ruta al archivo CSV
+        construir: Función que recibe el DataFrame y devuelve los índices
+
+    Returns:
+        dict: Índices precalculados
+    """
+    ruta = _ruta_absoluta(archivo_csv)
+    mtime = os.path.getmtime(ruta)
+    clave = (tipo, ruta)
+    with _lock:
+        entrada = _cache.get(clave)
+        if entrada is not None and entrada[0] == mtime:
+            return entrada[1]
+        from cache_columnar import leer_si_vigente
+        df = leer_si_vigente(tipo, ruta, mtime)
+        if df is None:
+            import pandas as pd
+            df = pd.read_csv(ruta)
+        indices = construir(df)
+        _cache[clave] = (mtime, indices)
+        return indices
+
+
+def _construir_preguntas(df):
+    # Se respeta el orden de aparición de las áreas en el CSV (es el orden del selector)
+    # MAJ: Cada pregunta tiene un Id_Pregunta estable dentro de su año y área (q01, q02...): es la clave con la
+    # que se guardan las respuestas, así cambiar la redacción de una pregunta no pierde lo ya evaluado
+    if "Id_Pregunta" not in df.columns:
+        df = df.assign(Id_Pregunta=[f"q{int(n):02d}" for n in df["Numero_Pregunta"]])
+    # MAJ: Pregunta_EN es la versión en inglés de cada pregunta del año; si falta queda la de español
+    if "Pregunta_EN" not in df.columns:
+        df = df.assign(Pregunta_EN=df["Pregunta"])
+    df = df.assign(Pregunta_EN=df["Pregunta_EN"].fillna(df["Pregunta"]))
+    por_year = {}
+    en_por_year = {}
+    ids_por_year = {}
+    for (year, area), grupo in df.groupby(["Year", "Area"], sort=False):
+        grupo = grupo.sort_values("Numero_Pregunta")
+        por_year.setdefault(int(year), {})[area] = grupo["Pregunta"].tolist()
+        en_por_year.setdefault(int(year), {})[area] = grupo["Pregunta_EN"].tolist()
+        ids_por_year.setdefault(int(year), {})[area] = grupo["Id_Pregunta"].tolist()
+    return {"por_year": por_year, "en_por_year": en_por_year, "ids_por_year": ids_por_year}
+
+
+def _construir_evaluadores(df):
+    por_year = {}
+    for year, area, evaluador in zip(df["Year"], df["Area"], df["Evaluador"]):
+        por_year.setdefault(int(year), {})[area] = evaluador
+    return {"por_year": por_year}
+
+
+def normalizar_participantes(df):
+    """Agrega la columna entera YEAR (a partir de la FECHA) y descarta las filas sin año."""
+    import pandas as pd
+
+    # La FECHA es texto libre ("Noviembre, 2024"), se extrae el año una sola vez
+    df = df.copy()
+    df["YEAR"] = pd.to_numeric(df["FECHA"].str.extract(r"(\d{4})", expand=False), errors="coerce").astype("Int64")
+    return df[df["YEAR"].notna()].astype({"YEAR": "int64"})
+
+
+def _construir_participantes(df):
+    # La caché en Parquet ya trae la columna YEAR
+    if "YEAR" not in df.columns:
+        df = normalizar_participantes(df)
+
+    por_year_area = {}
+    por_year_area_nombre = {}
+    for registro in df.to_dict("records"):
+        year, area, nombre = int(registro["YEAR"]), registro["AREA"], registro["NOMBRE"]
+        nombres = por_year_area.setdefault((year, area), [])
+        if (year, area, nombre) not in por_year_area_nombre:
+            nombres.append(nombre)
+            por_year_area_nombre[(year, area, nombre)] = registro
+    return {"df": df, "por_year_area": por_year_area, "por_year_area_nombre": por_year_area_nombre}
+
+
+def _resolver_year(por_year, year, tipo):
+    # Si no hay datos para ese año, usar el año más reciente disponible
+    if year in por_year:
+        return year
+    max_year = max(por_year)
+    print(f"⚠️ No hay {tipo} para el año {year}. Usando año {max_year}")
+    return max_year
+
+
+def preguntas_por_area(year, archivo_csv="preguntas_areas.csv"):
+    """
+    Devuelve las preguntas de un año agrupadas por área (ordenadas por Numero_Pregunta).
+
+    Returns:
+        dict: {área: [preguntas]}
+    """
+    por_year = _cargar_con_cache("preguntas", archivo_csv, _construir_preguntas)["por_year"]
+    year = _resolver_year(por_year, year, "preguntas")
+    return {area: list(preguntas) for area, preguntas in por_year[year].items()}
+
+
+def years_preguntas(archivo_csv="preguntas_areas.csv"):
+    """Devuelve los años que tienen preguntas cargadas, de menor a mayor."""
+    return sorted(_cargar_con_cache("preguntas", archivo_csv, _construir_preguntas)["por_year"])
+
+
+def catalogo_area(year, area, archivo_csv="preguntas_areas.csv"):
+    """
+    Devuelve las preguntas de un año y área en los dos idiomas, con su Id_Pregunta.
+
+    Returns:
+        tuple: (ids, preguntas en español, preguntas en inglés); listas vacías si el área no existe
+    """
+    indices = _cargar_con_cache("preguntas", archivo_csv, _construir_preguntas)
+    year = _resolver_year(indices["por_year"], year, "preguntas")
+    return (list(indices["ids_por_year"][year].get(area, [])), list(indices["por_year"][year].get(area, [])),
+            list(indices["en_por_year"][year].get(area, [])))
+
+
+def ids_preguntas(year, archivo_csv="preguntas_areas.csv"):
+    """
+    Devuelve los Id_Pregunta de un año por área, en el mismo orden que preguntas_por_area.
+
+    Returns:
+        dict: {área: [ids]}
+    """
+    ids_por_year = _cargar_con_cache("preguntas", archivo_csv, _construir_preguntas)["ids_por_year"]
+    year = _resolver_year(ids_por_year, year, "preguntas")
+    return {area: list(ids) for area, ids in ids_por_year[year].items()}
+
+
+def evaluadores_por_area(year, archivo_csv="evaluadores_areas.csv"):
+    """
+    Devuelve los evaluadores de un año por área.
+
+    Returns:
+        dict: {área: evaluador}
+    """
+    por_year = _cargar_con_cache("evaluadores", archivo_csv, _construir_evaluadores)["por_year"]
+    year = _resolver_year(por_year, year, "evaluadores")
+    return dict(por_year[year])
+
+
+def participantes_df(year, areas=None, archivo_csv=PARTICIPANTES_CSV_PATH):
+    """
+    Devuelve el DataFrame de participantes de un año (y opcionalmente de algunas áreas).
+    """
+    indices = _cargar_con_cache("participantes", archivo_csv, _construir_participantes)
+    df = indices["df"]
+    df = df[df["YEAR"] == year]
+    if areas:
+        df = df[df["AREA"].isin(areas)]
+    return df
+
+
+def nombres_participantes(year, area, archivo_csv=PARTICIPANTES_CSV_PATH):
+    """
+    Devuelve los nombres (sin repetir, en el orden del CSV) de los participantes de un año y área.
+    """
+    indices = _cargar_con_cache("participantes", archivo_csv, _construir_participantes)
+    return list(indices["por_year_area"].get((year, area), []))
+
+
+def datos_participante(year, area, nombre, archivo_csv=PARTICIPANTES_CSV_PATH):
+    """
+    Devuelve la fila del CSV de un participante como diccionario (o None si no existe).
+    """
+    indices = _cargar_con_cache("participantes", archivo_csv, _construir_participantes)
+    registro = indices["por_year_area_nombre"].get((year, area, nombre))
+    return dict(registro) if registro is not None else None
+
@@ -0,0 +1,155 @@
+# exportacion.py
+import argparse
+import csv
+import io
+from datetime import datetime
+
+from modelo_evaluacion import Evaluacion
+from repositorio_evaluaciones import iterar_evaluaciones
+
+# MAJ: Exportación de todas las evaluaciones (uno o varios años) a CSV o Parquet para analizarlas
+# fuera de la app. Cada evaluación se aplana en una fila por pregunta respondida:
+# (year, area, nombre, qid, numero, pregunta, calificacion, observaciones, ...).
+# Los documentos se leen de un cursor por lotes y las filas se escriben de a TAMANO_BLOQUE
+# (en Parquet, un row group por bloque), así la memoria no depende de cuántas evaluaciones haya.
+# Los documentos que solo tienen un borrador autoguardado se exportan solo con --incluir-borradores
+# (marcados en la columna 'borrador').
+#
+#     python exportacion.py --formato parquet --salida evaluaciones.parquet          # todos los años
+#     python exportacion.py --year 2024 --area Coaching --salida coaching_2024.csv
+
+TAMANO_LOTE_CURSOR = 500
+TAMANO_BLOQUE = 5000
+PROYECCION_EXPORTACION = {"_id": 0, "year": 1, "area": 1, "nombre": 1, "evaluador": 1, "fecha": 1, "borrador": 1,
+                          "respuestas": 1, "evaluaciones": 1, "conclusion": 1}
+COLUMNAS = ["year", "area", "nombre", "evaluador", "fecha", "borrador", "qid", "numero", "pregunta",
+            "calificacion", "observaciones", "conclusion"]
+
+
+def filas_evaluacion(doc):
+    """
+    Aplana un documento en una fila por pregunta respondida (en el orden de COLUMNAS).
+    Se incluyen también los ítems y respuestas que ya no están en el catálogo del año.
+    """
+    year, area = doc["year"], doc["area"]
+    evaluacion = Evaluacion.del_catalogo(year, area, doc)
+    fecha = doc.get("fecha") if isinstance(doc.get("fecha"), datetime) else None
+    comunes = (year, area, doc["nombre"], doc.get("evaluador", ""), fecha, bool(doc.get("borrador")))
+    conclusion = doc.get("conclusion", "") or ""
+    filas = [comunes + (p.qid, p.numero, p.descripcion_es, p.calificacion, p.observaciones, conclusion)
+             for p in evaluacion if p.calificacion is not None]
+    filas += [comunes + ("", item.get("numero"), item.get("descripcion", ""), item.get("calificacion"),
+                         item.get("observaciones", ""), conclusion) for item in evaluacion.extras]
+    filas += [comunes + (qid, None, "", calificacion, observaciones, conclusion)
+              for qid, (calificacion, observaciones) in evaluacion.respuestas_extra.items()]
+    return filas
+
+
+def bloques_de_filas(year=None, area=None, collection=None, tamano_bloque=TAMANO_BLOQUE, incluir_borradores=False):
+    """Recorre las evaluaciones y devuelve las filas en bloques de hasta tamano_bloque."""
+    bloque = []
+    for doc in iterar_evaluaciones(year, area, PROYECCION_EXPORTACION, TAMANO_LOTE_CURSOR, collection, incluir_borradores):
+        bloque.extend(filas_evaluacion(doc))
+        if len(bloque) >= tamano_bloque:
+            yield bloque
+            bloque = []
+    if bloque:
+        yield bloque
+
+
+def _escribir_csv(destino, bloques):
+    escritor = csv.writer(destino)
+    escritor.writerow(COLUMNAS)
+    cantidad = 0
+    for bloque in bloques:
+        escritor.writerows([fila[:4] + (fila[4].isoformat() if fila[4] else "",) + fila[5:] for fila in bloque])
+        cantidad += len(bloque)
+    return cantidad
+
+
+def _escribir_parquet(destino, bloques):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    esquema = pa.schema([
+        ("year", pa.int64()), ("area", pa.dictionary(pa.int32(), pa.string())), ("nombre", pa.string()),
+        ("evaluador", pa.string()), ("fecha", pa.timestamp("ms")), ("borrador", pa.bool_()), ("qid", pa.string()),
+        ("numero", pa.int64()), ("pregunta", pa.string()), ("calificacion", pa.int64()),
+        ("observaciones", pa.string()), ("conclusion", pa.string()),
+    ])
+    cantidad = 0
+    with pq.ParquetWriter(destino, esquema) as escritor:
+        for bloque in bloques:
+            columnas = list(zip(*bloque))
+            escritor.write_table(pa.Table.from_arrays(
+                [pa.array(valores, type=campo.type) if not pa.types.is_dictionary(campo.type)
+                 else pa.array(valores).dictionary_encode() for valores, campo in zip(columnas, esquema)],
+                schema=esquema))
+            cantidad += len(bloque)
+    return cantidad
+
+
+def exportar(destino, formato="csv", year=None, area=None, collection=None, tamano_bloque=TAMANO_BLOQUE,
+             incluir_borradores=False):
+    """
+    Exporta las evaluaciones aplanadas.
+
+    Args:
+        destino: Ruta o archivo (de texto para CSV, binario para Parquet)
+        formato: 'csv' o 'parquet' (requiere pyarrow)
+        year: Año (None = todos)
+        area: Área (None = todas)
+        collection: Colección de MongoDB (None = según SAR_ALMACEN)
+        incluir_borradores: True para incluir los documentos que solo tienen un borrador autoguardado
+
+    Returns:
+        int: Cantidad de filas escritas
+    """
+    bloques = bloques_de_filas(year, area, collection, tamano_bloque, incluir_borradores)
+    if formato == "parquet":
+        return _escribir_parquet(destino, bloques)
+    if isinstance(destino, str):
+        with open(destino, "w", newline="", encoding="utf-8") as f:
+            return _escribir_csv(f, bloques)
+    return _escribir_csv(destino, bloques)
+
+
+def exportar_bytes(formato="csv", year=None, area=None, collection=None):
+    """
+    Igual que exportar, pero devuelve el archivo en memoria (para st.download_button).
+
+    Returns:
+        tuple: (bytes, cantidad de filas)
+    """
+    if formato == "parquet":
+        buffer = io.BytesIO()
+        cantidad = exportar(buffer, formato, year, area, collection)
+        return buffer.getvalue(), cantidad
+    buffer = io.StringIO()
+    cantidad = exportar(buffer, formato, year, area, collection)
+    return buffer.getvalue().encode("utf-8"), cantidad
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Exporta las evaluaciones a CSV o Parquet (una fila por pregunta).")
+    parser.add_argument("--year", type=int, default=None, help="Año de la academia (por defecto todos)")
+    parser.add_argument("--area", default=None, help="Área (por defecto todas)")
+    parser.add_argument("--formato", default="csv", choices=["csv", "parquet"], help="Formato del archivo")
+    parser.add_argument("--salida", default=None, help="Ruta del archivo (por defecto evaluaciones.<formato>)")
+    parser.add_argument("--bloque", type=int, default=TAMANO_BLOQUE, help="Filas por bloque escrito")
+    parser.add_argument("--incluir-borradores", action="store_true", help="Incluir las evaluaciones que solo tienen un borrador")
+    parser.add_argument("--mongo-uri", default=None, help="URI de MongoDB (por defecto st.secrets['mongo_uri'])")
+    parser.add_argument("--db", default=None, help="Base de datos (por defecto st.secrets['db_name'])")
+    parser.add_argument("--coleccion", default=None, help="Colección (por defecto st.secrets['collection_name'])")
+    args = parser.parse_args()
+
+    from repositorio_evaluaciones import obtener_coleccion
+    collection = obtener_coleccion(args.mongo_uri, args.db, args.coleccion)
+
+    salida = args.salida or f"evaluaciones.{args.formato}"
+    cantidad = exportar(salida, args.formato, args.year, args.area, collection, args.bloque, args.incluir_borradores)
+    print(f"✅ {cantidad} filas en {salida}")
+
+
+if __name__ == "__main__":
+    main()
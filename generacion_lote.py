@@ -0,0 +1,197 @@
+# generacion_lote.py
+import argparse
+import io
+import multiprocessing
+import os
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+
+from config import ENCABEZADOS_PDF, cargar_evaluadores_desde_csv
+from datos_referencia import participantes_df
+from modelo_evaluacion import Evaluacion
+from traducciones import traducir_textos
+
+RUTA_BASE = os.path.dirname(os.path.abspath(__file__))
+
+
+def cargar_participantes(year, areas=None):
+    """
+    Carga los participantes de un año (y opcionalmente de algunas áreas).
+
+    Args:
+        year: Año de la academia
+        areas: Lista de áreas a incluir (None = todas)
+
+    Returns:
+        DataFrame: Participantes filtrados por año y área
+    """
+    return participantes_df(year, areas)
+
+
+def encabezado_para_year(year):
+    """Devuelve la ruta absoluta del encabezado del año, o None si no existe."""
+    ruta = ENCABEZADOS_PDF.get(f"SAR {year}")
+    return os.path.join(RUTA_BASE, ruta) if ruta else None
+
+
+def _traducir_trabajos(trabajos):
+    # Todas las observaciones y conclusiones de los PDFs en inglés se traducen juntas (con caché)
+    # antes de repartir el trabajo, así los procesos del pool solo renderizan
+    trabajos_en = [t for t in trabajos if t["language"] == "en"]
+    textos = [ev["observaciones"] for t in trabajos_en for ev in t["evaluaciones"]]
+    textos += [t["conclusion"] for t in trabajos_en]
+    traducciones = dict(zip(textos, traducir_textos(textos, origen="es", destino="en")))
+    for t in trabajos_en:
+        t["evaluaciones"] = [dict(ev, observaciones=traducciones.get(ev["observaciones"], ev["observaciones"]))
+                             for ev in t["evaluaciones"]]
+        t["conclusion"] = traducciones.get(t["conclusion"], t["conclusion"])
+
+
+def _inicializar_proceso(rutas_encabezados):
+    # Cada proceso del pool escala los encabezados una sola vez, antes del primer PDF
+    from recursos_pdf import precargar_encabezados
+    precargar_encabezados(rutas_encabezados)
+
+
+def _renderizar_trabajo(trabajo):
+    """
+    Genera un PDF en memoria. Se ejecuta en los procesos del pool, por eso
+    recibe y devuelve solo datos simples (diccionarios y bytes).
+    """
+    from generador_pdf import generar_pdf_con_reportlab
+
+    buffer = io.BytesIO()
+    generar_pdf_con_reportlab(trabajo["datos"], trabajo["evaluaciones"], trabajo["conclusion"], trabajo["evaluador"], buffer,
+                              language=trabajo["language"], header_pdf_path=trabajo["header_pdf_path"])
+    return trabajo["nombre_archivo"], buffer.getvalue()
+
+
+def construir_trabajos(df_participantes, evaluaciones_guardadas, year, idiomas=("es", "en")):
+    """
+    Arma la lista de PDFs a generar a partir de los participantes y sus evaluaciones guardadas.
+
+    Args:
+        df_participantes: DataFrame de participantes (ya filtrado)
+        evaluaciones_guardadas: Diccionario {(nombre, area): documento de MongoDB}
+        year: Año de la academia
+        idiomas: Idiomas a generar ('es', 'en')
+
+    Returns:
+        tuple: (lista de trabajos, lista de participantes sin evaluación guardada)
+    """
+    evaluadores_areas = cargar_evaluadores_desde_csv(year=year)
+    header_pdf_path = encabezado_para_year(year)
+
+    trabajos = []
+    pendientes = []
+    for participante in df_participantes.to_dict("records"):
+        nombre, area = participante["NOMBRE"], participante["AREA"]
+        doc = evaluaciones_guardadas.get((nombre, area))
+        if doc is None:
+            pendientes.append(f"{area} - {nombre}")
+            continue
+
+        datos = {
+            "fecha": participante["FECHA"],
+            "area": area,
+            "nombre": nombre,
+            "uni": participante["UNION/FEDERACION"],
+            "email": participante["EMAIL"],
+            "celular": participante["CONTACTO"],
+        }
+        # Mismo orden que en la app (el de las preguntas del año); las que no están en el CSV van al final
+        evaluacion = Evaluacion.del_catalogo(year, area, doc)
+        evaluador = doc.get("evaluador") or evaluadores_areas.get(area, "Evaluador no asignado")
+        base = {
+            "datos": datos,
+            "conclusion": doc.get("conclusion", ""),
+            "evaluador": evaluador,
+            "header_pdf_path": header_pdf_path,
+        }
+
+        if "es" in idiomas:
+            trabajos.append(dict(base, language="es", evaluaciones=evaluacion.a_lista("es"),
+                                 nombre_archivo=f"{area}-{nombre}-{datos['uni']}.pdf"))
+        if "en" in idiomas:
+            # Descripciones en inglés del catálogo del año (igual que la pestaña English)
+            trabajos.append(dict(base, language="en", evaluaciones=evaluacion.a_lista("en"),
+                                 nombre_archivo=f"{area}-{nombre}-{datos['uni']}_EN.pdf"))
+
+    return trabajos, pendientes
+
+
+def generar_lote_zip(collection, year, areas=None, idiomas=("es", "en"), traducir=True, max_workers=None):
+    """
+    Genera los PDFs de todos los participantes evaluados de un año/área en paralelo
+    y los devuelve empaquetados en un único ZIP.
+
+    Args:
+        collection: Colección de MongoDB con las evaluaciones (None = según SAR_ALMACEN)
+        year: Año de la academia
+        areas: Lista de áreas (None = todas)
+        idiomas: Idiomas a generar ('es', 'en')
+        traducir: Traducir observaciones y conclusión en los PDFs en inglés
+        max_workers: Cantidad de procesos (None = uno por núcleo)
+
+    Returns:
+        tuple: (bytes del ZIP, cantidad de PDFs generados, participantes sin evaluación)
+    """
+    df_participantes = cargar_participantes(year, areas)
+
+    from repositorio_evaluaciones import buscar_evaluaciones
+
+    # Una sola consulta para traer todas las evaluaciones del año/área
+    evaluaciones_guardadas = buscar_evaluaciones(year, areas, collection=collection)
+
+    trabajos, pendientes = construir_trabajos(df_participantes, evaluaciones_guardadas, year, idiomas)
+    if traducir:
+        _traducir_trabajos(trabajos)
+
+    zip_buffer = io.BytesIO()
+    with zipfile.ZipFile(zip_buffer, "w", zipfile.ZIP_DEFLATED) as zip_file:
+        if trabajos:
+            encabezados = sorted({t["header_pdf_path"] for t in trabajos if t["header_pdf_path"]})
+            # spawn y no fork: la app de Streamlit tiene varios hilos (sesiones, cola de trabajos, traducciones)
+            # y un fork copiaría sus locks en el estado en que estén
+            with ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context("spawn"),
+                                     initializer=_inicializar_proceso, initargs=(encabezados,)) as executor:
+                for nombre_archivo, pdf_bytes in executor.map(_renderizar_trabajo, trabajos):
+                    zip_file.writestr(nombre_archivo, pdf_bytes)
+        if pendientes:
+            zip_file.writestr("sin_evaluacion.txt", "\n".join(pendientes) + "\n")
+
+    return zip_buffer.getvalue(), len(trabajos), pendientes
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Genera en lote los PDFs de evaluación de una academia SAR en un ZIP.")
+    parser.add_argument("--year", type=int, required=True, help="Año de la academia (ej. 2024)")
+    parser.add_argument("--area", action="append", help="Área a incluir (se puede repetir; por defecto todas)")
+    parser.add_argument("--idiomas", default="es,en", help="Idiomas separados por coma (es, en)")
+    parser.add_argument("--sin-traduccion", action="store_true", help="No traducir observaciones en los PDFs en inglés")
+    parser.add_argument("--workers", type=int, default=None, help="Cantidad de procesos (por defecto uno por núcleo)")
+    parser.add_argument("--salida", default=None, help="Ruta del ZIP (por defecto evaluaciones_<year>.zip)")
+    parser.add_argument("--mongo-uri", default=None, help="URI de MongoDB (por defecto st.secrets['mongo_uri'])")
+    parser.add_argument("--db", default=None, help="Base de datos (por defecto st.secrets['db_name'])")
+    parser.add_argument("--coleccion", default=None, help="Colección (por defecto st.secrets['collection_name'])")
+    args = parser.parse_args()
+
+    from repositorio_evaluaciones import obtener_coleccion
+    collection = obtener_coleccion(args.mongo_uri, args.db, args.coleccion)
+
+    idiomas = tuple(i.strip() for i in args.idiomas.split(",") if i.strip())
+    zip_bytes, cantidad, pendientes = generar_lote_zip(collection, args.year, args.area, idiomas,
+                                                       traducir=not args.sin_traduccion, max_workers=args.workers)
+
+    salida = args.salida or f"evaluaciones_{args.year}.zip"
+    with open(salida, "wb") as f:
+        f.write(zip_bytes)
+    print(f"✅ {cantidad} PDFs generados en {salida}")
+    if pendientes:
+        print(f"ℹ️ {len(pendientes)} participantes sin evaluación guardada:")
+        for p in pendientes:
+            print(f"  - {p}")
+
+
+if __name__ == "__main__":
+    main()
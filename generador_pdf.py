@@ -0,0 +1,196 @@
+# generador_pdf.py
+import hashlib
+import io
+import json
+import os
+import threading
+from collections import OrderedDict
+
+from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, Image
+from reportlab.lib.pagesizes import A4
+from reportlab.lib import colors
+
+from modelo_evaluacion import Evaluacion
+from recursos_pdf import ALTO_ENCABEZADO, ANCHO_ENCABEZADO, obtener_encabezado, obtener_estilos
+
+# MAJ: La generación del PDF vive en un módulo propio (sin streamlit ni MongoDB)
+# para poder usarla desde la app y desde la generación por lotes en varios procesos
+
+# MAJ: Caché de PDFs en memoria por contenido: la clave es un hash de todo lo que aparece en el PDF,
+# así una descarga repetida no vuelve a renderizar y cada sesión recibe sus propios bytes
+# (antes todas escribían en evaluacion_final.pdf y se pisaban entre usuarios)
+MAX_BYTES_CACHE_PDF = 64 * 1024 * 1024
+
+_cache_pdf = OrderedDict()  # clave -> bytes del PDF (el más reciente al final)
+_bytes_cache_pdf = 0
+_lock_cache_pdf = threading.Lock()
+
+# Función para agregar número de páginas al pie de cada página
+def add_page_number(canvas, doc):
+    canvas.saveState()
+    page_number = canvas.getPageNumber()  # Número de la página actual
+    canvas.setFont("Helvetica", 8)
+    canvas.drawString(520, 10, f"Página {page_number}")  # Coloca el número de página en el pie
+    canvas.drawCentredString(300, 10, "Generado por el sistema de Evaluación SAR")  # Texto centrado
+    canvas.restoreState()
+
+# Generar PDF con ReportLab
+def generar_pdf_con_reportlab(datos, evaluaciones, conclusion, evaluador, output_path, language='es', header_pdf_path=None):
+    doc = SimpleDocTemplate(output_path, pagesize=A4, leftMargin=40, rightMargin=40, topMargin=40, bottomMargin=40)
+    elements = construir_elementos(datos, evaluaciones, conclusion, evaluador, language, header_pdf_path)
+
+    # Agregar número de página al footer
+    doc.build(elements, onFirstPage=add_page_number, onLaterPages=add_page_number)
+
+
+# MAJ: Los flowables de una evaluación se arman aparte para poder reutilizarlos en el reporte
+# consolidado por área (reporte_consolidado.py), que agrega una sección por participante
+def construir_elementos(datos, evaluaciones, conclusion, evaluador, language='es', header_pdf_path=None):
+    """
+    Arma los flowables del PDF de una evaluación (encabezado, datos del evaluado, tabla, total y conclusión).
+
+    Returns:
+        list: Flowables de reportlab
+    """
+    # MAJ: evaluaciones puede ser una lista de ítems o un modelo Evaluacion (ver modelo_evaluacion)
+    if isinstance(evaluaciones, Evaluacion):
+        evaluaciones = evaluaciones.a_lista(language)
+    # MAJ: Estilos compartidos (se crean una sola vez, ver recursos_pdf)
+    styles = obtener_estilos()
+
+    elements = []
+
+    if header_pdf_path:
+        # MAJ: Encabezado ya escalado al tamaño final y en memoria (ver recursos_pdf)
+        encabezado = obtener_encabezado(header_pdf_path)
+        if encabezado is not None:
+            img = Image(encabezado, width=ANCHO_ENCABEZADO, height=ALTO_ENCABEZADO)  # Ajusta proporción
+            elements.append(img)
+        else:
+            elements.append(Paragraph("<b>Encabezado no disponible</b>", styles["Normal"]))
+
+    # Título EVALUACIÓN con la fecha en la misma fila
+    elements.append(Spacer(1, 5))
+
+    # Obtener la fecha desde los datos y usarla como texto
+    fecha_original = datos['fecha']
+    
+    if language == 'en':
+        title_text = "EVALUATION"
+        area_text = "Area"
+        nombre_text = "Name"
+        contacto_text = "Contact"
+        celular_text = "Phone"
+        union_text = "Union/Federation"
+        table_header = ["Description", "Rating", "Observations"]
+        total_text = "Total"
+        conclusion_text = "Conclusion"
+    else:
+        title_text = "EVALUACIÓN"
+        area_text = "Área"
+        nombre_text = "Nombre"
+        contacto_text = "Contacto"
+        celular_text = "Celular"
+        union_text = "Unión/Federación"
+        table_header = ["Descripción", "Calificación", "Observaciones"]
+        total_text = "Total"
+        conclusion_text = "Conclusión"
+
+
+    # Crear una tabla para el encabezado con EVALUACIÓN y Fecha
+    header_table_data = [
+        [Paragraph(f"<b>{title_text}</b>", styles["CustomTitle"]),
+         Paragraph(f"{fecha_original}", styles["DateStyle"])]
+    ]
+
+    header_table = Table(header_table_data, colWidths=[300, 200])  # Ajusta el ancho de las columnas
+    header_table.setStyle(TableStyle([
+        ("ALIGN", (0, 0), (0, 0), "LEFT"),  # Alinear "EVALUACIÓN" a la izquierda
+        ("ALIGN", (1, 0), (1, 0), "RIGHT"),  # Alinear fecha a la derecha
+        ("LEFTPADDING", (0, 0), (-1, -1), 0),  # Sin relleno izquierdo
+        ("RIGHTPADDING", (0, 0), (-1, -1), 0),  # Sin relleno derecho
+        ("VALIGN", (0, 0), (-1, -1), "TOP"),  # Alinear verticalmente en la parte superior
+        ("TOPPADDING", (0, 0), (-1, -1), 0),  # Sin espacio superior
+        ("BOTTOMPADDING", (0, 0), (-1, -1), 0),  # Sin espacio inferior
+    ]))
+
+    elements.append(header_table)  # Agregar la tabla
+    elements.append(Spacer(1, 5))  # Espacio reducido entre "EVALUACIÓN" y "ÁREA"
+
+    # Información del evaluado
+    elements.append(Spacer(1, 5))
+    elements.append(Paragraph(f"<b>{area_text}:</b> {datos['area']}", styles["CustomSubtitle"]))
+    elements.append(Spacer(1, 5))
+    elements.append(Paragraph(f"<b>{nombre_text}:</b> {datos['nombre']}", styles["Normal"]))
+    elements.append(Paragraph(f"<b>{contacto_text}:</b> {datos['email']} | <b>{celular_text}:</b> {datos['celular']}", styles["Normal"]))
+    elements.append(Paragraph(f"<b>{union_text}:</b> {datos['uni']}", styles["Normal"]))
+
+    # Tabla de evaluaciones
+    elements.append(Spacer(1, 20))
+    table_data = [table_header] + [
+        [Paragraph(e["descripcion"], styles["TableCell"]),
+         Paragraph(str(e["calificacion"]), styles["ClassificacionCell"]),  # Centrado y más grande
+         Paragraph(e["observaciones"], styles["TableCell"])] for e in evaluaciones
+    ]
+    table = Table(table_data, colWidths=[200, 100, 200])
+    table.setStyle(TableStyle([
+        ("BACKGROUND", (0, 0), (-1, 0), colors.HexColor("#0A0A45")),
+        ("TEXTCOLOR", (0, 0), (-1, 0), colors.white),
+        ("ALIGN", (0, 0), (-1, -1), "LEFT"),
+        ("FONTNAME", (0, 0), (-1, 0), "Helvetica-Bold"),
+        ("BOTTOMPADDING", (0, 0), (-1, 0), 12),
+        ("BACKGROUND", (0, 1), (-1, -1), colors.whitesmoke),
+        ("GRID", (0, 0), (-1, -1), 1, colors.black),
+    ]))
+    elements.append(table)
+
+    # Total de calificaciones (más grande)
+    elements.append(Spacer(1, 10))
+    total_calificaciones = sum(e["calificacion"] for e in evaluaciones)
+    elements.append(Paragraph(f"<b>{total_text}:</b> {total_calificaciones}", styles["CustomTitle"]))
+
+    # Conclusión y Evaluador
+    elements.append(Spacer(1, 20))
+    elements.append(Paragraph(f"<b>{conclusion_text}:</b> {conclusion}", styles["Normal"]))
+    elements.append(Spacer(1, 10))
+    elements.append(Paragraph(f"{evaluador}", styles["CustomFooter"]))
+    return elements
+
+
+def clave_pdf(datos, evaluaciones, conclusion, evaluador, language='es', header_pdf_path=None):
+    """Hash del contenido del PDF (incluye la fecha de modificación del encabezado)."""
+    header_mtime = os.path.getmtime(header_pdf_path) if header_pdf_path and os.path.exists(header_pdf_path) else None
+    contenido = json.dumps([datos, evaluaciones, conclusion, evaluador, language, header_pdf_path, header_mtime],
+                           sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(contenido.encode("utf-8")).hexdigest()
+
+
+def generar_pdf_bytes(datos, evaluaciones, conclusion, evaluador, language='es', header_pdf_path=None):
+    """
+    Genera el PDF en memoria, o lo devuelve de la caché si ya se generó con el mismo contenido.
+
+    Returns:
+        bytes: Contenido del PDF
+    """
+    global _bytes_cache_pdf
+    if isinstance(evaluaciones, Evaluacion):
+        evaluaciones = evaluaciones.a_lista(language)
+    clave = clave_pdf(datos, evaluaciones, conclusion, evaluador, language, header_pdf_path)
+    with _lock_cache_pdf:
+        if clave in _cache_pdf:
+            _cache_pdf.move_to_end(clave)
+            return _cache_pdf[clave]
+
+    buffer = io.BytesIO()
+    generar_pdf_con_reportlab(datos, evaluaciones, conclusion, evaluador, buffer, language=language, header_pdf_path=header_pdf_path)
+    pdf_bytes = buffer.getvalue()
+
+    with _lock_cache_pdf:
+        if clave not in _cache_pdf:
+            _cache_pdf[clave] = pdf_bytes
+            _bytes_cache_pdf += len(pdf_bytes)
+        # Se descartan los PDFs usados hace más tiempo hasta volver a entrar en el límite
+        while _bytes_cache_pdf > MAX_BYTES_CACHE_PDF and len(_cache_pdf) > 1:
+            _, descartado = _cache_pdf.popitem(last=False)
+            _bytes_cache_pdf -= len(descartado)
+    return pdf_bytes
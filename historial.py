@@ -0,0 +1,62 @@
+# historial.py
+import pandas as pd
+import streamlit as st
+
+from modelo_evaluacion import Evaluacion
+from repositorio_evaluaciones import buscar_historial, version_participante
+
+# MAJ: Evolución de un participante a lo largo de las academias. Todas sus evaluaciones (de todos
+# los años) se traen en una sola consulta por el índice (nombre, year) y las preguntas se alinean
+# entre años por Numero_Pregunta: la pregunta 3 de 2023 y la 3 de 2025 son la misma fila aunque
+# haya cambiado la redacción (se muestra la del año más reciente).
+# El resultado se cachea por participante y se invalida al guardar (version_participante).
+
+TTL_HISTORIAL_SEGUNDOS = 300
+
+
+def alinear_historial(documentos):
+    """
+    Convierte las evaluaciones de un participante en un DataFrame con una fila por (año, área, pregunta) calificada.
+
+    Returns:
+        DataFrame: columnas year, area, numero, pregunta, calificacion
+    """
+    filas = []
+    for doc in documentos:
+        evaluacion = Evaluacion.del_catalogo(doc["year"], doc["area"], doc)
+        filas.extend((doc["year"], doc["area"], p.numero, p.descripcion_es, p.calificacion)
+                     for p in evaluacion if p.calificacion is not None)
+    return pd.DataFrame(filas, columns=["year", "area", "numero", "pregunta", "calificacion"])
+
+
+def tabla_historial(df):
+    """
+    Tabla de un área: una fila por Numero_Pregunta y una columna por año.
+
+    Returns:
+        DataFrame: índice "numero. pregunta" (redacción del último año), columnas = años
+    """
+    etiquetas = df.sort_values("year").groupby("numero")["pregunta"].last()
+    tabla = df.pivot_table(index="numero", columns="year", values="calificacion", aggfunc="first").sort_index()
+    tabla.index = [f"{numero}. {etiquetas[numero]}" for numero in tabla.index]
+    tabla.columns = [str(year) for year in tabla.columns]
+    return tabla
+
+
+@st.cache_data(ttl=TTL_HISTORIAL_SEGUNDOS, max_entries=200, show_spinner=False)
+def _historial_cacheado(nombre, version):
+    # version solo forma parte de la clave de la caché: cambia cada vez que se guarda una evaluación del participante
+    df = alinear_historial(buscar_historial(nombre))
+    if df.empty:
+        return None
+    return {area: tabla_historial(grupo) for area, grupo in df.groupby("area", sort=False)}
+
+
+def obtener_historial(nombre):
+    """
+    Historial de un participante, cacheado hasta el próximo guardado de alguna de sus evaluaciones.
+
+    Returns:
+        dict | None: {área: tabla_historial} (None si no tiene evaluaciones guardadas)
+    """
+    return _historial_cacheado(nombre, version_participante(nombre))
@@ -0,0 +1,223 @@
+# importacion_puntajes.py
+import argparse
+import io
+import re
+from datetime import datetime
+
+from datos_referencia import catalogo_area, evaluadores_por_area, nombres_participantes, preguntas_por_area
+from modelo_evaluacion import CALIFICACIONES_VALIDAS, VERSION_ESQUEMA
+
+# MAJ: Importación de puntajes desde una planilla (CSV o XLSX), para los evaluadores que califican en
+# papel o en Excel durante la semana. La planilla es "ancha": una fila por participante con las
+# columnas NOMBRE, AREA, una columna por pregunta con su Id_Pregunta (q01, q02...), opcionalmente
+# q01_obs, q02_obs... con las observaciones, y CONCLUSION / EVALUADOR.
+# La validación contra el catálogo del año y el completado con 0 de las preguntas vacías (igual que
+# guardar_evaluacion) se hacen por columnas sobre todo el DataFrame de cada área, y todo se escribe con
+# un único bulk_write (repositorio_evaluaciones.guardar_evaluaciones).
+# Las filas sin ningún puntaje, observación ni conclusión se ignoran (la plantilla trae a todos los
+# participantes) y las evaluaciones que ya están guardadas solo se reemplazan con --sobrescribir.
+#
+#     python importacion_puntajes.py --year 2024 --plantilla plantilla.xlsx     # planilla para completar
+#     python importacion_puntajes.py --year 2024 puntajes.xlsx --simular       # solo validar
+
+SUFIJO_OBSERVACIONES = "_obs"
+PATRON_COLUMNA_PREGUNTA = re.compile(r"^q\d+(_obs)?$")
+COLUMNAS_CLAVE = ["NOMBRE", "AREA"]
+
+
+def leer_planilla(archivo, nombre_archivo=None):
+    """
+    Lee una planilla CSV o XLSX con todas las celdas como texto.
+
+    Args:
+        archivo: Ruta o archivo abierto (por ejemplo el de st.file_uploader)
+        nombre_archivo: Nombre para decidir el formato (por defecto el del archivo)
+    """
+    import pandas as pd
+
+    nombre = (nombre_archivo or getattr(archivo, "name", None) or str(archivo)).lower()
+    if nombre.endswith((".xlsx", ".xlsm")):
+        # Requiere openpyxl
+        return pd.read_excel(archivo, dtype=str)
+    return pd.read_csv(archivo, dtype=str)
+
+
+def plantilla(year, areas=None):
+    """
+    DataFrame vacío para completar: una fila por participante del año (y áreas) y una columna por pregunta.
+    """
+    import pandas as pd
+
+    areas = areas or list(preguntas_por_area(year))
+    filas = []
+    qids = []
+    for area in areas:
+        ids = catalogo_area(year, area)[0]
+        qids += [qid for qid in ids if qid not in qids]
+        filas += [{"NOMBRE": nombre, "AREA": area} for nombre in nombres_participantes(year, area)]
+    columnas = COLUMNAS_CLAVE + qids + [qid + SUFIJO_OBSERVACIONES for qid in qids] + ["CONCLUSION"]
+    return pd.DataFrame(filas, columns=columnas, dtype=object)
+
+
+def plantilla_bytes(year, areas=None, formato="xlsx"):
+    """Plantilla lista para descargar ('xlsx' o 'csv')."""
+    df = plantilla(year, areas)
+    buffer = io.BytesIO()
+    if formato == "xlsx":
+        df.to_excel(buffer, index=False)
+    else:
+        df.to_csv(buffer, index=False)
+    return buffer.getvalue()
+
+
+def _texto(df):
+    # Celdas como texto sin espacios; vacías = ""
+    return df.fillna("").astype(str).apply(lambda columna: columna.str.strip())
+
+
+def validar_planilla(df, year):
+    """
+    Valida la planilla contra el catálogo del año y arma los documentos a guardar.
+
+    Returns:
+        tuple: (documentos, errores, avisos). Si hay errores, los documentos son solo los de las filas válidas.
+    """
+    faltantes = [columna for columna in COLUMNAS_CLAVE if columna not in df.columns]
+    if faltantes:
+        return [], [f"Faltan las columnas {', '.join(faltantes)}"], []
+
+    df = df.copy()
+    df.index = df.index + 2  # número de fila en la planilla (la 1 es el encabezado)
+    df[COLUMNAS_CLAVE] = _texto(df[COLUMNAS_CLAVE])
+    df = df[df["NOMBRE"] != ""]
+
+    errores, avisos = [], []
+    for fila in df.index[df.duplicated(COLUMNAS_CLAVE, keep="first")]:
+        errores.append(f"Fila {fila}: {df.at[fila, 'NOMBRE']} ({df.at[fila, 'AREA']}) está repetido")
+    df = df[~df.duplicated(COLUMNAS_CLAVE, keep="first")]
+
+    catalogo = preguntas_por_area(year)
+    evaluadores = evaluadores_por_area(year)
+    ahora = datetime.now()
+    documentos = []
+    for area, grupo in df.groupby("AREA", sort=False):
+        if area not in catalogo:
+            errores += [f"Fila {fila}: el área '{area}' no existe en {year}" for fila in grupo.index]
+            continue
+        ids = catalogo_area(year, area)[0]
+
+        # Columnas de preguntas de otras áreas con algún valor en filas de esta área
+        for columna in grupo.columns:
+            if (PATRON_COLUMNA_PREGUNTA.match(columna) and columna.removesuffix(SUFIJO_OBSERVACIONES) not in ids
+                    and (_texto(grupo[[columna]])[columna] != "").any()):
+                errores.append(f"La columna {columna} no es una pregunta de {area} en {year}")
+
+        # Puntajes: vacío = 0 (como en guardar_evaluacion); Excel puede traer "4.0"
+        puntajes = _texto(grupo.reindex(columns=ids)).replace(r"^(\d)\.0$", r"\1", regex=True)
+        invalidos = ~puntajes.isin(CALIFICACIONES_VALIDAS + [""])
+        filas_invalidas = set()
+        for fila, qid in invalidos.stack().loc[lambda serie: serie].index:
+            errores.append(f"Fila {fila}: {qid} = '{puntajes.at[fila, qid]}' no es un puntaje válido (0 a 5)")
+            filas_invalidas.add(fila)
+        puntajes = puntajes.replace("", "0").where(~invalidos, "0").astype(int)
+        observaciones = _texto(grupo.reindex(columns=[qid + SUFIJO_OBSERVACIONES for qid in ids]))
+        conclusiones = _texto(grupo.reindex(columns=["CONCLUSION"]))["CONCLUSION"]
+        evaluadores_filas = _texto(grupo.reindex(columns=["EVALUADOR"]))["EVALUADOR"]
+        # Filas de la plantilla que nadie completó
+        vacias = ((_texto(grupo.reindex(columns=ids)) == "").all(axis=1) & (observaciones == "").all(axis=1)
+                  & (conclusiones == ""))
+
+        # El nombre se guarda tal como está en el CSV de participantes (algunos tienen espacios al final)
+        inscriptos = {nombre.strip(): nombre for nombre in nombres_participantes(year, area)}
+        for fila, nombre in grupo["NOMBRE"].items():
+            if fila in filas_invalidas or vacias[fila]:
+                continue
+            if nombre in inscriptos:
+                nombre = inscriptos[nombre]
+            else:
+                avisos.append(f"Fila {fila}: {nombre} no figura entre los participantes de {area} {year}")
+            documentos.append({
+                "nombre": nombre,
+                "area": area,
+                "year": year,
+                "fecha": ahora,
+                "evaluador": evaluadores_filas[fila] or evaluadores.get(area, "Evaluador no asignado"),
+                "respuestas": {qid: [int(calificacion), observacion] for qid, calificacion, observacion
+                               in zip(ids, puntajes.loc[fila].tolist(), observaciones.loc[fila].tolist())},
+                "esquema": VERSION_ESQUEMA,
+                "conclusion": conclusiones[fila],
+                "borrador": False,
+            })
+    return documentos, errores, avisos
+
+
+def importar_planilla(df, year, collection=None, ignorar_errores=False, simular=False, sobrescribir=False):
+    """
+    Valida la planilla y guarda todas las evaluaciones con un único bulk_write.
+    Si hay errores no se guarda nada, salvo con ignorar_errores=True (se guardan las filas válidas).
+    Una evaluación que ya tiene respuestas guardadas es un error, salvo con sobrescribir=True
+    (al simular no se consulta lo guardado).
+
+    Returns:
+        tuple: (cantidad guardada, errores, avisos)
+    """
+    documentos, errores, avisos = validar_planilla(df, year)
+    if not simular and documentos and not sobrescribir:
+        from repositorio_evaluaciones import buscar_evaluaciones, tiene_respuestas
+        areas = list(dict.fromkeys(doc["area"] for doc in documentos))
+        guardadas = buscar_evaluaciones(year, areas, collection, incluir_borradores=True)
+        existentes = [doc for doc in documentos if tiene_respuestas(guardadas.get((doc["nombre"], doc["area"]), {}))]
+        if existentes:
+            errores += [f"{doc['nombre']} ({doc['area']}) ya tiene una evaluación guardada" for doc in existentes]
+            errores.append(f"{len(existentes)} evaluaciones ya están guardadas: para reemplazarlas hay que sobrescribir")
+            documentos = [doc for doc in documentos if doc not in existentes]
+    if simular or (errores and not ignorar_errores):
+        return 0, errores, avisos
+    from repositorio_evaluaciones import guardar_evaluaciones
+    return guardar_evaluaciones(documentos, collection), errores, avisos
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Importa puntajes de una planilla (CSV o XLSX) a las evaluaciones.")
+    parser.add_argument("archivo", nargs="?", help="Planilla con NOMBRE, AREA, q01, q01_obs... CONCLUSION")
+    parser.add_argument("--year", type=int, required=True, help="Año de la academia (ej. 2024)")
+    parser.add_argument("--plantilla", default=None, help="Escribir una planilla vacía en esta ruta (.xlsx o .csv) y salir")
+    parser.add_argument("--area", action="append", default=None, help="Áreas de la plantilla (se puede repetir)")
+    parser.add_argument("--simular", action="store_true", help="Solo validar, no guardar")
+    parser.add_argument("--ignorar-errores", action="store_true", help="Guardar las filas válidas aunque otras tengan errores")
+    parser.add_argument("--sobrescribir", action="store_true", help="Reemplazar las evaluaciones que ya están guardadas")
+    parser.add_argument("--mongo-uri", default=None, help="URI de MongoDB (por defecto st.secrets['mongo_uri'])")
+    parser.add_argument("--db", default=None, help="Base de datos (por defecto st.secrets['db_name'])")
+    parser.add_argument("--coleccion", default=None, help="Colección (por defecto st.secrets['collection_name'])")
+    args = parser.parse_args()
+
+    if args.plantilla:
+        formato = "xlsx" if args.plantilla.lower().endswith(".xlsx") else "csv"
+        with open(args.plantilla, "wb") as f:
+            f.write(plantilla_bytes(args.year, args.area, formato))
+        print(f"✅ Plantilla en {args.plantilla}")
+        return
+    if not args.archivo:
+        parser.error("falta la planilla a importar")
+
+    collection = None
+    if not args.simular:
+        from repositorio_evaluaciones import obtener_coleccion
+        collection = obtener_coleccion(args.mongo_uri, args.db, args.coleccion)
+
+    guardadas, errores, avisos = importar_planilla(leer_planilla(args.archivo), args.year, collection,
+                                                   args.ignorar_errores, args.simular, args.sobrescribir)
+    for aviso in avisos:
+        print(f"ℹ️ {aviso}")
+    for error in errores:
+        print(f"⚠️ {error}")
+    if errores and not args.ignorar_errores:
+        print("⚠️ No se importó nada: corregí la planilla o usá --ignorar-errores")
+    elif args.simular:
+        print("✅ Planilla válida (simulación, no se guardó nada)")
+    else:
+        print(f"✅ {guardadas} evaluaciones importadas")
+
+
+if __name__ == "__main__":
+    main()
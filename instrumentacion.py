@@ -0,0 +1,161 @@
+# instrumentacion.py
+import contextlib
+import functools
+import json
+import os
+import threading
+import time
+import uuid
+from collections import deque
+from datetime import datetime
+
+import streamlit as st
+
+# MAJ: Métricas de reruns por sesión: cuántas veces se ejecutó el script (o un fragmento),
+# cuánto tardó cada ejecución y cuánto se fue en cada etapa (CSV, MongoDB, traducción, PDF...).
+# Se activa con SAR_INSTRUMENTACION=1. Cada ejecución se agrega como una línea JSON al log
+# (SAR_LOG_INSTRUMENTACION). Desactivada, medir() devuelve un contexto vacío compartido, así el
+# costo es prácticamente nulo.
+
+ACTIVADA = os.environ.get("SAR_INSTRUMENTACION") == "1"
+RUTA_LOG = os.environ.get("SAR_LOG_INSTRUMENTACION",
+                          os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "instrumentacion.jsonl"))
+MAX_HISTORIAL = 20
+
+_SIN_MEDICION = contextlib.nullcontext()
+_ejecucion_actual = threading.local()  # etapas del rerun en curso (cada sesión corre en su propio hilo)
+_lock_log = threading.Lock()
+
+
+def _estado():
+    if "_instrumentacion" not in st.session_state:
+        st.session_state["_instrumentacion"] = {"sesion": uuid.uuid4().hex[:8], "reruns": 0,
+                                                "historial": deque(maxlen=MAX_HISTORIAL)}
+    return st.session_state["_instrumentacion"]
+
+
+def inicio_rerun():
+    """Marca el comienzo de una ejecución; devuelve el instante (o None si está desactivada)."""
+    if not ACTIVADA:
+        return None
+    _ejecucion_actual.etapas = []
+    return time.perf_counter()
+
+
+@contextlib.contextmanager
+def _medir(etapa):
+    inicio = time.perf_counter()
+    try:
+        yield
+    finally:
+        etapas = getattr(_ejecucion_actual, "etapas", None)
+        if etapas is not None:
+            etapas.append((etapa, (time.perf_counter() - inicio) * 1000))
+
+
+def medir(etapa):
+    """
+    Context manager que mide una etapa del rerun en curso.
+
+        with medir("cargar_evaluacion"):
+            evaluacion_guardada = cargar_evaluacion(...)
+    """
+    return _medir(etapa) if ACTIVADA else _SIN_MEDICION
+
+
+def fin_rerun(inicio, seccion="app"):
+    """Registra una ejecución de la app completa o de un fragmento (seccion) y la agrega al log."""
+    if inicio is None:
+        return
+    total_ms = (time.perf_counter() - inicio) * 1000
+    etapas = {}
+    for etapa, ms in getattr(_ejecucion_actual, "etapas", None) or []:
+        etapas[etapa] = etapas.get(etapa, 0) + ms
+    _ejecucion_actual.etapas = None
+
+    estado = _estado()
+    estado["reruns"] += 1
+    estado["historial"].append((seccion, total_ms, etapas))
+    _escribir_log({"fecha": datetime.now().isoformat(timespec="milliseconds"), "sesion": estado["sesion"],
+                   "rerun": estado["reruns"], "seccion": seccion, "total_ms": round(total_ms, 2),
+                   "etapas_ms": {etapa: round(ms, 2) for etapa, ms in etapas.items()}})
+
+
+def descartar_rerun():
+    """
+    Olvida el rerun en curso sin registrarlo. Se llama al salir del script: st.rerun() y st.stop() cortan
+    la ejecución con una excepción antes de fin_rerun, y sin esto el próximo fragmento de la sesión
+    (mismo hilo) se mediría como etapa de ese rerun viejo en lugar de registrarse.
+    """
+    _ejecucion_actual.etapas = None
+
+
+def _escribir_log(registro):
+    try:
+        with _lock_log:
+            os.makedirs(os.path.dirname(RUTA_LOG) or ".", exist_ok=True)
+            with open(RUTA_LOG, "a", encoding="utf-8") as log:
+                log.write(json.dumps(registro, ensure_ascii=False) + "\n")
+    except OSError as e:
+        print(f"⚠️ No se pudo escribir el log de instrumentación: {e}")
+
+
+def medir_rerun(seccion):
+    """Decorador para funciones de fragmentos (st.fragment): registra cada rerun parcial."""
+    def decorador(funcion):
+        @functools.wraps(funcion)
+        def envoltura(*args, **kwargs):
+            # Un fragmento dentro de un rerun completo ya queda medido como etapa de ese rerun
+            if getattr(_ejecucion_actual, "etapas", None) is not None:
+                with medir(seccion):
+                    return funcion(*args, **kwargs)
+            inicio = inicio_rerun()
+            try:
+                return funcion(*args, **kwargs)
+            finally:
+                fin_rerun(inicio, seccion)
+        return envoltura
+    return decorador
+
+
+@contextlib.contextmanager
+def _medir_trabajo(seccion):
+    inicio = inicio_rerun()
+    try:
+        yield
+    finally:
+        total_ms = (time.perf_counter() - inicio) * 1000
+        etapas = {}
+        for etapa, ms in _ejecucion_actual.etapas or []:
+            etapas[etapa] = etapas.get(etapa, 0) + ms
+        _ejecucion_actual.etapas = None
+        _escribir_log({"fecha": datetime.now().isoformat(timespec="milliseconds"), "sesion": "cola",
+                       "seccion": seccion, "total_ms": round(total_ms, 2),
+                       "etapas_ms": {etapa: round(ms, 2) for etapa, ms in etapas.items()}})
+
+
+def medir_trabajo(seccion):
+    """
+    Como un rerun, pero para un trabajo de la cola (cola_trabajos): corre en un hilo trabajador,
+    sin sesión de Streamlit, así que solo se agrega al log (sesion = "cola").
+    """
+    return _medir_trabajo(seccion) if ACTIVADA else _SIN_MEDICION
+
+
+def mostrar_panel():
+    """Panel de depuración en el sidebar: reruns, tiempo total y tiempo por etapa."""
+    if not ACTIVADA:
+        return
+    estado = _estado()
+    with st.sidebar.expander("⏱️ Rendimiento"):
+        st.write(f"**Reruns en esta sesión:** {estado['reruns']}")
+        if estado["historial"]:
+            ultimos = list(estado["historial"])
+            seccion, total_ms, etapas = ultimos[-1]
+            st.write(f"**Última ejecución:** {seccion} — {total_ms:.0f} ms")
+            if etapas:
+                st.table([{"etapa": etapa, "ms": round(ms, 1)} for etapa, ms in sorted(etapas.items(), key=lambda e: -e[1])])
+            promedio = sum(ms for _, ms, _ in ultimos) / len(ultimos)
+            st.write(f"**Promedio (últimas {len(ultimos)}):** {promedio:.0f} ms")
+            st.table([{"sección": s, "ms": round(ms)} for s, ms, _ in reversed(ultimos)])
+        st.caption(f"Log: {RUTA_LOG}")
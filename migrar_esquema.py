@@ -0,0 +1,104 @@
+# migrar_esquema.py
+import argparse
+
+from pymongo import UpdateOne
+
+from datos_referencia import ids_preguntas, preguntas_por_area
+from modelo_evaluacion import VERSION_ESQUEMA, Evaluacion
+
+# MAJ: Migra las evaluaciones guardadas con la lista 'evaluaciones' (esquema 1: el texto completo de
+# cada pregunta en cada ítem) al esquema 2: {"respuestas": {qid: [calificacion, observaciones]}}.
+# Los documentos se leen en una sola consulta y se reescriben con bulk_write en lotes.
+# Los ítems cuya pregunta ya no está en el catálogo del año se dejan en 'evaluaciones'.
+#
+#     python migrar_esquema.py --simular          # cuenta lo que cambiaría, sin escribir
+#     python migrar_esquema.py --year 2024
+
+TAMANO_LOTE = 500
+PROYECCION_MIGRACION = {"_id": 1, "year": 1, "area": 1, "evaluaciones": 1, "respuestas": 1}
+
+
+def operacion_migracion(doc, catalogos):
+    """
+    Arma la actualización de un documento del esquema 1 (o None si su área no está en el catálogo).
+
+    Args:
+        doc: Documento con _id, year, area, evaluaciones (y respuestas si un borrador ya escribió alguna)
+        catalogos: Diccionario {year: (preguntas_por_area, ids_preguntas)} que se va completando
+    """
+    year = doc.get("year")
+    if year not in catalogos:
+        catalogos[year] = (preguntas_por_area(year), ids_preguntas(year))
+    descripciones_areas, ids_areas = catalogos[year]
+    if doc.get("area") not in descripciones_areas:
+        return None
+
+    # Las respuestas que ya existan (por ejemplo de un borrador) pisan a los ítems viejos
+    evaluacion = Evaluacion.desde_documento(doc, descripciones_areas[doc["area"]], ids=ids_areas[doc["area"]])
+    cambios = {"$set": {"respuestas": evaluacion.a_respuestas(), "esquema": VERSION_ESQUEMA}}
+    if evaluacion.extras:
+        cambios["$set"]["evaluaciones"] = evaluacion.extras
+    else:
+        cambios["$unset"] = {"evaluaciones": ""}
+    return UpdateOne({"_id": doc["_id"]}, cambios)
+
+
+def migrar_coleccion(collection, year=None, tamano_lote=TAMANO_LOTE, simular=False):
+    """
+    Migra todos los documentos del esquema 1 de la colección (o de un año).
+
+    Returns:
+        dict: Cantidades 'revisados', 'migrados' y 'sin_catalogo'
+    """
+    filtro = {"evaluaciones": {"$exists": True}}
+    if year is not None:
+        filtro["year"] = year
+
+    resultado = {"revisados": 0, "migrados": 0, "sin_catalogo": 0}
+    catalogos = {}
+    lote = []
+    for doc in collection.find(filtro, PROYECCION_MIGRACION):
+        resultado["revisados"] += 1
+        operacion = operacion_migracion(doc, catalogos)
+        if operacion is None:
+            resultado["sin_catalogo"] += 1
+            continue
+        lote.append(operacion)
+        if len(lote) >= tamano_lote:
+            resultado["migrados"] += _escribir(collection, lote, simular)
+            lote = []
+    if lote:
+        resultado["migrados"] += _escribir(collection, lote, simular)
+    return resultado
+
+
+def _escribir(collection, lote, simular):
+    if simular:
+        return len(lote)
+    collection.bulk_write(lote, ordered=False)
+    print(f"  ... {len(lote)} documentos migrados")
+    return len(lote)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Migra las evaluaciones guardadas al esquema con Id_Pregunta.")
+    parser.add_argument("--year", type=int, default=None, help="Migrar solo un año (por defecto todos)")
+    parser.add_argument("--lote", type=int, default=TAMANO_LOTE, help="Documentos por bulk_write")
+    parser.add_argument("--simular", action="store_true", help="No escribir, solo contar")
+    parser.add_argument("--mongo-uri", default=None, help="URI de MongoDB (por defecto st.secrets['mongo_uri'])")
+    parser.add_argument("--db", default=None, help="Base de datos (por defecto st.secrets['db_name'])")
+    parser.add_argument("--coleccion", default=None, help="Colección (por defecto st.secrets['collection_name'])")
+    args = parser.parse_args()
+
+    from repositorio_evaluaciones import obtener_coleccion
+    collection = obtener_coleccion(args.mongo_uri, args.db, args.coleccion)
+
+    resultado = migrar_coleccion(collection, args.year, args.lote, args.simular)
+    accion = "a migrar" if args.simular else "migrados"
+    print(f"✅ {resultado['migrados']} documentos {accion} de {resultado['revisados']} revisados")
+    if resultado["sin_catalogo"]:
+        print(f"⚠️ {resultado['sin_catalogo']} documentos de áreas que no están en preguntas_areas.csv quedaron sin migrar")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,172 @@
+# modelo_evaluacion.py
+import re
+from dataclasses import dataclass
+
+from datos_referencia import catalogo_area
+
+# MAJ: Modelo compacto de una evaluación, compartido por las dos pestañas, el PDF y MongoDB.
+# Las preguntas se indexan por su Id_Pregunta estable (q01, q02... dentro del año y área), con
+# índices auxiliares por número y por descripción para los documentos viejos que solo guardaban
+# el texto. Así buscar una pregunta es un acceso a diccionario y no una recorrida de la lista.
+#
+# En MongoDB las respuestas se guardan como {"respuestas": {qid: [calificacion, observaciones]}}
+# (esquema 2). Los documentos con la lista 'evaluaciones' (esquema 1) se siguen leyendo hasta
+# migrarlos con migrar_esquema.py.
+
+CALIFICACIONES_VALIDAS = ["0", "1", "2", "3", "4", "5"]
+VERSION_ESQUEMA = 2
+
+
+def clave_borrador(evaluador):
+    """
+    Clave del borrador de un evaluador dentro del campo 'borradores' del documento
+    (sin '.' ni '$', que MongoDB no admite en los nombres de campo).
+    """
+    return re.sub(r"[.$]", "_", evaluador or "") or "sin_evaluador"
+
+
+@dataclass(slots=True)
+class Pregunta:
+    qid: str
+    numero: int
+    descripcion_es: str
+    descripcion_en: str
+    calificacion: int | None = None  # None = todavía sin calificar
+    observaciones: str = ""
+
+    def descripcion(self, language="es"):
+        return self.descripcion_en if language == "en" else self.descripcion_es
+
+
+def _calificacion(valor):
+    return int(valor) if str(valor) in CALIFICACIONES_VALIDAS else None
+
+
+class Evaluacion:
+    """Preguntas de un área con su calificación y observaciones, indexadas por Id_Pregunta."""
+
+    __slots__ = ("preguntas", "extras", "respuestas_extra", "_por_numero", "_por_descripcion")
+
+    def __init__(self, preguntas):
+        self.preguntas = {p.qid: p for p in preguntas}
+        self.extras = []  # ítems viejos (esquema 1) que ya no están en el catálogo (se conservan al final)
+        self.respuestas_extra = {}  # respuestas de ids que ya no están en el catálogo (se conservan al guardar)
+        self._por_numero = {p.numero: p.qid for p in preguntas}
+        self._por_descripcion = {}
+        for p in preguntas:
+            self._por_descripcion.setdefault(p.descripcion_es, p.qid)
+            self._por_descripcion.setdefault(p.descripcion_en, p.qid)
+
+    @classmethod
+    def desde_catalogo(cls, descripciones_es, descripciones_en=None, ids=None):
+        """
+        Crea una evaluación vacía con las preguntas de un área.
+
+        Args:
+            descripciones_es: Preguntas en español, en el orden del CSV
+            descripciones_en: Preguntas en inglés en el mismo orden (si falta alguna, queda la de español)
+            ids: Id_Pregunta en el mismo orden (datos_referencia.ids_preguntas); por defecto q01, q02...
+        """
+        descripciones_en = list(descripciones_en or [])
+        ids = list(ids or [])
+        preguntas = []
+        for numero, descripcion_es in enumerate(descripciones_es, start=1):
+            qid = ids[numero - 1] if numero <= len(ids) else f"q{numero:02d}"
+            descripcion_en = descripciones_en[numero - 1] if numero <= len(descripciones_en) else descripcion_es
+            preguntas.append(Pregunta(qid, numero, descripcion_es, descripcion_en))
+        return cls(preguntas)
+
+    @classmethod
+    def del_catalogo(cls, year, area, documento=None):
+        """
+        Crea la evaluación de un año y área con las preguntas del catálogo (español, inglés e Id_Pregunta
+        de preguntas_areas.csv) y la completa con un documento de MongoDB (o None).
+        """
+        ids, descripciones_es, descripciones_en = catalogo_area(year, area)
+        return cls.desde_documento(documento, descripciones_es, descripciones_en, ids)
+
+    @classmethod
+    def desde_documento(cls, documento, descripciones_es, descripciones_en=None, ids=None):
+        """Crea la evaluación de un área y la completa con un documento de MongoDB (o None)."""
+        evaluacion = cls.desde_catalogo(descripciones_es, descripciones_en, ids)
+        if documento:
+            evaluacion.cargar_items(documento.get("evaluaciones", []))
+            evaluacion.cargar_respuestas(documento.get("respuestas", {}))
+        return evaluacion
+
+    def __iter__(self):
+        return iter(self.preguntas.values())
+
+    def __len__(self):
+        return len(self.preguntas)
+
+    def __getitem__(self, qid):
+        return self.preguntas[qid]
+
+    def buscar(self, item):
+        """Devuelve la Pregunta de un ítem del esquema 1 (por número, o por descripción)."""
+        qid = self._por_numero.get(item.get("numero"))
+        if qid is None:
+            qid = self._por_descripcion.get(item.get("descripcion_es") or item.get("descripcion", ""))
+        return self.preguntas.get(qid)
+
+    def cargar_items(self, items):
+        """Completa calificaciones y observaciones con ítems {'numero'?, 'descripcion', 'calificacion', 'observaciones'}."""
+        for item in items:
+            pregunta = self.buscar(item)
+            if pregunta is None:
+                self.extras.append(item)
+                continue
+            calificacion = _calificacion(item.get("calificacion", ""))
+            if calificacion is not None:
+                pregunta.calificacion = calificacion
+            pregunta.observaciones = item.get("observaciones", "") or ""
+
+    def cargar_respuestas(self, respuestas):
+        """Completa calificaciones y observaciones con respuestas {qid: [calificacion, observaciones]}."""
+        for qid, (calificacion, observaciones) in respuestas.items():
+            pregunta = self.preguntas.get(qid)
+            if pregunta is None:
+                self.respuestas_extra[qid] = [calificacion, observaciones]
+                continue
+            pregunta.calificacion = _calificacion(calificacion)
+            pregunta.observaciones = observaciones or ""
+
+    def a_lista(self, language="es", completa=False):
+        """
+        Ítems para el PDF, en el orden del catálogo.
+
+        Args:
+            language: Idioma de las descripciones ('es' o 'en')
+            completa: True para incluir las preguntas sin calificar con 0;
+                      False para incluir solo las calificadas (como se muestran en el PDF)
+
+        Returns:
+            list: [{'numero', 'descripcion', 'calificacion', 'observaciones'}]
+        """
+        items = [
+            {"numero": p.numero, "descripcion": p.descripcion(language),
+             "calificacion": p.calificacion or 0, "observaciones": p.observaciones}
+            for p in self.preguntas.values() if completa or p.calificacion is not None
+        ]
+        return items + [dict(item) for item in self.extras]
+
+    def a_respuestas(self, completa=False):
+        """
+        Respuestas en el formato de MongoDB.
+
+        Args:
+            completa: True para incluir las preguntas sin calificar con 0 (como se guardan)
+
+        Returns:
+            dict: {qid: [calificacion, observaciones]}
+        """
+        respuestas = {
+            p.qid: [p.calificacion or 0, p.observaciones]
+            for p in self.preguntas.values() if completa or p.calificacion is not None
+        }
+        respuestas.update(self.respuestas_extra)
+        return respuestas
+
+    def total(self):
+        return sum(p.calificacion or 0 for p in self.preguntas.values())
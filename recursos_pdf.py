@@ -0,0 +1,88 @@
+# recursos_pdf.py
+import io
+import os
+import threading
+from functools import lru_cache
+
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+
+# MAJ: Recursos compartidos por todos los PDFs, preparados una sola vez por proceso:
+# - La hoja de estilos (getSampleStyleSheet + estilos personalizados)
+# - Los encabezados ya reducidos al tamaño con el que se insertan en el PDF. Los PNG originales
+#   miden hasta 2816 px de ancho (header_2025.png pesa casi 2 MB) y se decodificaban en cada PDF.
+
+# Tamaño del encabezado dentro del PDF (en puntos): ancho útil de A4 y proporción 5:1
+ANCHO_ENCABEZADO = A4[0] - 80
+ALTO_ENCABEZADO = ANCHO_ENCABEZADO * 0.2
+# Resolución a la que se guarda el encabezado reducido (suficiente para imprimir)
+DPI_ENCABEZADO = 150
+
+_encabezados = {}  # (ruta, mtime) -> bytes PNG ya escalados
+_lock_encabezados = threading.Lock()
+
+
+def construir_estilos():
+    """Crea la hoja de estilos del PDF (usar obtener_estilos, que la reutiliza)."""
+    styles = getSampleStyleSheet()
+
+    # Estilos personalizados
+    styles.add(ParagraphStyle(name="CustomTitle", fontSize=14, alignment=0, textColor=colors.HexColor("#0A0A45"), fontName="Helvetica-Bold"))
+    styles.add(ParagraphStyle(name="CustomSubtitle", fontSize=11, spaceAfter=10, textColor=colors.goldenrod, fontName="Helvetica-Bold"))
+    styles.add(ParagraphStyle(name="CustomFooter", fontSize=10, alignment=2, textColor=colors.grey))
+    styles.add(ParagraphStyle(name="TableCell", fontSize=8, alignment=0, leading=12))  # Tamaño de fuente para descripción y observaciones
+    styles.add(ParagraphStyle(name="ClassificacionCell", fontSize=12, alignment=1, leading=12))  # Tamaño de fuente para clasificación (centrado)
+    styles.add(ParagraphStyle(name="DateStyle", fontSize=11, alignment=2))
+    return styles
+
+
+@lru_cache(maxsize=1)
+def obtener_estilos():
+    """Hoja de estilos compartida (los estilos no se modifican al generar un PDF)."""
+    return construir_estilos()
+
+
+def escalar_encabezado(ruta):
+    """
+    Reduce el encabezado al tamaño exacto con el que se inserta en el PDF (a DPI_ENCABEZADO)
+    y lo aplana sobre fondo blanco, igual que se ve en la página.
+
+    Returns:
+        bytes: PNG escalado
+    """
+    from PIL import Image as PILImage
+
+    ancho_px = round(ANCHO_ENCABEZADO / 72 * DPI_ENCABEZADO)
+    alto_px = round(ALTO_ENCABEZADO / 72 * DPI_ENCABEZADO)
+    with PILImage.open(ruta) as original:
+        imagen = original.convert("RGBA").resize((ancho_px, alto_px), PILImage.LANCZOS)
+    fondo = PILImage.new("RGB", imagen.size, "white")
+    fondo.paste(imagen, mask=imagen.getchannel("A"))
+    salida = io.BytesIO()
+    fondo.save(salida, format="PNG", optimize=True)
+    return salida.getvalue()
+
+
+def obtener_encabezado(ruta):
+    """
+    Devuelve el encabezado escalado como archivo en memoria (listo para reportlab.platypus.Image),
+    o None si no se puede leer.
+    """
+    try:
+        clave = (os.path.abspath(ruta), os.path.getmtime(ruta))
+        with _lock_encabezados:
+            png = _encabezados.get(clave)
+        if png is None:
+            png = escalar_encabezado(ruta)
+            with _lock_encabezados:
+                _encabezados[clave] = png
+        return io.BytesIO(png)
+    except (IOError, OSError):
+        return None
+
+
+def precargar_encabezados(rutas):
+    """Escala de antemano los encabezados (por ejemplo, todos los de config.ENCABEZADOS_PDF)."""
+    for ruta in rutas:
+        obtener_encabezado(ruta)
@@ -0,0 +1,176 @@
+# reporte_consolidado.py
+import argparse
+import io
+
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import A4
+from reportlab.platypus import PageBreak, Paragraph, SimpleDocTemplate, Spacer, Table, TableStyle
+
+from config import cargar_evaluadores_desde_csv
+from datos_referencia import datos_participante
+from generador_pdf import add_page_number, construir_elementos
+from modelo_evaluacion import Evaluacion
+from recursos_pdf import obtener_estilos
+from repositorio_evaluaciones import iterar_evaluaciones
+
+# MAJ: Un único PDF por área con la evaluación de todos sus participantes, para los coordinadores.
+# Primero va una tabla con el total de cada participante y después una sección por participante
+# (los mismos flowables que el PDF individual, ver generador_pdf.construir_elementos).
+# El documento se arma de forma incremental: los participantes se leen de un cursor de MongoDB y
+# doc.build recibe una lista (FlowablesPorSeccion) que se rellena con la sección siguiente recién
+# cuando se vacía, así nunca están en memoria todos los documentos ni todos los flowables (lo único que
+# crece con el área son las páginas ya dibujadas, que ReportLab guarda hasta escribir el archivo).
+# Los totales salen de una primera pasada por el cursor que solo se queda con (nombre, total).
+
+TAMANO_LOTE_CURSOR = 50
+PROYECCION_REPORTE = {"_id": 0, "nombre": 1, "respuestas": 1, "evaluaciones": 1, "conclusion": 1, "evaluador": 1}
+
+
+def _cursor(collection, year, area):
+    # Orden por nombre: usa el índice (year, area, nombre); collection=None lee del almacén configurado
+    return iterar_evaluaciones(year, area, PROYECCION_REPORTE, TAMANO_LOTE_CURSOR, collection)
+
+
+def _datos(year, area, nombre):
+    participante = datos_participante(year, area, nombre) or {}
+    return {
+        "fecha": participante.get("FECHA", ""),
+        "area": area,
+        "nombre": nombre,
+        "uni": participante.get("UNION/FEDERACION", ""),
+        "email": participante.get("EMAIL", ""),
+        "celular": participante.get("CONTACTO", ""),
+    }
+
+
+def tabla_resumen(year, area, totales, language="es"):
+    """
+    Flowables de la primera página: título y tabla con el total de calificaciones por participante.
+
+    Args:
+        totales: Lista de (nombre, unión, total) en el orden del reporte
+    """
+    styles = obtener_estilos()
+    if language == "en":
+        titulo, encabezados = f"CONSOLIDATED REPORT {year}", ["Participant", "Union/Federation", "Total"]
+    else:
+        titulo, encabezados = f"REPORTE CONSOLIDADO {year}", ["Participante", "Unión/Federación", "Total"]
+
+    tabla = Table([encabezados] + [[Paragraph(nombre, styles["TableCell"]), Paragraph(union, styles["TableCell"]), total]
+                                   for nombre, union, total in totales],
+                  colWidths=[220, 200, 80], repeatRows=1)
+    tabla.setStyle(TableStyle([
+        ("BACKGROUND", (0, 0), (-1, 0), colors.HexColor("#0A0A45")),
+        ("TEXTCOLOR", (0, 0), (-1, 0), colors.white),
+        ("FONTNAME", (0, 0), (-1, 0), "Helvetica-Bold"),
+        ("ALIGN", (2, 0), (2, -1), "CENTER"),
+        ("BACKGROUND", (0, 1), (-1, -1), colors.whitesmoke),
+        ("GRID", (0, 0), (-1, -1), 1, colors.black),
+    ]))
+    return [Paragraph(f"<b>{titulo}</b>", styles["CustomTitle"]), Spacer(1, 5),
+            Paragraph(f"<b>{area}</b>", styles["CustomSubtitle"]), Spacer(1, 10), tabla]
+
+
+class FlowablesPorSeccion(list):
+    """
+    Lista de flowables para doc.build que se rellena a medida que se consume.
+    build saca los flowables del principio de la lista y pregunta len() antes de cada uno:
+    cuando la lista queda vacía se agrega la próxima sección del iterable.
+    """
+
+    def __init__(self, secciones):
+        super().__init__()
+        self._secciones = iter(secciones)
+
+    def __len__(self):
+        while not super().__len__() and self._secciones is not None:
+            seccion = next(self._secciones, None)
+            if seccion is None:
+                self._secciones = None
+            else:
+                self.extend(seccion)
+        return super().__len__()
+
+
+def generar_reporte_area(collection, year, area, output_path, language="es", header_pdf_path=None, traducir=False):
+    """
+    Genera el reporte consolidado de un área.
+
+    Args:
+        collection: Colección de MongoDB con las evaluaciones (None = según SAR_ALMACEN)
+        year: Año de la academia
+        area: Área a incluir
+        output_path: Ruta o archivo en memoria (BytesIO) donde escribir el PDF
+        language: Idioma del reporte ('es' o 'en')
+        header_pdf_path: Encabezado de cada sección (None = sin encabezado)
+        traducir: Traducir observaciones y conclusiones (solo en inglés)
+
+    Returns:
+        int: Cantidad de participantes incluidos
+    """
+    evaluador_area = cargar_evaluadores_desde_csv(year=year).get(area, "Evaluador no asignado")
+
+    # Primera pasada: solo los totales (para la tabla del comienzo)
+    totales = []
+    for doc in _cursor(collection, year, area):
+        nombre = doc["nombre"]
+        totales.append((nombre, _datos(year, area, nombre)["uni"], Evaluacion.del_catalogo(year, area, doc).total()))
+
+    def secciones():
+        yield tabla_resumen(year, area, totales, language)
+        # Segunda pasada: una sección por participante, armada recién cuando build la necesita
+        for doc in _cursor(collection, year, area):
+            evaluacion = Evaluacion.del_catalogo(year, area, doc)
+            items = evaluacion.a_lista(language)
+            conclusion = doc.get("conclusion", "") or ""
+            if language == "en" and traducir:
+                from traducciones import traducir_textos
+                textos = [item["observaciones"] for item in items] + [conclusion]
+                traducciones = dict(zip(textos, traducir_textos(textos, origen="es", destino="en")))
+                items = [dict(item, observaciones=traducciones.get(item["observaciones"], item["observaciones"])) for item in items]
+                conclusion = traducciones.get(conclusion, conclusion)
+            yield [PageBreak()] + construir_elementos(_datos(year, area, doc["nombre"]), items, conclusion,
+                                                      doc.get("evaluador") or evaluador_area, language, header_pdf_path)
+
+    documento = SimpleDocTemplate(output_path, pagesize=A4, leftMargin=40, rightMargin=40, topMargin=40, bottomMargin=40,
+                                  title=f"{area} {year}")
+    documento.build(FlowablesPorSeccion(secciones()), onFirstPage=add_page_number, onLaterPages=add_page_number)
+    return len(totales)
+
+
+def generar_reporte_area_bytes(collection, year, area, language="es", header_pdf_path=None, traducir=False):
+    """
+    Igual que generar_reporte_area, pero devuelve el PDF en memoria.
+
+    Returns:
+        tuple: (bytes del PDF, cantidad de participantes)
+    """
+    buffer = io.BytesIO()
+    cantidad = generar_reporte_area(collection, year, area, buffer, language, header_pdf_path, traducir)
+    return buffer.getvalue(), cantidad
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Genera el reporte consolidado (un PDF) de un área de una academia SAR.")
+    parser.add_argument("--year", type=int, required=True, help="Año de la academia (ej. 2024)")
+    parser.add_argument("--area", required=True, help="Área del reporte")
+    parser.add_argument("--idioma", default="es", choices=["es", "en"], help="Idioma del reporte")
+    parser.add_argument("--traducir", action="store_true", help="Traducir observaciones y conclusiones (solo en inglés)")
+    parser.add_argument("--salida", default=None, help="Ruta del PDF (por defecto reporte_<year>_<area>.pdf)")
+    parser.add_argument("--mongo-uri", default=None, help="URI de MongoDB (por defecto st.secrets['mongo_uri'])")
+    parser.add_argument("--db", default=None, help="Base de datos (por defecto st.secrets['db_name'])")
+    parser.add_argument("--coleccion", default=None, help="Colección (por defecto st.secrets['collection_name'])")
+    args = parser.parse_args()
+
+    from generacion_lote import encabezado_para_year
+    from repositorio_evaluaciones import obtener_coleccion
+    collection = obtener_coleccion(args.mongo_uri, args.db, args.coleccion)
+
+    salida = args.salida or f"reporte_{args.year}_{args.area}.pdf"
+    cantidad = generar_reporte_area(collection, args.year, args.area, salida, args.idioma,
+                                    encabezado_para_year(args.year), args.traducir)
+    print(f"✅ Reporte con {cantidad} participantes en {salida}")
+
+
+if __name__ == "__main__":
+    main()
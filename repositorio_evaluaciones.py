@@ -0,0 +1,580 @@
+# repositorio_evaluaciones.py
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+
+import streamlit as st
+from pymongo import ASCENDING, MongoClient, ReturnDocument, UpdateOne
+from pymongo.errors import DuplicateKeyError, PyMongoError
+
+from datos_referencia import ids_preguntas, preguntas_por_area, years_preguntas
+from modelo_evaluacion import VERSION_ESQUEMA, Evaluacion, clave_borrador
+
+# MAJ: Todo el acceso a MongoDB de las evaluaciones pasa por este módulo.
+# - Un único MongoClient (con su pool de conexiones) por proceso, creado recién cuando se usa
+# - Índice único compuesto (year, area, nombre): las búsquedas y los upserts no recorren la colección
+# - Proyecciones: solo se traen los campos que se usan
+# - Precarga: al pedir una evaluación se traen en una sola consulta todas las del año/área y se
+#   guardan en memoria por unos segundos, así navegar entre participantes no vuelve a la base
+# - Almacén local (SAR_ALMACEN): las evaluaciones pueden vivir en un archivo SQLite (almacen_local.py),
+#   solo ("sqlite", sin MongoDB) o delante de MongoDB ("mixto"): se lee y se guarda en el archivo local,
+#   cada área se trae de MongoDB la primera vez y los guardados se sincronizan después con un bulk_write.
+#   Si MongoDB no responde se sigue trabajando con lo local y se reintenta más tarde.
+#   Con una colección explícita (CLI, benchmarks) siempre se usa MongoDB.
+# - Control de versión optimista: cada guardado suma 1 a 'version' y actualiza 'actualizado'. La app
+#   guarda solo las preguntas que cambió el evaluador ($set de respuestas.<qid>) y solo si la versión
+#   no cambió desde que cargó la evaluación; si cambió, combina sus cambios con los del otro guardado
+#   o, si tocaron las mismas preguntas, devuelve los conflictos para que el evaluador decida.
+#   Los borradores del autoguardado van aparte, en borradores.<evaluador>, y no cambian la versión:
+#   pasan a 'respuestas' recién con el guardado completo (que además borra el borrador del evaluador).
+#   En modo mixto se sincronizan aparte de los guardados, solo con $set/$unset de borradores.<evaluador>.
+
+MAX_POOL_CONEXIONES = 50
+TIMEOUT_SELECCION_SERVIDOR_MS = 5000
+NOMBRE_INDICE = "year_area_nombre"
+NOMBRE_INDICE_HISTORIAL = "nombre_year"
+NOMBRE_INDICE_RESPUESTAS = "respuestas_por_pregunta"
+
+# Precarga por año/área (SAR_PRECARGA=0 para desactivarla)
+PRECARGA_ACTIVADA = os.environ.get("SAR_PRECARGA", "1") != "0"
+TTL_PRECARGA_SEGUNDOS = 30
+
+# Almacén de las evaluaciones: "mongo" (por defecto), "sqlite" o "mixto"
+MODO_ALMACEN = os.environ.get("SAR_ALMACEN", "mongo")
+TTL_AREA_LOCAL_SEGUNDOS = 300  # cada cuánto se vuelve a traer un área de MongoDB (modo mixto)
+ESPERA_RECONEXION_SEGUNDOS = 60  # después de un error de MongoDB se trabaja solo con lo local por este tiempo
+
+# Campos que usa la app al cargar una evaluación ('evaluaciones' solo existe en documentos sin migrar)
+PROYECCION_EVALUACION = {"_id": 0, "respuestas": 1, "evaluaciones": 1, "conclusion": 1, "evaluador": 1, "fecha": 1, "borrador": 1,
+                         "version": 1, "borradores": 1}
+# Campos de la precarga: los de la app más el nombre para indexar en memoria
+PROYECCION_PRECARGA = dict(PROYECCION_EVALUACION, nombre=1)
+# Campos que usa la generación por lotes (además necesita la clave para agrupar)
+PROYECCION_LOTE = {"_id": 0, "nombre": 1, "area": 1, "respuestas": 1, "evaluaciones": 1, "conclusion": 1, "evaluador": 1}
+# Campos del historial de un participante
+PROYECCION_HISTORIAL = {"_id": 0, "year": 1, "area": 1, "respuestas": 1, "evaluaciones": 1}
+# Errores con los que MongoDB se considera no disponible (KeyError/OSError: faltan los secrets)
+ERRORES_CONEXION = (PyMongoError, KeyError, OSError)
+# Las consultas de resúmenes, reportes, lotes, historial y exportación no incluyen los documentos que
+# solo tienen un borrador autoguardado (creados por el autoguardado y todavía sin guardar)
+FILTRO_SIN_BORRADORES = {"borrador": {"$ne": True}}
+# Veces que se reintenta un guardado cuando otro evaluador guarda al mismo tiempo
+MAX_REINTENTOS_GUARDADO = 3
+
+
+@dataclass(slots=True)
+class ResultadoGuardado:
+    guardado: bool
+    version: int | None = None  # versión que quedó guardada (None si no se conoce)
+    conflictos: dict = field(default_factory=dict)  # qid (o 'conclusion') -> lo que guardó otro evaluador
+    fusionado: bool = False  # True si se combinó con cambios de otro evaluador guardados entretanto
+
+
+def asegurar_indices(collection):
+    """
+    Crea (si no existen) el índice único compuesto sobre (year, area, nombre), el de (nombre, year)
+    y el índice comodín sobre las respuestas por pregunta.
+    """
+    try:
+        collection.create_index(
+            [("year", ASCENDING), ("area", ASCENDING), ("nombre", ASCENDING)],
+            name=NOMBRE_INDICE, unique=True,
+        )
+    except PyMongoError as e:
+        # Por ejemplo si ya hay documentos duplicados: la app sigue funcionando sin el índice
+        print(f"⚠️ No se pudo crear el índice {NOMBRE_INDICE}: {e}")
+    try:
+        # Historial de un participante: todos sus años en una sola consulta por nombre
+        collection.create_index([("nombre", ASCENDING), ("year", ASCENDING)], name=NOMBRE_INDICE_HISTORIAL)
+    except PyMongoError as e:
+        print(f"⚠️ No se pudo crear el índice {NOMBRE_INDICE_HISTORIAL}: {e}")
+    try:
+        # Consultas por pregunta (buscar_por_pregunta): un índice comodín cubre respuestas.<qid> de todas las preguntas
+        collection.create_index([("respuestas.$**", ASCENDING)], name=NOMBRE_INDICE_RESPUESTAS)
+    except PyMongoError as e:
+        print(f"⚠️ No se pudo crear el índice {NOMBRE_INDICE_RESPUESTAS}: {e}")
+
+
+@st.cache_resource
+def obtener_coleccion(mongo_uri=None, db_name=None, collection_name=None):
+    """
+    Devuelve la colección de evaluaciones. El cliente se crea una sola vez por proceso
+    y se comparte entre todas las sesiones (el pool de conexiones es del cliente).
+
+    Args:
+        mongo_uri: URI de MongoDB (None = st.secrets["mongo_uri"])
+        db_name: Base de datos (None = st.secrets["db_name"])
+        collection_name: Colección (None = st.secrets["collection_name"])
+
+    Returns:
+        Collection: Colección de MongoDB con los índices asegurados
+    """
+    client = MongoClient(mongo_uri or st.secrets["mongo_uri"], maxPoolSize=MAX_POOL_CONEXIONES,
+                         serverSelectionTimeoutMS=TIMEOUT_SELECCION_SERVIDOR_MS)
+    collection = client[db_name or st.secrets["db_name"]][collection_name or st.secrets["collection_name"]]
+    asegurar_indices(collection)
+    return collection
+
+
+_precargas = {}  # (year, area, colección) -> (instante de carga, {nombre: documento})
+_versiones = {}  # (year, area) -> cantidad de guardados en este proceso
+_versiones_participante = {}  # nombre -> cantidad de guardados en este proceso
+_lock_precargas = threading.Lock()
+
+
+def version_evaluaciones(year, area=None):
+    """
+    Número que cambia cada vez que se guarda una evaluación del año/área (sirve como clave de caché).
+    Con area=None cambia con cualquier guardado del año.
+    """
+    with _lock_precargas:
+        if area is None:
+            return sum(v for (y, _), v in _versiones.items() if y == year)
+        return _versiones.get((year, area), 0)
+
+
+def precargar_evaluaciones(year, area, collection=None):
+    """
+    Devuelve todas las evaluaciones de un año/área indexadas por nombre, usando la precarga
+    en memoria si tiene menos de TTL_PRECARGA_SEGUNDOS (si no, una sola consulta a MongoDB).
+
+    Returns:
+        dict: {nombre: documento}
+    """
+    collection = collection if collection is not None else obtener_coleccion()
+    # La colección es parte de la clave: una colección pasada explícitamente (otra base, un CLI)
+    # no devuelve la precarga de la colección de la app
+    clave = (year, area, collection.full_name)
+    with _lock_precargas:
+        entrada = _precargas.get(clave)
+        version = _versiones.get((year, area), 0)
+    if entrada is not None and time.monotonic() - entrada[0] < TTL_PRECARGA_SEGUNDOS:
+        return entrada[1]
+
+    instante = time.monotonic()
+    por_nombre = {doc["nombre"]: doc for doc in collection.find({"year": year, "area": area}, PROYECCION_PRECARGA)}
+    with _lock_precargas:
+        # Si se guardó algo mientras se consultaba, no se deja en memoria un resultado viejo
+        if _versiones.get((year, area), 0) == version:
+            _precargas[clave] = (instante, por_nombre)
+    return por_nombre
+
+
+def version_participante(nombre):
+    """Número que cambia cada vez que se guarda una evaluación del participante (clave de caché del historial)."""
+    with _lock_precargas:
+        return _versiones_participante.get(nombre, 0)
+
+
+def invalidar_precarga(year, area, nombre=None):
+    """Descarta la precarga de un año/área (se llama al guardar) y, si se indica, el historial del participante."""
+    with _lock_precargas:
+        for clave in [clave for clave in _precargas if clave[:2] == (year, area)]:
+            del _precargas[clave]
+        _versiones[(year, area)] = _versiones.get((year, area), 0) + 1
+        if nombre is not None:
+            _versiones_participante[nombre] = _versiones_participante.get(nombre, 0) + 1
+
+
+_almacen = None
+_lock_almacen = threading.Lock()
+_lock_sincronizacion = threading.Lock()
+_sin_conexion_hasta = 0.0  # instante (monotonic) hasta el que no se intenta usar MongoDB
+
+
+def obtener_almacen():
+    """Devuelve el almacén SQLite local (uno por proceso)."""
+    global _almacen
+    with _lock_almacen:
+        if _almacen is None:
+            from almacen_local import AlmacenSQLite
+            _almacen = AlmacenSQLite()
+        return _almacen
+
+
+def _usa_almacen_local(collection):
+    return collection is None and MODO_ALMACEN != "mongo"
+
+
+def mongo_disponible():
+    return time.monotonic() >= _sin_conexion_hasta
+
+
+def _sin_conexion(error):
+    global _sin_conexion_hasta
+    _sin_conexion_hasta = time.monotonic() + ESPERA_RECONEXION_SEGUNDOS
+    print(f"⚠️ MongoDB no disponible, se usa el almacén local (reintento en {ESPERA_RECONEXION_SEGUNDOS} s): {error}")
+
+
+def _refrescar_local(year, areas=None):
+    """
+    Modo mixto: trae de MongoDB (en una sola consulta) las áreas que no están en el almacén local
+    o que se trajeron hace más de TTL_AREA_LOCAL_SEGUNDOS. Los cambios locales sin sincronizar no se pisan.
+    """
+    if MODO_ALMACEN != "mixto" or not mongo_disponible():
+        return
+    almacen = obtener_almacen()
+    faltantes = [a for a in (areas or preguntas_por_area(year)) if not almacen.area_cargada(year, a, TTL_AREA_LOCAL_SEGUNDOS)]
+    if not faltantes:
+        return
+    try:
+        por_area = {area: [] for area in faltantes}
+        for doc in obtener_coleccion().find({"year": year, "area": {"$in": faltantes}}, {"_id": 0}):
+            por_area[doc["area"]].append(doc)
+    except ERRORES_CONEXION as e:
+        _sin_conexion(e)
+        return
+    for area, documentos in por_area.items():
+        almacen.reemplazar_area(year, area, documentos)
+    # MongoDB respondió: si quedaron guardados de cuando no había conexión, se suben ahora
+    if almacen.cantidad_pendientes() or almacen.cantidad_borradores_pendientes():
+        sincronizar_en_segundo_plano()
+
+
+def _operacion_guardado(doc):
+    # Upsert del documento completo; la lista 'evaluaciones' del esquema 1 se borra salvo que el documento la traiga.
+    # Los borradores no van: se sincronizan aparte (_operacion_borrador) y así no se pisan los de otros evaluadores
+    campos = {campo: valor for campo, valor in doc.items() if campo not in ("version", "borradores")}
+    campos["actualizado"] = datetime.now()
+    cambios = {"$set": campos, "$inc": {"version": 1}}
+    if "evaluaciones" not in doc:
+        cambios["$unset"] = {"evaluaciones": ""}
+    return UpdateOne({"year": doc["year"], "area": doc["area"], "nombre": doc["nombre"]}, cambios, upsert=True)
+
+
+def _operacion_borrador(doc, clave):
+    # Solo el borrador del evaluador (igual que el autoguardado contra MongoDB): respuestas, conclusión y
+    # versión no se tocan. Si ya no está en el documento local, pasó a las respuestas y se borra.
+    filtro = {"year": doc["year"], "area": doc["area"], "nombre": doc["nombre"]}
+    borrador = (doc.get("borradores") or {}).get(clave)
+    if borrador is None:
+        return UpdateOne(filtro, {"$unset": {f"borradores.{clave}": ""}})
+    al_crear = {"evaluador": doc.get("evaluador"), "fecha": borrador.get("fecha"), "borrador": True, "esquema": VERSION_ESQUEMA}
+    return UpdateOne(filtro, {"$setOnInsert": al_crear, "$set": {f"borradores.{clave}": borrador}}, upsert=True)
+
+
+def sincronizar(collection=None):
+    """
+    Modo mixto: escribe en MongoDB, en un único bulk_write, las evaluaciones guardadas en el almacén
+    local que todavía no se sincronizaron y, aparte, los borradores del autoguardado.
+
+    Returns:
+        int: Cantidad de evaluaciones y borradores sincronizados (0 si MongoDB no está disponible)
+    """
+    global _sin_conexion_hasta
+    if not _lock_sincronizacion.acquire(blocking=False):
+        return 0  # ya hay una sincronización en curso
+    try:
+        almacen = obtener_almacen()
+        pendientes = almacen.pendientes()
+        borradores = almacen.borradores_pendientes()
+        if not pendientes and not borradores:
+            return 0
+        operaciones = [_operacion_guardado(doc) for _, doc in pendientes]
+        operaciones += [_operacion_borrador(doc, clave) for _, clave, doc in borradores]
+        try:
+            collection = collection if collection is not None else obtener_coleccion()
+            collection.bulk_write(operaciones, ordered=False)
+        except ERRORES_CONEXION as e:
+            _sin_conexion(e)
+            return 0
+        _sin_conexion_hasta = 0.0
+        almacen.marcar_sincronizados(pendientes)
+        almacen.marcar_borradores_sincronizados(borradores)
+        return len(pendientes) + len(borradores)
+    finally:
+        _lock_sincronizacion.release()
+
+
+def sincronizar_en_segundo_plano():
+    """Lanza sincronizar() en un hilo si MongoDB está disponible (no bloquea la interfaz)."""
+    if MODO_ALMACEN == "mixto" and mongo_disponible():
+        threading.Thread(target=sincronizar, daemon=True).start()
+
+
+def cantidad_sin_sincronizar():
+    """Evaluaciones guardadas localmente que todavía no están en MongoDB (0 fuera del modo mixto)."""
+    return obtener_almacen().cantidad_pendientes() if MODO_ALMACEN == "mixto" else 0
+
+
+def cargar_evaluacion(nombre, area, year, collection=None):
+    if _usa_almacen_local(collection):
+        _refrescar_local(year, [area])
+        return obtener_almacen().obtener(year, area, nombre)
+
+    if PRECARGA_ACTIVADA:
+        return precargar_evaluaciones(year, area, collection).get(nombre)
+
+    collection = collection if collection is not None else obtener_coleccion()
+    evaluacion_guardada = collection.find_one(
+        {"year": year, "area": area, "nombre": nombre}, PROYECCION_EVALUACION
+    )
+    return evaluacion_guardada
+
+
+def _sin_borradores(documentos):
+    # Almacén local: mismo filtro que FILTRO_SIN_BORRADORES
+    return (doc for doc in documentos if doc.get("borrador") is not True)
+
+
+def buscar_evaluaciones(year, areas=None, collection=None, incluir_borradores=False):
+    """
+    Trae en una sola consulta todas las evaluaciones de un año (y opcionalmente de algunas áreas).
+
+    Args:
+        incluir_borradores: True para incluir los documentos que solo tienen un borrador autoguardado
+
+    Returns:
+        dict: {(nombre, area): documento}
+    """
+    if _usa_almacen_local(collection):
+        _refrescar_local(year, areas)
+        documentos = obtener_almacen().buscar(year, areas)
+        if incluir_borradores:
+            return documentos
+        return {clave: doc for clave, doc in documentos.items() if doc.get("borrador") is not True}
+
+    collection = collection if collection is not None else obtener_coleccion()
+    filtro = {"year": year} if incluir_borradores else dict(FILTRO_SIN_BORRADORES, year=year)
+    if areas:
+        filtro["area"] = {"$in": list(areas)}
+    return {(doc["nombre"], doc["area"]): doc for doc in collection.find(filtro, PROYECCION_LOTE)}
+
+
+def iterar_evaluaciones(year, area, proyeccion=PROYECCION_LOTE, tamano_lote=50, collection=None, incluir_borradores=False):
+    """
+    Recorre las evaluaciones ordenadas por (year, area, nombre) (usa el índice), leyendo de a tamano_lote.
+
+    Args:
+        year: Año (None = todos)
+        area: Área (None = todas)
+        incluir_borradores: True para incluir los documentos que solo tienen un borrador autoguardado
+    """
+    if _usa_almacen_local(collection):
+        if year is not None:
+            _refrescar_local(year, [area] if area is not None else None)
+        documentos = obtener_almacen().iterar(year, area)
+        return documentos if incluir_borradores else _sin_borradores(documentos)
+
+    collection = collection if collection is not None else obtener_coleccion()
+    filtro = {} if incluir_borradores else dict(FILTRO_SIN_BORRADORES)
+    filtro.update((clave, valor) for clave, valor in (("year", year), ("area", area)) if valor is not None)
+    orden = [("year", ASCENDING), ("area", ASCENDING), ("nombre", ASCENDING)]
+    return collection.find(filtro, proyeccion).sort(orden).batch_size(tamano_lote)
+
+
+def buscar_historial(nombre, collection=None):
+    """
+    Todas las evaluaciones de un participante (de todos los años y áreas) en una sola consulta
+    por el índice (nombre, year).
+
+    Returns:
+        list: Documentos con year, area y respuestas, ordenados por año
+    """
+    if _usa_almacen_local(collection):
+        for year in years_preguntas():
+            _refrescar_local(year)
+        return list(_sin_borradores(obtener_almacen().buscar_por_nombre(nombre)))
+
+    collection = collection if collection is not None else obtener_coleccion()
+    return list(collection.find(dict(FILTRO_SIN_BORRADORES, nombre=nombre), PROYECCION_HISTORIAL).sort("year", ASCENDING))
+
+
+def buscar_por_pregunta(year, area, qid, calificacion_maxima=None, collection=None):
+    """
+    Evaluaciones de un año/área que respondieron una pregunta (opcionalmente con calificación <= calificacion_maxima).
+    La pregunta se filtra por su clave en 'respuestas' (índice comodín NOMBRE_INDICE_RESPUESTAS).
+
+    Returns:
+        dict: {nombre: [calificacion, observaciones]}
+    """
+    if _usa_almacen_local(collection):
+        respuestas = ((doc["nombre"], doc.get("respuestas", {}).get(qid)) for doc in iterar_evaluaciones(year, area))
+        return {nombre: respuesta for nombre, respuesta in respuestas
+                if respuesta is not None and (calificacion_maxima is None or respuesta[0] <= calificacion_maxima)}
+
+    collection = collection if collection is not None else obtener_coleccion()
+    campo = f"respuestas.{qid}"
+    filtro = dict(FILTRO_SIN_BORRADORES, year=year, area=area, **{campo: {"$exists": True}})
+    if calificacion_maxima is not None:
+        filtro[f"{campo}.0"] = {"$lte": calificacion_maxima}
+    return {doc["nombre"]: doc["respuestas"][qid] for doc in collection.find(filtro, {"_id": 0, "nombre": 1, campo: 1})}
+
+
+# Guardar evaluación en MongoDB
+def guardar_evaluacion(datos, evaluaciones, conclusion, evaluador, descripciones_areas, year, collection=None,
+                       base=None, forzar=False, autor=None):
+    """
+    Guarda la evaluación de un participante.
+
+    Args:
+        base: MAJ: Documento tal como se cargó al empezar a editar ({} si no había evaluación guardada).
+              Con base solo se escriben las preguntas que cambiaron y solo si nadie guardó esas mismas
+              preguntas entretanto. None = sin control de versión (se reemplazan todas las respuestas).
+        forzar: Con base, guardar aunque otro evaluador haya cambiado las mismas preguntas
+        autor: Quién guarda, cuando el área tiene varios evaluadores (None = evaluador): su borrador
+               autoguardado es el que se da por guardado
+
+    Returns:
+        ResultadoGuardado
+    """
+    # Asegurarse de que todas las descripciones estén en evaluaciones, si no tienen calificación asignada se les da un 0
+    # MAJ: Se completa con el modelo (búsqueda por número/descripción en un diccionario, en el orden del CSV)
+    if not isinstance(evaluaciones, Evaluacion):
+        modelo = Evaluacion.desde_catalogo(descripciones_areas[datos["area"]], #MAJ las descripciones se pasan como parámetro
+                                           ids=ids_preguntas(year).get(datos["area"]))
+        modelo.cargar_items(evaluaciones)
+        evaluaciones = modelo
+
+    if base is not None:
+        return _guardar_con_version(datos, evaluaciones, conclusion, evaluador, year, base, forzar, collection, autor)
+
+    evaluacion_doc = {
+        "nombre": datos["nombre"],
+        "area": datos["area"],
+        "year": year,  # Agregar el año
+        "fecha": datetime.now(),
+        "actualizado": datetime.now(),
+        "evaluador": evaluador,
+        "respuestas": evaluaciones.a_respuestas(completa=True),  # MAJ: {qid: [calificacion, observaciones]}
+        "esquema": VERSION_ESQUEMA,
+        "conclusion": conclusion,
+        "borrador": False  # MAJ: el autoguardado crea documentos marcados como borrador
+    }
+    # El borrador del evaluador ya está incluido en lo que se guarda
+    quitar = {"evaluaciones": "", f"borradores.{clave_borrador(autor or evaluador)}": ""}
+
+    # MAJ: Almacén local: se guarda en SQLite; en modo mixto queda pendiente y se sincroniza en segundo plano
+    if _usa_almacen_local(collection):
+        obtener_almacen().guardar(evaluacion_doc, pendiente=MODO_ALMACEN == "mixto")
+        invalidar_precarga(year, datos["area"], datos["nombre"])
+        sincronizar_en_segundo_plano()
+        return ResultadoGuardado(True)
+
+    collection = collection if collection is not None else obtener_coleccion()
+    # Usar update_one con upsert para actualizar si existe o crear si no existe
+    # Buscar por año, área y nombre (mismo orden que el índice)
+    # La lista 'evaluaciones' del esquema anterior se reemplaza por 'respuestas'
+    guardado = collection.find_one_and_update(
+        {"year": year, "area": datos["area"], "nombre": datos["nombre"]},
+        {"$set": evaluacion_doc, "$unset": quitar, "$inc": {"version": 1}},
+        projection={"_id": 0, "version": 1}, upsert=True, return_document=ReturnDocument.AFTER
+    )
+    invalidar_precarga(year, datos["area"], datos["nombre"])
+    return ResultadoGuardado(True, guardado["version"])
+
+
+def tiene_respuestas(documento):
+    """True si el documento tiene respuestas guardadas (y no solo un borrador)."""
+    return bool(documento.get("respuestas") or documento.get("evaluaciones"))
+
+
+def _escribir_si_version(year, area, nombre, version_base, campos, quitar, collection, vacio=False):
+    """
+    Actualización condicional: devuelve la nueva versión, o None si la guardada ya no es version_base.
+    Con vacio=True (se empezó a editar sin respuestas guardadas) además el documento guardado tiene que
+    seguir sin respuestas: uno creado por un borrador o sin 'version' pero ya respondido no coincide.
+    """
+    if _usa_almacen_local(collection):
+        return obtener_almacen().actualizar_si_version(year, area, nombre, version_base, campos, quitar,
+                                                       pendiente=MODO_ALMACEN == "mixto", vacio=vacio)
+    clave = {"year": year, "area": area, "nombre": nombre}
+    # version 0 = documento nuevo o guardado antes de que existiera 'version' (null también coincide si falta)
+    filtro = dict(clave, version=version_base if version_base else {"$in": [0, None]})
+    if vacio:
+        filtro.update(respuestas={"$in": [None, {}]}, evaluaciones={"$exists": False})
+    actualizacion = {"$set": campos, "$inc": {"version": 1}}
+    if quitar:
+        actualizacion["$unset"] = {campo: "" for campo in quitar}
+    try:
+        guardado = collection.find_one_and_update(filtro, actualizacion, projection={"_id": 0, "version": 1},
+                                                  upsert=not version_base, return_document=ReturnDocument.AFTER)
+    except DuplicateKeyError:
+        # El upsert chocó con el índice único: el documento ya existe con otra versión (o con respuestas)
+        return None
+    return guardado["version"] if guardado else None
+
+
+def _guardar_con_version(datos, evaluacion, conclusion, evaluador, year, base, forzar, collection, autor=None):
+    area, nombre = datos["area"], datos["nombre"]
+    if not _usa_almacen_local(collection):
+        collection = collection if collection is not None else obtener_coleccion()
+
+    def respuestas_de(doc):
+        # {qid: [calificacion, observaciones]} de un documento de cualquier esquema, sin calificar = 0 (como se guardan)
+        return Evaluacion.del_catalogo(year, area, doc).a_respuestas(completa=True)
+
+    mias = evaluacion.a_respuestas(completa=True)
+    respuestas_base = respuestas_de(base)
+    conclusion_base = base.get("conclusion", "") or ""
+    # Solo las preguntas que este evaluador cambió pueden estar en conflicto
+    cambios = {qid: valor for qid, valor in mias.items() if respuestas_base.get(qid) != valor}
+    cambia_conclusion = conclusion != conclusion_base
+    quitar_borrador = (f"borradores.{clave_borrador(autor or evaluador)}",)  # el borrador ya está incluido en lo que se guarda
+
+    guardado = base  # documento sobre el que se escribe: el cargado al empezar y, si cambió, el que está guardado
+    fusionado = False
+    for _ in range(MAX_REINTENTOS_GUARDADO):
+        ahora = datetime.now()
+        version = guardado.get("version") or 0
+        vacio = not tiene_respuestas(guardado)
+        if vacio:
+            # Documento sin respuestas (nuevo o creado por un borrador): se escriben todas
+            escribir, quitar = mias, quitar_borrador
+        elif guardado.get("evaluaciones"):
+            # Esquema 1: se reescribe completo (lo guardado más los cambios) y se borra la lista 'evaluaciones'
+            escribir, quitar = dict(respuestas_de(guardado), **cambios), ("evaluaciones",) + quitar_borrador
+        else:
+            escribir, quitar = cambios, quitar_borrador
+        campos = {f"respuestas.{qid}": valor for qid, valor in escribir.items()}
+        campos.update({"evaluador": evaluador, "fecha": ahora, "actualizado": ahora, "esquema": VERSION_ESQUEMA, "borrador": False})
+        if cambia_conclusion or vacio:
+            campos["conclusion"] = conclusion
+        nueva_version = _escribir_si_version(year, area, nombre, version, campos, quitar, collection, vacio)
+        if nueva_version is not None:
+            invalidar_precarga(year, area, nombre)
+            if _usa_almacen_local(collection):
+                sincronizar_en_segundo_plano()
+            return ResultadoGuardado(True, nueva_version, {}, fusionado)
+
+        # Otro evaluador guardó entretanto: hay conflicto si cambió las mismas preguntas con otro valor
+        if _usa_almacen_local(collection):
+            guardado = obtener_almacen().obtener(year, area, nombre) or {}
+        else:
+            guardado = collection.find_one({"year": year, "area": area, "nombre": nombre}, PROYECCION_EVALUACION) or {}
+        respuestas_actuales = respuestas_de(guardado)
+        conflictos = {qid: respuestas_actuales.get(qid) for qid, valor in cambios.items()
+                      if respuestas_actuales.get(qid) not in (respuestas_base.get(qid), valor)}
+        conclusion_actual = guardado.get("conclusion", "") or ""
+        if cambia_conclusion and conclusion_actual not in (conclusion_base, conclusion):
+            conflictos["conclusion"] = conclusion_actual
+        if conflictos and not forzar:
+            return ResultadoGuardado(False, guardado.get("version") or 0, conflictos)
+        fusionado = True
+    return ResultadoGuardado(False, guardado.get("version") or 0, {}, fusionado)
+
+
+def guardar_evaluaciones(documentos, collection=None):
+    """
+    Guarda muchas evaluaciones completas (mismo formato que guardar_evaluacion) en un único bulk_write.
+
+    Args:
+        documentos: Lista de documentos con nombre, area, year, respuestas, conclusion...
+
+    Returns:
+        int: Cantidad de evaluaciones guardadas
+    """
+    if not documentos:
+        return 0
+    if _usa_almacen_local(collection):
+        obtener_almacen().guardar_varios(documentos, pendiente=MODO_ALMACEN == "mixto")
+        sincronizar_en_segundo_plano()
+    else:
+        collection = collection if collection is not None else obtener_coleccion()
+        # ordered=False: cada participante es independiente
+        collection.bulk_write([_operacion_guardado(doc) for doc in documentos], ordered=False)
+    for doc in documentos:
+        invalidar_precarga(doc["year"], doc["area"], doc["nombre"])
+    return len(documentos)
@@ -0,0 +1,102 @@
+# resumen.py
+import pandas as pd
+import streamlit as st
+
+from modelo_evaluacion import Evaluacion
+from repositorio_evaluaciones import TTL_PRECARGA_SEGUNDOS, buscar_evaluaciones, version_evaluaciones
+
+# MAJ: Estadísticas por área y por pregunta de un año. Todas las evaluaciones del año se traen en
+# una sola consulta y se aplanan a un DataFrame (una fila por participante y pregunta) con
+# json_normalize + melt, cruzando las respuestas con el catálogo del año por (área, Id_Pregunta);
+# las estadísticas salen de groupby/crosstab sobre ese DataFrame. Las preguntas se agrupan por
+# (área, Id_Pregunta): la misma redacción en dos áreas son dos preguntas distintas.
+# El resultado se cachea por (año, área) y se invalida al guardar (version_evaluaciones).
+
+CALIFICACIONES = [0, 1, 2, 3, 4, 5]
+COLUMNAS_APLANADAS = ["nombre", "area", "qid", "numero", "descripcion", "calificacion"]
+
+
+def _catalogo(year, areas):
+    # Una fila por pregunta del catálogo de cada área: area, qid, numero, descripcion
+    return pd.DataFrame([(area, p.qid, p.numero, p.descripcion_es) for area in areas for p in Evaluacion.del_catalogo(year, area)],
+                        columns=["area", "qid", "numero", "descripcion"])
+
+
+def aplanar_evaluaciones(documentos, year):
+    """
+    Convierte documentos de MongoDB en un DataFrame con una fila por (nombre, area, pregunta) calificada.
+    Las respuestas ({qid: [calificacion, observaciones]}) se cruzan con el catálogo del año por (area, qid);
+    las que no están en el catálogo no se cuentan. Los documentos del esquema 1 se pasan antes a respuestas.
+
+    Returns:
+        DataFrame: columnas nombre, area, qid, numero, descripcion, calificacion
+    """
+    documentos = [{"nombre": doc["nombre"], "area": doc["area"],
+                   "respuestas": Evaluacion.del_catalogo(year, doc["area"], doc).a_respuestas() if doc.get("evaluaciones")
+                   else doc.get("respuestas") or {}}
+                  for doc in documentos]
+    if not documentos:
+        return pd.DataFrame(columns=COLUMNAS_APLANADAS)
+    ancho = pd.json_normalize(documentos, max_level=1)
+    columnas_respuestas = [c for c in ancho.columns if c.startswith("respuestas.")]
+    largo = ancho.melt(id_vars=["nombre", "area"], value_vars=columnas_respuestas, var_name="qid", value_name="respuesta")
+    largo = largo.dropna(subset=["respuesta"])
+    largo["qid"] = largo["qid"].str.removeprefix("respuestas.")
+    largo["calificacion"] = pd.to_numeric(largo["respuesta"].str[0], errors="coerce")
+    largo = largo[largo["calificacion"].isin(CALIFICACIONES)]
+    df = largo.merge(_catalogo(year, largo["area"].unique()), on=["area", "qid"])
+    df["calificacion"] = df["calificacion"].astype(int)
+    return df[COLUMNAS_APLANADAS]
+
+
+def calcular_resumen(df):
+    """
+    Calcula las estadísticas de un DataFrame aplanado.
+
+    Args:
+        df: DataFrame de aplanar_evaluaciones
+
+    Returns:
+        dict: 'por_pregunta' (promedio, desvío, cantidad y distribución 0-5 por área y pregunta, en el orden
+              del catálogo; el índice es "número. pregunta", con el área adelante si hay más de una),
+              'ranking' (total por participante con su posición) y
+              'por_area' (promedio, mínimo y máximo del total por área)
+    """
+    claves = ["area", "qid"]
+    por_pregunta = df.groupby(claves)["calificacion"].agg(promedio="mean", desvio="std", evaluados="count")
+    distribucion = pd.crosstab([df["area"], df["qid"]], df["calificacion"]).reindex(columns=CALIFICACIONES, fill_value=0)
+    distribucion.columns = [f"cant. {c}" for c in distribucion.columns]
+    etiquetas = df.drop_duplicates(claves).set_index(claves)[["numero", "descripcion"]]
+    por_pregunta = etiquetas.join(por_pregunta).join(distribucion).sort_values(["area", "numero"]).reset_index()
+    etiqueta = por_pregunta["numero"].astype(str) + ". " + por_pregunta["descripcion"]
+    if por_pregunta["area"].nunique() > 1:
+        etiqueta = por_pregunta["area"] + " - " + etiqueta
+    por_pregunta = por_pregunta.set_index(etiqueta.rename("pregunta")).drop(columns=["numero", "descripcion"])
+
+    totales = df.groupby(["area", "nombre"], as_index=False)["calificacion"].sum().rename(columns={"calificacion": "total"})
+    ranking = totales.sort_values("total", ascending=False, kind="stable").reset_index(drop=True)
+    ranking.insert(0, "posicion", ranking["total"].rank(method="min", ascending=False).astype(int))
+
+    por_area = totales.groupby("area")["total"].agg(participantes="count", promedio="mean", minimo="min", maximo="max")
+
+    return {"por_pregunta": por_pregunta, "ranking": ranking, "por_area": por_area}
+
+
+@st.cache_data(ttl=TTL_PRECARGA_SEGUNDOS, show_spinner=False)
+def _resumen_cacheado(year, area, version):
+    # version solo forma parte de la clave de la caché: cambia cada vez que se guarda
+    documentos = buscar_evaluaciones(year, [area] if area else None).values()
+    df = aplanar_evaluaciones(list(documentos), year)
+    if df.empty:
+        return None
+    return calcular_resumen(df)
+
+
+def obtener_resumen(year, area=None):
+    """
+    Resumen de un año (area=None) o de un área, cacheado hasta el próximo guardado.
+
+    Returns:
+        dict | None: Ver calcular_resumen (None si no hay evaluaciones guardadas)
+    """
+    return _resumen_cacheado(year, area, version_evaluaciones(year, area))
@@ -0,0 +1,264 @@
+# traducciones.py
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+
+# MAJ: Las traducciones (observaciones y conclusión de la pestaña English) se guardan en una caché
+# SQLite local con expulsión LRU. Los textos que no están en caché se traducen todos juntos en una
+# sola llamada al traductor. El traductor es intercambiable: GoogleTranslator en producción y un
+# traductor local sin red para pruebas (SAR_TRADUCTOR=local).
+
+RUTA_BASE = os.path.dirname(os.path.abspath(__file__))
+RUTA_CACHE_TRADUCCIONES = os.environ.get("SAR_CACHE_TRADUCCIONES", os.path.join(RUTA_BASE, ".cache", "traducciones.sqlite"))
+MAX_ENTRADAS_CACHE = 5000
+# La expulsión (LRU) corre recién cuando la caché supera el máximo en este margen, no en cada guardado
+MARGEN_EXPULSION = 500
+
+# Prefetch: hilos para traducir en segundo plano y plazo máximo para esperar los resultados
+MAX_HILOS_TRADUCCION = int(os.environ.get("SAR_HILOS_TRADUCCION", "8"))
+PLAZO_TRADUCCION_SEGUNDOS = float(os.environ.get("SAR_PLAZO_TRADUCCION", "3"))
+
+# Google acepta hasta 5000 caracteres por consulta; se deja margen para los separadores
+MAX_CARACTERES_LOTE = 4500
+_SEPARADOR = "\n[[{}]]\n"
+_PATRON_SEPARADOR = re.compile(r"\s*\[\[\s*(\d+)\s*\]\]\s*")
+
+
+class TraductorGoogle:
+    """Traductor real (deep_translator.GoogleTranslator), con varios textos por consulta."""
+
+    def traducir_lote(self, textos, origen, destino):
+        from deep_translator import GoogleTranslator
+
+        traductor = GoogleTranslator(source=origen, target=destino)
+        traducciones = []
+        for grupo in _agrupar_por_tamano(textos):
+            if len(grupo) == 1:
+                traducciones.append(traductor.translate(grupo[0]) or grupo[0])
+                continue
+            # Los textos se unen con marcadores numerados; si la respuesta no los respeta, se traducen de a uno
+            unido = "".join(_SEPARADOR.format(i) + texto for i, texto in enumerate(grupo))
+            partes = _separar(traductor.translate(unido) or "", len(grupo))
+            if partes is None:
+                partes = [traductor.translate(texto) or texto for texto in grupo]
+            traducciones.extend(partes)
+        return traducciones
+
+
+class TraductorLocal:
+    """
+    Traductor sin red para pruebas: usa un diccionario fijo y, para el resto,
+    devuelve el texto con un prefijo del idioma destino.
+    """
+
+    def __init__(self, diccionario=None):
+        self.diccionario = diccionario or {}
+        self.llamadas = 0
+
+    def traducir_lote(self, textos, origen, destino):
+        self.llamadas += 1
+        return [self.diccionario.get(texto, f"[{destino}] {texto}") for texto in textos]
+
+
+def _agrupar_por_tamano(textos):
+    grupo, tamano = [], 0
+    for texto in textos:
+        largo = len(texto) + len(_SEPARADOR) + 4
+        if grupo and tamano + largo > MAX_CARACTERES_LOTE:
+            yield grupo
+            grupo, tamano = [], 0
+        grupo.append(texto)
+        tamano += largo
+    if grupo:
+        yield grupo
+
+
+def _separar(traduccion, cantidad):
+    partes = _PATRON_SEPARADOR.split(traduccion)
+    # split con grupo de captura: ['', '0', texto0, '1', texto1, ...]
+    indices, textos = partes[1::2], partes[2::2]
+    if partes[0].strip() or indices != [str(i) for i in range(cantidad)]:
+        return None
+    return [texto.strip() for texto in textos]
+
+
+class CacheTraducciones:
+    """Caché persistente de traducciones en SQLite, con expulsión de las menos usadas (LRU)."""
+
+    def __init__(self, ruta=RUTA_CACHE_TRADUCCIONES, max_entradas=MAX_ENTRADAS_CACHE):
+        self.ruta = ruta
+        self.max_entradas = max_entradas
+        self._lock = threading.Lock()
+        if ruta != ":memory:":
+            os.makedirs(os.path.dirname(ruta) or ".", exist_ok=True)
+        self._conexion = sqlite3.connect(ruta, check_same_thread=False)
+        self._conexion.execute(
+            "CREATE TABLE IF NOT EXISTS traducciones ("
+            " clave TEXT PRIMARY KEY, traduccion TEXT NOT NULL, ultimo_uso REAL NOT NULL)"
+        )
+        self._conexion.execute("CREATE INDEX IF NOT EXISTS idx_traducciones_uso ON traducciones (ultimo_uso)")
+        self._conexion.commit()
+        # Entradas guardadas (aproximado: los reemplazos también suman); se vuelve a contar al expulsar
+        self._cantidad = self._conexion.execute("SELECT COUNT(*) FROM traducciones").fetchone()[0]
+
+    @staticmethod
+    def clave(texto, origen, destino):
+        return hashlib.sha256(f"{origen}:{destino}:{texto}".encode("utf-8")).hexdigest()
+
+    def obtener(self, textos, origen, destino):
+        """Devuelve {texto: traducción} para los textos que están en caché y actualiza su último uso."""
+        claves = {self.clave(texto, origen, destino): texto for texto in textos}
+        if not claves:
+            return {}
+        with self._lock:
+            marcadores = ",".join("?" * len(claves))
+            filas = self._conexion.execute(
+                f"SELECT clave, traduccion FROM traducciones WHERE clave IN ({marcadores})", list(claves)
+            ).fetchall()
+            if filas:
+                ahora = time.time()
+                self._conexion.executemany("UPDATE traducciones SET ultimo_uso = ? WHERE clave = ?",
+                                           [(ahora, clave) for clave, _ in filas])
+                self._conexion.commit()
+        return {claves[clave]: traduccion for clave, traduccion in filas}
+
+    def guardar(self, traducciones, origen, destino):
+        """
+        Guarda {texto: traducción}. Si la caché supera el máximo en más de MARGEN_EXPULSION entradas,
+        expulsa las menos usadas hasta volver al máximo.
+        """
+        if not traducciones:
+            return
+        ahora = time.time()
+        with self._lock:
+            self._conexion.executemany(
+                "INSERT OR REPLACE INTO traducciones (clave, traduccion, ultimo_uso) VALUES (?, ?, ?)",
+                [(self.clave(texto, origen, destino), traduccion, ahora) for texto, traduccion in traducciones.items()],
+            )
+            self._cantidad += len(traducciones)
+            if self._cantidad > self.max_entradas + MARGEN_EXPULSION:
+                self._conexion.execute(
+                    "DELETE FROM traducciones WHERE clave NOT IN "
+                    "(SELECT clave FROM traducciones ORDER BY ultimo_uso DESC LIMIT ?)", (self.max_entradas,)
+                )
+                self._cantidad = self._conexion.execute("SELECT COUNT(*) FROM traducciones").fetchone()[0]
+            self._conexion.commit()
+
+
+_traductor = None
+_cache = None
+
+
+def obtener_traductor():
+    """Traductor por defecto: Google, o el local si SAR_TRADUCTOR=local."""
+    global _traductor
+    if _traductor is None:
+        _traductor = TraductorLocal() if os.environ.get("SAR_TRADUCTOR") == "local" else TraductorGoogle()
+    return _traductor
+
+
+def obtener_cache():
+    global _cache
+    if _cache is None:
+        _cache = CacheTraducciones()
+    return _cache
+
+
+def traducir_textos(textos, origen="es", destino="en", traductor=None, cache=None):
+    """
+    Traduce una lista de textos usando la caché y una sola llamada al traductor para los que faltan.
+
+    Args:
+        textos: Lista de textos a traducir (los vacíos se devuelven tal cual)
+        origen: Idioma de origen
+        destino: Idioma de destino
+        traductor: Traductor con método traducir_lote (None = el por defecto)
+        cache: CacheTraducciones (None = la caché local por defecto)
+
+    Returns:
+        list: Traducciones en el mismo orden; si el traductor falla se devuelve el texto original
+    """
+    traductor = traductor or obtener_traductor()
+    cache = cache or obtener_cache()
+
+    unicos = list(dict.fromkeys(texto for texto in textos if texto))
+    traducidos = cache.obtener(unicos, origen, destino)
+    faltantes = [texto for texto in unicos if texto not in traducidos]
+    if faltantes:
+        try:
+            nuevos = dict(zip(faltantes, traductor.traducir_lote(faltantes, origen, destino)))
+            cache.guardar(nuevos, origen, destino)
+            traducidos.update(nuevos)
+        except Exception as e:
+            print(f"Error al traducir: {e}")
+
+    return [traducidos.get(texto, texto) if texto else texto for texto in textos]
+
+
+_pool_traducciones = None
+_lock_pool = threading.Lock()
+
+
+def _obtener_pool():
+    global _pool_traducciones
+    with _lock_pool:
+        if _pool_traducciones is None:
+            _pool_traducciones = ThreadPoolExecutor(max_workers=MAX_HILOS_TRADUCCION, thread_name_prefix="traduccion")
+        return _pool_traducciones
+
+
+class PrefetchTraducciones:
+    """
+    Traducción en segundo plano de un conjunto de textos.
+
+    Los textos en caché quedan listos al instante; el resto se traduce en paralelo (un texto por hilo)
+    y cada traducción se guarda en la caché apenas termina, aunque haya vencido el plazo.
+    """
+
+    def __init__(self, textos, origen="es", destino="en", traductor=None, cache=None,
+                 plazo=PLAZO_TRADUCCION_SEGUNDOS):
+        self.origen = origen
+        self.destino = destino
+        self._traductor = traductor or obtener_traductor()
+        self._cache = cache or obtener_cache()
+        self._limite = time.monotonic() + plazo
+
+        unicos = list(dict.fromkeys(texto for texto in textos if texto))
+        self._listos = self._cache.obtener(unicos, origen, destino)
+        pool = _obtener_pool()
+        self._futuros = {texto: pool.submit(self._traducir, texto) for texto in unicos if texto not in self._listos}
+
+    def _traducir(self, texto):
+        traduccion = self._traductor.traducir_lote([texto], self.origen, self.destino)[0]
+        self._cache.guardar({texto: traduccion}, self.origen, self.destino)
+        return traduccion
+
+    def listo(self):
+        return all(futuro.done() for futuro in self._futuros.values())
+
+    def resultado(self):
+        """
+        Espera como máximo hasta el plazo y devuelve {texto: traducción}.
+        Los textos que no llegaron a traducirse (o fallaron) quedan en el idioma original.
+        """
+        restante = max(0.0, self._limite - time.monotonic())
+        if self._futuros:
+            wait(self._futuros.values(), timeout=restante)
+        traducidos = dict(self._listos)
+        for texto, futuro in self._futuros.items():
+            if futuro.done() and futuro.exception() is None:
+                traducidos[texto] = futuro.result()
+            else:
+                traducidos[texto] = texto
+        return traducidos
+
+
+def iniciar_prefetch(textos, origen="es", destino="en", traductor=None, cache=None, plazo=PLAZO_TRADUCCION_SEGUNDOS):
+    """
+    Empieza a traducir los textos en segundo plano y devuelve el PrefetchTraducciones para leer el resultado.
+    """
+    return PrefetchTraducciones(textos, origen, destino, traductor, cache, plazo)